@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import json
+import weakref
+from contextlib import asynccontextmanager
+from django.conf import settings
+from django.core.cache import cache
+from . import metrics
+from .client import SYSTEM_PROMPT, trimmed_history
+
+POLL_INTERVAL = 0.1
+
+# Per event loop: {answer key: future resolved with the leader's answer}
+_inflight = weakref.WeakKeyDictionary()
+
+
+def normalize(text):
+    return " ".join(str(text).split()).casefold()
+
+
+def answer_key(data, context=None):
+    """
+    Cache key for a chat request whose retrieval returned ``context``.
+
+    Hashes everything that shapes the answer (model, system prompt, the
+    retrieved chunks, page, trimmed history and question) after normalizing
+    case and whitespace, so trivially different phrasings of the same
+    request share an entry. The chunks carry the indexed content, so an
+    edit to it changes the key; the browser's siteContext only counts when
+    nothing was retrieved, as only then is it sent (see build_messages).
+    """
+    payload = {
+        "model": settings.ASSISTANT_MODEL,
+        "system": SYSTEM_PROMPT,
+        "context": list(context or []),
+        "site": {} if context else data.get("siteContext") or {},
+        "page": (data.get("pageUrl") or "").strip(),
+        "history": [[h["role"], normalize(h["content"])] for h in trimmed_history(data.get("history"))],
+        "message": normalize(data.get("message") or ""),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return f"assistant:answer:{hashlib.sha256(encoded).hexdigest()}"
+
+
+class Flight:
+    """
+    One request's view of a single-flight lookup.
+
+    ``source`` is ``hit`` (answer was cached), ``coalesced`` (answer came from
+    an identical request already in flight) or ``miss``, in which case the
+    caller computes the answer and assigns it to ``answer``.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.answer = None
+        self.source = "miss"
+
+
+async def _poll(key):
+    """Wait for another process to store ``key``; None if it gives up"""
+    lock = f"{key}:lock"
+    deadline = asyncio.get_running_loop().time() + settings.ASSISTANT_REQUEST_TIMEOUT
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        answer = await cache.aget(key)
+        if answer is not None or not await cache.ahas_key(lock):
+            return answer
+    return None
+
+
+async def _store(key, answer):
+    if len(answer) > settings.ASSISTANT_CACHE_MAX_ANSWER_CHARS:
+        metrics.record("too_large")
+        return
+    await cache.aset(key, answer, settings.ASSISTANT_CACHE_TIMEOUT)
+    metrics.record("stored")
+
+
+@asynccontextmanager
+async def single_flight(key):
+    """
+    Look ``key`` up, coalescing with identical requests in flight.
+
+    Within a process, followers await the leader's future. Across processes
+    a short cache lock elects one leader and the others poll for its answer.
+    If the leader fails, followers get ``answer`` None and compute it
+    themselves.
+    """
+    flight = Flight(key)
+    flight.answer = await cache.aget(key)
+    if flight.answer is not None:
+        flight.source = "hit"
+        metrics.record("hit")
+        yield flight
+        return
+
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.setdefault(loop, {})
+    future = inflight.get(key)
+    if future is not None:
+        flight.answer = await asyncio.shield(future)
+        if flight.answer is not None:
+            flight.source = "coalesced"
+            metrics.record("coalesced")
+            yield flight
+            return
+
+    future = inflight[key] = loop.create_future()
+    lock = f"{key}:lock"
+    locked = await cache.aadd(lock, 1, settings.ASSISTANT_REQUEST_TIMEOUT)
+    try:
+        if not locked:
+            flight.answer = await _poll(key)
+            if flight.answer is not None:
+                flight.source = "coalesced"
+        metrics.record(flight.source)
+        yield flight
+        if flight.source == "miss" and flight.answer:
+            await _store(key, flight.answer)
+    finally:
+        if inflight.get(key) is future:
+            del inflight[key]
+        if not future.done():
+            future.set_result(flight.answer or None)
+        if locked:
+            await cache.adelete(lock)
@@ -0,0 +1,139 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from django.conf import settings
+
+try:
+    from openai import AsyncOpenAI
+except Exception:
+    AsyncOpenAI = None
+
+SYSTEM_PROMPT = (
+    "You are a helpful website assistant. Answer ONLY about this website using the provided context. "
+    "If something is not in the context, ask a short clarifying question or say it's not available."
+)
+HISTORY_LIMIT = 12
+
+# Clients and limits are per event loop: httpx connections and asyncio
+# primitives cannot be shared across loops. Under ASGI there is one loop per
+# process, so every request reuses the same connection pool.
+_clients = weakref.WeakKeyDictionary()
+_limits = weakref.WeakKeyDictionary()
+
+
+class AssistantBusy(Exception):
+    """No completion slot became free within ASSISTANT_QUEUE_TIMEOUT"""
+
+
+def is_configured():
+    return AsyncOpenAI is not None and bool(settings.ASSISTANT_API_KEY)
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncOpenAI(
+            api_key=settings.ASSISTANT_API_KEY,
+            base_url=settings.ASSISTANT_BASE_URL or None,
+            timeout=settings.ASSISTANT_TIMEOUT,
+            max_retries=settings.ASSISTANT_MAX_RETRIES,
+        )
+    return client
+
+
+@asynccontextmanager
+async def completion_slot():
+    """Cap in-flight completions per process at ASSISTANT_MAX_CONCURRENCY"""
+    loop = asyncio.get_running_loop()
+    semaphore = _limits.get(loop)
+    if semaphore is None:
+        semaphore = _limits[loop] = asyncio.Semaphore(settings.ASSISTANT_MAX_CONCURRENCY)
+    try:
+        await asyncio.wait_for(semaphore.acquire(), settings.ASSISTANT_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise AssistantBusy()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def trimmed_history(history):
+    """The last HISTORY_LIMIT well-formed user/assistant turns"""
+    turns = []
+    for h in history[-HISTORY_LIMIT:] if isinstance(history, list) else []:
+        if not isinstance(h, dict):
+            continue
+        r = h.get("role")
+        c = h.get("content")
+        if r in ["user", "assistant"] and isinstance(c, str) and c.strip():
+            turns.append({"role": r, "content": c})
+    return turns
+
+
+def build_messages(data, context=None):
+    """
+    Turn a chat request body into (question, OpenAI messages).
+
+    ``context`` is the retrieved site content for the question; the
+    browser-supplied siteContext is only sent when nothing was retrieved.
+    """
+    message = (data.get("message") or "").strip()
+    page_url = data.get("pageUrl") or ""
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if context:
+        messages.append({"role": "system", "content": "Relevant site content:\n\n" + "\n\n".join(context)})
+    else:
+        messages.append({"role": "system", "content": f"Site context: {data.get('siteContext') or {}}"})
+    messages.append({"role": "system", "content": f"Current page URL: {page_url}"})
+
+    messages.extend(trimmed_history(data.get("history")))
+    messages.append({"role": "user", "content": message})
+    return message, messages
+
+
+async def complete(messages):
+    async with completion_slot():
+        resp = await asyncio.wait_for(
+            get_client().chat.completions.create(
+                model=settings.ASSISTANT_MODEL,
+                messages=messages,
+                temperature=0.2,
+            ),
+            settings.ASSISTANT_REQUEST_TIMEOUT,
+        )
+    return resp.choices[0].message.content
+
+
+async def stream(messages):
+    """
+    Yield answer text deltas as the model produces them.
+
+    The whole completion must finish within ASSISTANT_REQUEST_TIMEOUT; the
+    upstream stream is closed on timeout or when the client goes away.
+    """
+    async with completion_slot():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ASSISTANT_REQUEST_TIMEOUT
+        chunks = await asyncio.wait_for(
+            get_client().chat.completions.create(
+                model=settings.ASSISTANT_MODEL,
+                messages=messages,
+                temperature=0.2,
+                stream=True,
+            ),
+            settings.ASSISTANT_REQUEST_TIMEOUT,
+        )
+        try:
+            iterator = chunks.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(iterator), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await chunks.close()
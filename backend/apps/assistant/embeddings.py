@@ -0,0 +1,46 @@
+"""
+Local embedding functions for the retrieval index.
+
+An embedding function takes a list of strings and returns a float32 array
+of shape (len(texts), dim) with L2-normalised rows. ASSISTANT_EMBEDDING_FUNCTION
+selects one by dotted path, so a sentence-transformers model (or anything
+else) can replace the default without touching the index.
+"""
+import hashlib
+import re
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "the this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def hashing_embedding(texts):
+    """
+    Signed feature hashing of unigrams and bigrams with sublinear term weights.
+
+    Needs no model download and is deterministic across processes, so
+    vectors written by a worker stay valid in every web process.
+    """
+    dim = settings.ASSISTANT_EMBEDDING_DIM
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+            matrix[row, h % dim] += 1.0 if h >> 63 else -1.0
+    np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def embed(texts):
+    return import_string(settings.ASSISTANT_EMBEDDING_FUNCTION)(list(texts))
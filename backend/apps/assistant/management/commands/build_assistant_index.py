@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.assistant.retrieval import EMBED_BATCH_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the assistant retrieval index from all indexed site content'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=EMBED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        chunks = rebuild_index(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {chunks} chunks in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+from django.core.management.base import BaseCommand
+
+WORDS = (
+    'Tutors can be found from the tutors page, sessions are booked from a '
+    'tutor profile and study materials live under the materials section.'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve a fake OpenAI-compatible /v1/chat/completions endpoint that '
+        'answers slowly, for exercising the assistant without an API key. '
+        'Point ASSISTANT_BASE_URL at http://<host>:<port>/v1'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--tokens', type=int, default=30, help='Tokens per answer')
+        parser.add_argument('--delay', type=float, default=0.05, help='Seconds between tokens')
+        parser.add_argument('--first-token-delay', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        self.options = options
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_connection, self.options['host'], self.options['port'])
+        self.stdout.write(f'Fake completions on http://{self.options["host"]}:{self.options["port"]}/v1')
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get('content-length', 0)))
+        method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+        if method != 'POST' or not path.rstrip('/').endswith('/chat/completions'):
+            await self.respond(writer, 404, {'error': {'message': 'Not found'}})
+            return True
+
+        payload = json.loads(body or b'{}')
+        model = payload.get('model', 'fake')
+        tokens = [WORDS[i % len(WORDS)] + ' ' for i in range(self.options['tokens'])]
+        await asyncio.sleep(self.options['first_token_delay'])
+
+        if not payload.get('stream'):
+            await asyncio.sleep(self.options['delay'] * len(tokens))
+            await self.respond(writer, 200, {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                    'finish_reason': 'stop',
+                }],
+            })
+            return True
+
+        writer.write(
+            b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n'
+            b'Cache-Control: no-cache\r\nConnection: close\r\n\r\n'
+        )
+        for i, token in enumerate(tokens):
+            chunk = {
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': token},
+                    'finish_reason': 'stop' if i == len(tokens) - 1 else None,
+                }],
+            }
+            writer.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            await writer.drain()
+            await asyncio.sleep(self.options['delay'])
+        writer.write(b'data: [DONE]\n\n')
+        await writer.drain()
+        return False
+
+    async def respond(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(
+            f'HTTP/1.1 {status} {"OK" if status == 200 else "Not Found"}\r\n'
+            f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode()
+            + body
+        )
+        await writer.drain()
@@ -0,0 +1,23 @@
+"""Process-local assistant answer cache counters"""
+import os
+import socket
+from collections import Counter
+
+_counters = Counter()
+
+
+def record(event):
+    _counters[event] += 1
+
+
+def snapshot():
+    lookups = _counters['hit'] + _counters['coalesced'] + _counters['miss']
+    return {
+        'process': f'{socket.gethostname()}:{os.getpid()}',
+        'hit': _counters['hit'],
+        'coalesced': _counters['coalesced'],
+        'miss': _counters['miss'],
+        'stored': _counters['stored'],
+        'too_large': _counters['too_large'],
+        'hit_ratio': round((_counters['hit'] + _counters['coalesced']) / lookups, 3) if lookups else None,
+    }
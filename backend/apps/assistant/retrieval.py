@@ -0,0 +1,150 @@
+"""
+Retrieval index over site content for the assistant.
+
+Materials, discussions, replies, subjects and tutor profiles are split into
+overlapping word windows, embedded with the configured local embedding
+function and kept in a shared NumPy vector store. Saves update the index
+incrementally (see signals.py); ``build_assistant_index`` rebuilds it.
+"""
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from .embeddings import embed
+from .vector_store import SharedVectorStore, VectorStore
+
+EMBED_BATCH_SIZE = 256
+
+
+@lru_cache(maxsize=1)
+def get_index():
+    return SharedVectorStore(str(settings.ASSISTANT_INDEX_PATH), settings.ASSISTANT_EMBEDDING_DIM)
+
+
+def chunk_words(text, size, overlap):
+    words = text.split()
+    if not words:
+        return []
+    step = max(size - overlap, 1)
+    return [" ".join(words[i:i + size]) for i in range(0, max(len(words) - overlap, 1), step)]
+
+
+def _material_source():
+    from apps.materials.models import StudyMaterial
+
+    def render(material):
+        header = f"Study material: {material.title} (subject: {material.subject.name}, page: /materials)"
+        return header, material.description
+
+    return StudyMaterial.objects.select_related("subject").defer("search_vector"), render
+
+
+def _discussion_source():
+    from apps.forum.models import Discussion
+
+    def render(discussion):
+        subject = discussion.subject.name if discussion.subject else "general"
+        header = f"Forum discussion: {discussion.title} (subject: {subject}, page: /forum/{discussion.pk})"
+        return header, discussion.content
+
+    return Discussion.objects.select_related("subject").defer("search_vector"), render
+
+
+def _reply_source():
+    from apps.forum.models import Reply
+
+    def render(reply):
+        header = f"Reply in forum discussion: {reply.discussion.title} (page: /forum/{reply.discussion_id})"
+        return header, reply.content
+
+    return Reply.objects.select_related("discussion").only("content", "discussion__title"), render
+
+
+def _subject_source():
+    from apps.users.models import Subject
+
+    def render(subject):
+        return f"Subject: {subject.name}", subject.description
+
+    return Subject.objects.all(), render
+
+
+def _tutor_source():
+    def render(tutor):
+        name = tutor.get_full_name() or tutor.username
+        subjects = ", ".join(s.name for s in tutor.subjects.all()) or "none listed"
+        header = f"Tutor: {name} (subjects: {subjects}, book at /sessions/new)"
+        return header, tutor.bio
+
+    tutors = get_user_model().objects.filter(role="tutor", is_active=True).prefetch_related("subjects")
+    return tutors, render
+
+
+SOURCES = {
+    "material": _material_source,
+    "discussion": _discussion_source,
+    "reply": _reply_source,
+    "subject": _subject_source,
+    "tutor": _tutor_source,
+}
+
+
+def document_chunks(kind, obj):
+    """(doc key, chunk texts) for one object; every chunk repeats the header"""
+    header, body = SOURCES[kind]()[1](obj)
+    chunks = chunk_words(body or "", settings.ASSISTANT_CHUNK_WORDS, settings.ASSISTANT_CHUNK_OVERLAP)
+    return f"{kind}:{obj.pk}", [f"{header}\n{chunk}" for chunk in chunks] or [header]
+
+
+def _embed_documents(kind, objects):
+    docs, texts = [], []
+    for obj in objects:
+        key, chunks = document_chunks(kind, obj)
+        docs.extend([key] * len(chunks))
+        texts.extend(chunks)
+    vectors = embed(texts) if texts else None
+    return docs, texts, vectors
+
+
+def index_documents(kind, pks):
+    """Re-embed the given objects; pks that no longer qualify are dropped"""
+    queryset, _ = SOURCES[kind]()
+    objects = list(queryset.filter(pk__in=pks))
+    docs, texts, vectors = _embed_documents(kind, objects)
+    with get_index().update() as store:
+        store.upsert([f"{kind}:{pk}" for pk in pks], docs, texts, vectors)
+    return len(texts)
+
+
+def remove_documents(kind, pks):
+    with get_index().update() as store:
+        store.remove([f"{kind}:{pk}" for pk in pks])
+
+
+def rebuild_index(batch_size=EMBED_BATCH_SIZE):
+    """Embed every source from scratch and swap the new index in"""
+    store = VectorStore(settings.ASSISTANT_EMBEDDING_DIM)
+    for kind, source in SOURCES.items():
+        queryset, _ = source()
+        batch = []
+        for obj in queryset.order_by("pk").iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) == batch_size:
+                store.add(*_embed_documents(kind, batch))
+                batch = []
+        if batch:
+            store.add(*_embed_documents(kind, batch))
+    get_index().replace(store)
+    return len(store)
+
+
+def search(query, k=None):
+    """Texts of the top-k chunks most similar to ``query``"""
+    store = get_index().get()
+    if not len(store) or not query.strip():
+        return []
+    results = store.search(
+        embed([query])[0],
+        k or settings.ASSISTANT_RETRIEVAL_TOP_K,
+        settings.ASSISTANT_RETRIEVAL_MIN_SCORE,
+    )
+    return [text for _, _, text in results]
@@ -0,0 +1,52 @@
+from functools import partial
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from apps.forum.models import Discussion, Reply
+from apps.materials.models import StudyMaterial
+from apps.users.models import Subject
+from . import tasks
+
+User = get_user_model()
+
+INDEXED_MODELS = {
+    StudyMaterial: "material",
+    Discussion: "discussion",
+    Reply: "reply",
+    Subject: "subject",
+    User: "tutor",
+}
+TUTOR_FIELDS = {"first_name", "last_name", "username", "bio", "role", "is_active"}
+
+
+def enqueue(task, *args):
+    transaction.on_commit(partial(task.delay, *args))
+
+
+@receiver(post_save)
+def content_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    kind = INDEXED_MODELS.get(sender)
+    if kind is None:
+        return
+    if kind == "tutor":
+        # Logins save last_login only; new students never need indexing.
+        # Existing users are re-indexed so a tutor who changes role is dropped.
+        if update_fields is not None and not TUTOR_FIELDS & set(update_fields):
+            return
+        if created and instance.role != "tutor":
+            return
+    enqueue(tasks.schedule_index, kind, instance.pk)
+
+
+@receiver(post_delete)
+def content_deleted(sender, instance, **kwargs):
+    kind = INDEXED_MODELS.get(sender)
+    if kind is not None:
+        enqueue(tasks.remove_document, kind, instance.pk)
+
+
+@receiver(m2m_changed, sender=User.subjects.through)
+def tutor_subjects_changed(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and getattr(instance, "role", None) == "tutor":
+        enqueue(tasks.schedule_index, "tutor", instance.pk)
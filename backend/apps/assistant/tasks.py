@@ -0,0 +1,32 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from . import retrieval
+
+
+def pending_key(kind, pk):
+    return f"assistant:index_pending:{kind}:{pk}"
+
+
+@shared_task
+def schedule_index(kind, pk):
+    """
+    Re-index one object after ASSISTANT_INDEX_DELAY seconds.
+
+    Saves of the same object inside that window share one re-index, so an
+    edit burst rewrites the index file once.
+    """
+    delay = settings.ASSISTANT_INDEX_DELAY
+    if cache.add(pending_key(kind, pk), 1, timeout=delay * 10):
+        index_document.apply_async((kind, pk), countdown=delay)
+
+
+@shared_task
+def index_document(kind, pk):
+    cache.delete(pending_key(kind, pk))
+    return retrieval.index_documents(kind, [pk])
+
+
+@shared_task
+def remove_document(kind, pk):
+    retrieval.remove_documents(kind, [pk])
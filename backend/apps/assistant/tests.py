@@ -1,3 +1,49 @@
-from django.test import TestCase
+from unittest import mock
+import pytest
+from .cache import answer_key
 
-# Create your tests here.
+CHUNKS = ["Material: Algebra notes\nLinear equations"]
+
+
+def chat_body(**fields):
+    return {"message": "What is algebra?", "pageUrl": "/materials", **fields}
+
+
+def test_answer_key_ignores_site_context_when_content_was_retrieved():
+    first = answer_key(chat_body(siteContext={"title": "Materials"}), CHUNKS)
+    second = answer_key(chat_body(siteContext={"title": "Materials", "scroll": 320}), CHUNKS)
+    assert first == second
+
+
+def test_answer_key_follows_retrieved_content():
+    edited = ["Material: Algebra notes\nQuadratic equations"]
+    assert answer_key(chat_body(), CHUNKS) != answer_key(chat_body(), edited)
+    assert answer_key(chat_body(), CHUNKS) != answer_key(chat_body(), [])
+
+
+def test_answer_key_uses_site_context_without_retrieved_content():
+    assert answer_key(chat_body(siteContext={"title": "A"})) != answer_key(chat_body(siteContext={"title": "B"}))
+
+
+@pytest.fixture
+def assistant():
+    """Patches retrieval and the completion; returns (search, complete) mocks"""
+    with mock.patch("apps.assistant.views.admit", mock.AsyncMock(return_value=0)), \
+            mock.patch("apps.assistant.views.client.is_configured", return_value=True), \
+            mock.patch("apps.assistant.views.retrieval.search", return_value=CHUNKS) as search, \
+            mock.patch("apps.assistant.views.client.complete", mock.AsyncMock(return_value="An answer")) as complete:
+        yield search, complete
+
+
+def test_chat_answers_from_cache_until_retrieved_content_changes(client, assistant):
+    search, complete = assistant
+
+    def ask(site_context):
+        body = chat_body(siteContext=site_context)
+        return client.post("/api/assistant/chat", body, content_type="application/json")
+
+    assert ask({"scroll": 0})["X-Assistant-Cache"] == "miss"
+    assert ask({"scroll": 500})["X-Assistant-Cache"] == "hit"
+    search.return_value = ["Material: Algebra notes\nQuadratic equations"]
+    assert ask({"scroll": 500})["X-Assistant-Cache"] == "miss"
+    assert complete.await_count == 2
@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import AssistantChatAPIView
+from .views import AssistantChatView, AssistantStreamView, AssistantStatsView
 
 urlpatterns = [
-    path("chat", AssistantChatAPIView.as_view(), name='assistant-chat'),
+    path("chat", AssistantChatView.as_view(), name='assistant-chat'),
+    path("chat/stream", AssistantStreamView.as_view(), name='assistant-chat-stream'),
+    path("stats", AssistantStatsView.as_view(), name='assistant-stats'),
 ]
@@ -0,0 +1,148 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+
+class VectorStore:
+    """
+    Chunk embeddings in one contiguous float32 matrix.
+
+    Row i of ``vectors`` belongs to ``docs[i]`` (e.g. ``material:12``) and
+    ``texts[i]``. Updates replace every row of a document at once; search
+    is a single matrix-vector product.
+    """
+
+    def __init__(self, dim, vectors=None, docs=None, texts=None):
+        self.dim = dim
+        self.vectors = vectors if vectors is not None else np.empty((0, dim), dtype=np.float32)
+        self.docs = docs or []
+        self.texts = texts or []
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.docs)
+
+    def remove(self, doc_keys):
+        doc_keys = set(doc_keys)
+        keep = [i for i, doc in enumerate(self.docs) if doc not in doc_keys]
+        if len(keep) == len(self.docs):
+            return
+        self.vectors = self.vectors[keep]
+        self.docs = [self.docs[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.dirty = True
+
+    def add(self, docs, texts, vectors):
+        if not docs:
+            return
+        self.vectors = np.vstack([self.vectors, np.asarray(vectors, dtype=np.float32)])
+        self.docs.extend(docs)
+        self.texts.extend(texts)
+        self.dirty = True
+
+    def upsert(self, doc_keys, docs, texts, vectors):
+        """Replace all chunks of ``doc_keys`` with the given rows"""
+        self.remove(doc_keys)
+        self.add(docs, texts, vectors)
+
+    def search(self, vector, k, min_score=0.0):
+        """The ``k`` best (score, doc, text) by cosine similarity"""
+        if not self.docs:
+            return []
+        scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (float(scores[i]), self.docs[i], self.texts[i])
+            for i in top
+            if scores[i] > min_score
+        ]
+
+    def save(self, path):
+        """Write atomically so concurrent readers never see a partial file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(
+                f,
+                vectors=self.vectors,
+                docs=np.frombuffer(json.dumps(self.docs).encode(), dtype=np.uint8),
+                texts=np.frombuffer(json.dumps(self.texts).encode(), dtype=np.uint8),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, dim):
+        """Load ``path``, or an empty store if it is missing or was built with another dim"""
+        try:
+            with np.load(path) as data:
+                vectors = data['vectors']
+                if vectors.shape[1] != dim:
+                    return cls(dim)
+                return cls(
+                    dim,
+                    vectors,
+                    json.loads(data['docs'].tobytes()),
+                    json.loads(data['texts'].tobytes()),
+                )
+        except FileNotFoundError:
+            return cls(dim)
+
+
+class SharedVectorStore:
+    """
+    A VectorStore file shared by web and worker processes.
+
+    Readers keep the loaded store in memory and reload it when the file's
+    version changes. Writers take an exclusive file lock around
+    load-modify-save so concurrent updates are not lost.
+    """
+
+    def __init__(self, path, dim):
+        self.path = path
+        self.dim = dim
+        self._store = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        # Saves replace the file, so the inode changes even within one mtime tick
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def get(self):
+        version = self._file_version()
+        with self._lock:
+            if self._store is None or version != self._version:
+                self._store = VectorStore.load(self.path, self.dim)
+                self._version = version
+            return self._store
+
+    @contextmanager
+    def update(self):
+        """Yield a fresh copy of the store for writing and save it on exit if changed"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f'{self.path}.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                store = VectorStore.load(self.path, self.dim)
+                yield store
+                if store.dirty:
+                    store.save(self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def replace(self, store):
+        with open(f'{self.path}.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                store.save(self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -1,63 +1,161 @@
-from django.shortcuts import render
-
-# Create your views here.
-
-import os
-from rest_framework.views import APIView
+import asyncio
+import json
+import math
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import permissions
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework.views import APIView
+from apps.core.throttling import admit
 
 try:
-    from openai import OpenAI
+    from openai import APIError
 except Exception:
-    OpenAI = None
+    APIError = None
+
+from . import client, metrics, retrieval
+from .cache import answer_key, single_flight
+from .client import AssistantBusy
+
+EMPTY_ANSWER = "Ask me a question about the website."
+FALLBACK_ANSWER = "Sorry, I couldn't generate an answer."
+BUSY_ERROR = "The assistant is busy, please try again in a moment."
+TIMEOUT_ERROR = "The assistant took too long to answer."
+UPSTREAM_ERROR = "The assistant is unavailable right now."
+UPSTREAM_ERRORS = (APIError,) if APIError is not None else ()
+
+
+def not_configured_answer(message, page_url):
+    return (
+        "AI is not configured yet. Add OPENAI_API_KEY on the backend.\n\n"
+        f"You asked: {message}\n"
+        f"Page: {page_url}"
+    )
+
+
+async def retrieve(message):
+    """Site content chunks for the question"""
+    return await sync_to_async(retrieval.search, thread_sensitive=False)(message)
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AssistantView(View):
+    """
+    Async base for the assistant endpoints.
+
+    Runs on the event loop under ASGI, so a slow completion holds a coroutine
+    rather than a worker thread.
+    """
+    http_method_names = ["post", "options"]
+    throttle_scope = "assistant"
 
-class AssistantChatAPIView(APIView):
-    authentication_classes = []
-    permission_classes = []
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method == "POST":
+            wait = await admit(request, self.throttle_scope)
+            if wait:
+                response = JsonResponse({"error": "Too many requests, please slow down."}, status=429)
+                response["Retry-After"] = str(math.ceil(wait))
+                return response
+        return await super().dispatch(request, *args, **kwargs)
 
-    def post(self, request):
-        message = (request.data.get("message") or "").strip()
-        page_url = request.data.get("pageUrl") or ""
-        site_context = request.data.get("siteContext") or {}
-        history = request.data.get("history") or []
+    def parse(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
 
+
+class AssistantChatView(AssistantView):
+    """Return the full answer as JSON once the completion finishes"""
+
+    async def post(self, request):
+        data = self.parse(request)
+        if data is None:
+            return JsonResponse({"error": "Invalid JSON body."}, status=400)
+
+        message = (data.get("message") or "").strip()
         if not message:
-            return Response({"answer": "Ask me a question about the website."}, status=status.HTTP_200_OK)
-
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key or OpenAI is None:
-            answer = (
-                "AI is not configured yet. Add OPENAI_API_KEY on the backend.\n\n"
-                f"You asked: {message}\n"
-                f"Page: {page_url}"
-            )
-            return Response({"answer": answer}, status=status.HTTP_200_OK)
-
-        client = OpenAI(api_key=api_key)
-
-        system = (
-            "You are a helpful website assistant. Answer ONLY about this website using the provided context. "
-            "If something is not in the context, ask a short clarifying question or say it's not available."
-        )
-
-        messages = [{"role": "system", "content": system}]
-        messages.append({"role": "system", "content": f"Site context: {site_context}"})
-        messages.append({"role": "system", "content": f"Current page URL: {page_url}"})
-
-        for h in history[-12:]:
-            r = h.get("role")
-            c = h.get("content")
-            if r in ["user", "assistant"] and isinstance(c, str) and c.strip():
-                messages.append({"role": r, "content": c})
-
-        messages.append({"role": "user", "content": message})
-
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.2,
-        )
-
-        answer = resp.choices[0].message.content or "Sorry, I couldn't generate an answer."
-        return Response({"answer": answer}, status=status.HTTP_200_OK)
+            return JsonResponse({"answer": EMPTY_ANSWER})
+        if not client.is_configured():
+            return JsonResponse({"answer": not_configured_answer(message, data.get("pageUrl") or "")})
+
+        try:
+            context = await retrieve(message)
+            async with single_flight(answer_key(data, context)) as flight:
+                if flight.answer is None:
+                    flight.answer = await client.complete(client.build_messages(data, context)[1])
+        except AssistantBusy:
+            return JsonResponse({"error": BUSY_ERROR}, status=503)
+        except asyncio.TimeoutError:
+            return JsonResponse({"error": TIMEOUT_ERROR}, status=504)
+        except UPSTREAM_ERRORS:
+            return JsonResponse({"error": UPSTREAM_ERROR}, status=502)
+        response = JsonResponse({"answer": flight.answer or FALLBACK_ANSWER})
+        response["X-Assistant-Cache"] = flight.source
+        return response
+
+
+class AssistantStreamView(AssistantView):
+    """
+    Stream the answer as server-sent events.
+
+    Emits ``delta`` events carrying text as it arrives, then one ``done``
+    event with the full answer, or an ``error`` event.
+    """
+
+    async def post(self, request):
+        data = self.parse(request)
+        if data is None:
+            return JsonResponse({"error": "Invalid JSON body."}, status=400)
+
+        response = StreamingHttpResponse(self.events(data), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def events(self, data):
+        message = (data.get("message") or "").strip()
+        if not message:
+            yield sse("done", {"answer": EMPTY_ANSWER})
+            return
+        if not client.is_configured():
+            yield sse("done", {"answer": not_configured_answer(message, data.get("pageUrl") or "")})
+            return
+
+        try:
+            context = await retrieve(message)
+            async with single_flight(answer_key(data, context)) as flight:
+                if flight.answer is not None:
+                    yield sse("delta", {"content": flight.answer})
+                else:
+                    parts = []
+                    async for delta in client.stream(client.build_messages(data, context)[1]):
+                        parts.append(delta)
+                        yield sse("delta", {"content": delta})
+                    flight.answer = "".join(parts)
+        except AssistantBusy:
+            yield sse("error", {"error": BUSY_ERROR})
+            return
+        except asyncio.TimeoutError:
+            yield sse("error", {"error": TIMEOUT_ERROR})
+            return
+        except UPSTREAM_ERRORS:
+            yield sse("error", {"error": UPSTREAM_ERROR})
+            return
+        yield sse("done", {"answer": flight.answer or FALLBACK_ANSWER, "cache": flight.source})
+
+
+class AssistantStatsView(APIView):
+    """Answer cache counters of the process serving this request"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
@@ -0,0 +1,133 @@
+"""
+Declarative response caching for DRF read views.
+
+A view lists the models its output depends on in ``cache_models``. Each
+model label has a version number in the cache that signals bump on every
+save or delete (see apps.core.signals), and a cached response is only
+served while the versions it was built with are current. Responses carry
+an ETag, so clients revalidating with If-None-Match get a 304.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+def version_key(label):
+    return f'response_version:{label}'
+
+
+def bump_version(label):
+    try:
+        cache.incr(version_key(label))
+    except ValueError:
+        _init_version(label)
+
+
+def _init_version(label):
+    # Start from the clock so a version lost from the cache never repeats
+    cache.add(version_key(label), int(time.time() * 1000), None)
+
+
+def get_version(labels):
+    """Current versions of ``labels`` joined into one string"""
+    keys = [version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    missing = [label for label, key in zip(labels, keys) if key not in versions]
+    if missing:
+        for label in missing:
+            _init_version(label)
+        versions = cache.get_many(keys)
+    return '.'.join(str(versions.get(key, 0)) for key in keys)
+
+
+class CachedResponseMixin:
+    """
+    Cache successful GET responses of a DRF view.
+
+    ``cache_models`` are the model labels whose changes invalidate the
+    response; ``cache_per_user`` keeps a separate entry per user for views
+    whose output depends on who asks. Permissions and throttles still run
+    on every request, before the cache is consulted.
+
+    When an entry is stale, one request rebuilds it (guarded by a cache
+    lock) while concurrent requests keep getting the stale copy; if there is
+    no copy at all they wait up to RESPONSE_CACHE_LOCK_WAIT for the rebuild,
+    then build the response themselves.
+    """
+    cache_models = ()
+    cache_per_user = False
+    cache_timeout = None
+
+    def get_response_cache_key(self, request):
+        query = sorted(request.query_params.lists())
+        parts = [
+            request.get_host(),
+            request.path,
+            repr(query),
+            request.accepted_renderer.format,
+            str(request.user.pk) if self.cache_per_user else '',
+        ]
+        digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+        return f'response:{type(self).__module__}.{type(self).__name__}:{digest}'
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        version = get_version(self.cache_models)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return self.cached_response(request, entry, 'HIT')
+
+        lock = f'{key}:lock'
+        locked = cache.add(lock, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if entry is not None:
+                return self.cached_response(request, entry, 'STALE')
+            entry = self.wait_for_entry(key, version)
+            if entry is not None:
+                return self.cached_response(request, entry, 'HIT')
+
+        try:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response = self.finalize_response(request, response, *args, **kwargs)
+            response.render()
+            entry = {
+                'version': version,
+                'etag': f'"{hashlib.sha256(response.content).hexdigest()[:32]}"',
+                'content': response.content,
+                'content_type': response['Content-Type'],
+            }
+            cache.set(key, entry, self.cache_timeout or settings.RESPONSE_CACHE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock)
+        return self.cached_response(request, entry, 'MISS')
+
+    def wait_for_entry(self, key, version):
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['version'] == version:
+                return entry
+            if not cache.has_key(f'{key}:lock'):
+                return None
+        return None
+
+    def cached_response(self, request, entry, status):
+        if entry['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Cache'] = status
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
@@ -0,0 +1,70 @@
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from apps.core import throttling
+
+
+class PlainView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    throttle_classes = []
+
+    def get(self, request):
+        return Response({})
+
+
+class ThrottledView(PlainView):
+    throttle_classes = [throttling.TokenBucketThrottle]
+    throttle_scope = 'bench'
+
+
+def timings(func, count):
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return (
+        f'mean {statistics.fmean(samples):.3f} ms, '
+        f'p50 {samples[len(samples) // 2]:.3f} ms, '
+        f'p99 {samples[int(len(samples) * 0.99) - 1]:.3f} ms'
+    )
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of the Redis token-bucket throttle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        # Budgets large enough that no request is ever rejected
+        throttling.TokenBucketThrottle.THROTTLE_RATES = {
+            'ip': '1000000000/s',
+            'bench.ip': '1000000000/s',
+            'bench.global': '1000000000/s',
+        }
+        factory = APIRequestFactory()
+        address = f'10.{uuid.uuid4().int % 250}.0.1'
+        plain_view = PlainView.as_view()
+        throttled_view = ThrottledView.as_view()
+
+        throttled_view(factory.get('/bench/', REMOTE_ADDR=address))  # load the script
+        plain = timings(lambda: plain_view(factory.get('/bench/', REMOTE_ADDR=address)), count)
+        throttled = timings(lambda: throttled_view(factory.get('/bench/', REMOTE_ADDR=address)), count)
+        self.stdout.write(f'Unthrottled view: {summary(plain)}')
+        self.stdout.write(f'Throttled view:   {summary(throttled)} (3 buckets, 1 round trip)')
+
+        overhead = statistics.fmean(throttled) - statistics.fmean(plain)
+        style = self.style.SUCCESS if overhead < 1 else self.style.WARNING
+        self.stdout.write(style(f'Throttle overhead: {overhead:.3f} ms per request'))
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import random
+import ssl
+import statistics
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from apps.core.seeding import WORDS
+from apps.forum.models import Discussion
+from apps.materials.models import StudyMaterial
+from apps.users.models import Subject, User
+from apps.users.serializers import TokenWithVersionSerializer
+
+# (name, weight, path builder); weights follow the frontend's traffic, where
+# browsing lists and dashboards dominates. Every request is authenticated.
+ROUTES = [
+    ('materials.list', 10, lambda s: '/api/materials/'),
+    ('materials.list_subject', 5, lambda s: f'/api/materials/?{urlencode({"subject": s.subject()})}'),
+    ('materials.search', 5, lambda s: f'/api/materials/?{urlencode({"search": s.word()})}'),
+    ('materials.detail', 8, lambda s: f'/api/materials/{s.pick("materials")}/'),
+    ('tutors.list', 6, lambda s: '/api/users/tutors/'),
+    ('tutors.leaderboard', 4, lambda s: '/api/users/tutors/leaderboard/'),
+    ('tutors.recommended', 4, lambda s: '/api/users/tutors/recommended/'),
+    ('sessions.upcoming', 6, lambda s: '/api/sessions/upcoming/'),
+    ('sessions.my', 6, lambda s: '/api/sessions/my/'),
+    ('discussions.list', 8, lambda s: '/api/discussions/'),
+    ('discussions.detail', 8, lambda s: f'/api/discussions/{s.pick("discussions")}/'),
+    ('notifications.list', 6, lambda s: '/api/notifications/'),
+    ('notifications.unread_count', 10, lambda s: '/api/notifications/unread-count/'),
+    ('search', 5, lambda s: f'/api/search/?{urlencode({"q": s.word()})}'),
+    ('subjects', 2, lambda s: '/api/auth/subjects/'),
+    ('me', 4, lambda s: '/api/auth/me/'),
+]
+
+
+class Samples:
+    """Ids and terms routes draw from, with a fixed seed per client"""
+
+    def __init__(self, ids, rng):
+        self.ids = ids
+        self.rng = rng
+
+    def pick(self, kind):
+        return self.rng.choice(self.ids[kind])
+
+    def subject(self):
+        return self.pick('subjects')
+
+    def word(self):
+        return self.rng.choice(WORDS)
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened after errors"""
+
+    def __init__(self, url):
+        self.url = url
+        self.reader = self.writer = None
+
+    async def request(self, path, headers):
+        if self.writer is None:
+            port = self.url.port or (443 if self.url.scheme == 'https' else 80)
+            context = ssl.create_default_context() if self.url.scheme == 'https' else None
+            self.reader, self.writer = await asyncio.open_connection(self.url.hostname, port, ssl=context)
+        lines = [f'GET {path} HTTP/1.1', f'Host: {self.url.netloc}', 'Accept: application/json']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        response_headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            await self.read_chunked()
+        else:
+            await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return int(status_line.split(' ', 2)[1])
+
+    async def read_chunked(self):
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            await self.reader.readexactly(size + 2)
+            if size == 0:
+                return
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def route_summary(samples, errors, throttled, elapsed):
+    """Counters and latency percentiles (ms) of successful requests"""
+    if len(samples) >= 2:
+        q = statistics.quantiles(samples, n=100, method='inclusive')
+    else:
+        q = samples * 99 or [0] * 99
+    return {
+        'requests': len(samples) + errors + throttled,
+        'ok': len(samples),
+        'errors': errors,
+        'throttled': throttled,
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(q[49] * 1000, 1),
+        'p95_ms': round(q[94] * 1000, 1),
+        'p99_ms': round(q[98] * 1000, 1),
+        'max_ms': round(max(samples, default=0) * 1000, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the REST API of a running server with a weighted mix of read '
+        'endpoints and report throughput and p50/p95/p99 latency per route. '
+        'All requests come from this machine, so raise THROTTLE_IP_RATE (and '
+        'THROTTLE_USER_RATE) on the server or the 429s measure the throttle.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients (connections)')
+        parser.add_argument('--users', type=int, default=200, help='Distinct users to mint tokens for')
+        parser.add_argument('--routes', help='Comma separated route names to run, default all')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        routes = ROUTES
+        if options['routes']:
+            names = set(options['routes'].split(','))
+            unknown = names - {route[0] for route in ROUTES}
+            if unknown:
+                raise CommandError(f'Unknown routes: {", ".join(sorted(unknown))}')
+            routes = [route for route in ROUTES if route[0] in names]
+
+        users = list(User.objects.filter(is_active=True).order_by('pk')[:options['users']])
+        if not users:
+            raise CommandError('No users to authenticate as; run seed_data --scale first')
+        # Tokens carry the user's token_version, or rotated users get 401s
+        tokens = [str(TokenWithVersionSerializer.get_token(user).access_token) for user in users]
+        ids = {
+            'materials': self.sample_ids(StudyMaterial),
+            'discussions': self.sample_ids(Discussion),
+            'subjects': list(Subject.objects.values_list('pk', flat=True)),
+        }
+        if not all(ids.values()):
+            raise CommandError('Materials, discussions and subjects are needed; run seed_data --scale first')
+
+        report = asyncio.run(self.run(routes, tokens, ids, options))
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.print_report(report)
+
+    def sample_ids(self, model, count=5000):
+        """Up to ``count`` existing pks spread over the table, without sorting it"""
+        bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return []
+        rng = random.Random(0)
+        candidates = {rng.randint(bounds['low'], bounds['high']) for _ in range(count)}
+        return sorted(model.objects.filter(pk__in=candidates).values_list('pk', flat=True))
+
+    async def run(self, routes, tokens, ids, options):
+        url = urlsplit(options['url'])
+        weights = [route[1] for route in routes]
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        throttled = defaultdict(int)
+        deadline = time.monotonic() + options['duration']
+
+        async def client(index):
+            rng = random.Random(options['seed'] + index)
+            samples = Samples(ids, rng)
+            token = tokens[index % len(tokens)]
+            connection = Connection(url)
+            while time.monotonic() < deadline:
+                name, _, build = rng.choices(routes, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = await connection.request(build(samples), {'Authorization': f'Bearer {token}'})
+                except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    connection.close()
+                    errors[name] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                if status == 429:
+                    throttled[name] += 1
+                elif status >= 400:
+                    errors[name] += 1
+                else:
+                    latencies[name].append(elapsed)
+            connection.close()
+
+        started = time.monotonic()
+        await asyncio.gather(*(client(i) for i in range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+
+        report = {'duration': round(elapsed, 2), 'concurrency': options['concurrency'], 'routes': {}}
+        for name, *_ in routes:
+            report['routes'][name] = route_summary(latencies[name], errors[name], throttled[name], elapsed)
+        report['total'] = route_summary(
+            [sample for samples in latencies.values() for sample in samples],
+            sum(errors.values()), sum(throttled.values()), elapsed
+        )
+        return report
+
+    def print_report(self, report):
+        self.stdout.write(f'{report["concurrency"]} clients for {report["duration"]}s\n')
+        columns = ['requests', 'errors', 'throttled', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+        self.stdout.write(f'{"route":<28}' + ''.join(f'{column:>10}' for column in columns))
+        rows = list(report['routes'].items()) + [('total', report['total'])]
+        for name, row in rows:
+            self.stdout.write(f'{name:<28}' + ''.join(f'{row[column]:>10}' for column in columns))
+        total = report['total']
+        style = self.style.SUCCESS if not total['errors'] and not total['throttled'] else self.style.WARNING
+        self.stdout.write(style(
+            f'\n{total["rps"]} req/s, p99 {total["p99_ms"]} ms, '
+            f'{total["errors"]} errors, {total["throttled"]} throttled'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from apps.materials.models import StudyMaterial
+from apps.materials.tasks import process_material
+from apps.users.models import User
+from apps.users.tasks import process_avatar
+
+
+class Command(BaseCommand):
+    help = 'Queue avatar renditions and material thumbnails/text extracts for existing files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only files that have no derived artifacts yet'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(avatar='').exclude(avatar=None)
+        materials = StudyMaterial.objects.exclude(file='').exclude(file=None)
+        if options['missing']:
+            users = users.filter(avatar_variants={})
+            materials = materials.filter(thumbnail=None, text_extract=None)
+
+        queued = 0
+        for pk, name in users.values_list('pk', 'avatar').iterator():
+            process_avatar.delay(pk, name)
+            queued += 1
+        for pk, name in materials.values_list('pk', 'file').iterator():
+            process_material.delay(pk, name)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} files for processing'))
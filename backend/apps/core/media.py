@@ -0,0 +1,97 @@
+"""
+Derived media: resized WebP images, document thumbnails and text extracts.
+
+Pure functions over file objects, run by the media Celery workers (see the
+``process_*`` tasks) so decoding large uploads never blocks a request.
+Artifacts are stored next to the original as ``<original>.<variant>``.
+"""
+import io
+import os
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Corrupt or unsupported uploads; the original is served without artifacts
+PROCESSING_ERRORS = (OSError, ValueError, Image.DecompressionBombError) + (
+    (pypdfium2.PdfiumError,) if pypdfium2 is not None else ()
+)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+TEXT_EXTENSIONS = {'.txt', '.md', '.csv', '.json', '.py', '.tex'}
+PDF_EXTENSIONS = {'.pdf'}
+
+
+def derived_name(name, variant):
+    return f'{name}.{variant}'
+
+
+def absolute_url(request, url):
+    """Match DRF's FileField, which renders absolute URLs when it has the request"""
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def open_image(f, size):
+    """Decode an upload for output around ``size`` px: EXIF rotation applied, RGB(A)"""
+    image = Image.open(f)
+    # JPEGs decode straight at a reduced scale, much cheaper for phone photos
+    image.draft('RGB', (size * 2, size * 2))
+    image = ImageOps.exif_transpose(image)
+    return image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+
+def webp(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=settings.MEDIA_WEBP_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def square_webp(image, size):
+    return webp(ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS))
+
+
+def thumbnail_webp(image, width):
+    image = image.copy()
+    image.thumbnail((width, width * 2), Image.Resampling.LANCZOS)
+    return webp(image)
+
+
+def pdf_artifacts(f, width, limit):
+    """First page rendered ``width`` px wide and up to ``limit`` chars of text"""
+    document = pypdfium2.PdfDocument(f)
+    try:
+        page = document[0]
+        image = page.render(scale=min(width / page.get_size()[0], 4)).to_pil()
+        parts, length = [], 0
+        for page in document:
+            text = page.get_textpage().get_text_range()
+            parts.append(text)
+            length += len(text)
+            if length >= limit:
+                break
+        return image, '\n'.join(parts)[:limit]
+    finally:
+        document.close()
+
+
+def document_artifacts(f, name):
+    """
+    (thumbnail, text) ContentFiles for a material file, each None when the
+    format is unsupported.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    width = settings.MEDIA_THUMBNAIL_WIDTH
+    limit = settings.MEDIA_TEXT_EXTRACT_CHARS
+    if extension in IMAGE_EXTENSIONS:
+        return thumbnail_webp(open_image(f, width), width), None
+    if extension in PDF_EXTENSIONS and pypdfium2 is not None:
+        image, text = pdf_artifacts(f, width, limit)
+        return thumbnail_webp(image, width), ContentFile(text.encode()) if text.strip() else None
+    if extension in TEXT_EXTENSIONS:
+        text = f.read(limit * 4).decode('utf-8', errors='replace')[:limit]
+        return None, ContentFile(text.encode())
+    return None, None
@@ -0,0 +1,225 @@
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _cursor_value(value):
+    # Full precision isoformat; DjangoJSONEncoder would truncate microseconds
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def estimate_count(queryset):
+    """
+    Cheap row count estimate from Postgres statistics.
+
+    Unfiltered tables use ``pg_class.reltuples``; filtered querysets use the
+    planner's row estimate from EXPLAIN. Returns None when no estimate is
+    available so callers can fall back to an exact COUNT(*).
+    """
+    if not isinstance(queryset, QuerySet):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.distinct:
+        return None
+
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table has been vacuumed or analyzed
+            return row[0] if row and row[0] >= 0 else None
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(DjangoPaginator):
+    """Uses estimate_count() instead of COUNT(*) once a result set is large"""
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return super().count
+        return estimate
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's ordering.
+
+    The cursor stores the ordering values of the boundary row, so each page is
+    an index range scan instead of a growing OFFSET, and no COUNT(*) is run.
+    The primary key is appended as a tie breaker. Orderings on related,
+    nullable or computed fields are not supported; see get_ordering().
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset):
+        """Return [(field, descending), ...] for the queryset, or None if unsupported"""
+        opts = queryset.model._meta
+        ordering = []
+        for name in queryset.query.order_by or opts.ordering:
+            if not isinstance(name, str):
+                return None
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            try:
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation or not field.concrete or field.null:
+                return None
+            ordering.append((field, descending))
+
+        if not any(field.primary_key for field, _ in ordering):
+            ordering.append((opts.pk, ordering[-1][1] if ordering else False))
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*[
+            ('-' if descending != reverse else '') + field.name
+            for field, descending in self.ordering
+        ])
+        if position is not None:
+            queryset = queryset.filter(self.build_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def build_filter(self, position, reverse):
+        """
+        Rows strictly after ``position`` in the (possibly reversed) ordering.
+
+        Expands (a, b, pk) > (x, y, z) into nested OR/AND terms so mixed
+        directions work, with a leading range on the first field so Postgres
+        can start the index scan at the cursor.
+        """
+        condition = None
+        for (field, descending), value in reversed(list(zip(self.ordering, position))):
+            lookup = '__lt' if descending != reverse else '__gt'
+            after = Q(**{field.name + lookup: value})
+            if condition is not None:
+                after |= Q(**{field.name: value}) & condition
+            condition = after
+
+        field, descending = self.ordering[0]
+        lookup = '__lte' if descending != reverse else '__gte'
+        return Q(**{field.name + lookup: position[0]}) & condition
+
+    def encode_cursor(self, obj, reverse):
+        position = [field.value_from_object(obj) for field, _ in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, default=_cursor_value)
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                field.to_python(value) for (field, _), value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class FlexiblePagination(PageNumberPagination):
+    """
+    Project default pagination.
+
+    Page numbers by default so existing clients keep working. Clients opt in to
+    keyset pagination with ``?pagination=cursor`` (or by following a
+    ``cursor`` link), and to estimated page counts with ``?count=estimated``.
+    """
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_cursor(request) and isinstance(queryset, QuerySet):
+            keyset = KeysetPagination()
+            if keyset.get_ordering(queryset) is not None:
+                self.keyset = keyset
+                return keyset.paginate_queryset(queryset, request, view)
+
+        if self.wants_estimated_count(request):
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def wants_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def wants_estimated_count(self, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode is None:
+            return settings.PAGINATION_ESTIMATE_COUNTS
+        return mode == 'estimated'
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
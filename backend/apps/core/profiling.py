@@ -0,0 +1,298 @@
+"""
+Opt-in request profiling, enabled with PERF_PROFILING.
+
+PerfMiddleware records for each sampled request the number of SQL queries
+and their time, queries that ran several times with the same shape (N+1
+candidates), the time spent in DRF serializers and the response size. It
+adds them to per-URL-name aggregates in Redis, shared by all processes,
+which the staff-only /api/_perf/ report reads. Profiled responses carry a
+Server-Timing header, shown by browser devtools.
+
+Queries are seen by an execute wrapper installed on every database
+connection. The request's Profile lives in a context variable, which
+asgiref copies into the thread a sync view runs in, so ASGI and WSGI
+requests are covered alike. Serializer time is measured around
+``BaseSerializer.data`` and excludes the queries run while serializing.
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+ROUTES_KEY = 'perf:routes'
+MAX_KEY = 'perf:max'
+SQL_KEY = 'perf:sql'
+SINCE_KEY = 'perf:since'
+UNRESOLVED = '<unresolved>'
+COUNTERS = ['requests', 'errors', 'time_us', 'db_us', 'queries', 'serialize_us', 'bytes', 'duplicated']
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+IN_LISTS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+NUMBERS = re.compile(r'\b\d+\b')
+
+current_profile = ContextVar('perf_profile', default=None)
+
+
+def stats_key(route):
+    return f'perf:route:{route}'
+
+
+def latency_key(route):
+    return f'perf:latency:{route}'
+
+
+def duplicates_key(route):
+    return f'perf:duplicates:{route}'
+
+
+def fingerprint(sql):
+    """Shape of a query: literals and IN lists collapsed, so N+1 queries share one"""
+    sql = STRINGS.sub('?', sql)
+    sql = IN_LISTS.sub('(...)', sql)
+    sql = NUMBERS.sub('?', sql)
+    return ' '.join(sql.split())
+
+
+class Profile:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.serialize_time = 0.0
+        self.serialize_db_time = 0.0
+        self.serializing = False
+
+    def duplicated(self):
+        """{shape: executions} of the queries that ran often enough to look like N+1"""
+        threshold = settings.PERF_DUPLICATE_QUERY_THRESHOLD
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+def record_query(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        profile.queries += 1
+        profile.db_time += elapsed
+        if profile.serializing:
+            profile.serialize_db_time += elapsed
+        profile.shapes[fingerprint(sql)] += 1
+
+
+def add_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+serializer_data = BaseSerializer.data
+
+
+def profiled_serializer_data(self):
+    profile = current_profile.get()
+    # Nested serializers render inside the outer one, time only the outermost
+    if profile is None or profile.serializing:
+        return serializer_data.fget(self)
+    profile.serializing = True
+    started = time.perf_counter()
+    try:
+        return serializer_data.fget(self)
+    finally:
+        profile.serializing = False
+        profile.serialize_time += time.perf_counter() - started
+
+
+def install():
+    """Hook query and serializer timing into this process; idempotent"""
+    connection_created.connect(add_query_recorder, dispatch_uid='perf_query_recorder')
+    for connection in connections.all(initialized_only=True):
+        add_query_recorder(connection)
+    BaseSerializer.data = property(profiled_serializer_data)
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    return redis.Redis.from_url(settings.PERF_REDIS_URL, decode_responses=True)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNRESOLVED
+
+
+def response_size(response):
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def server_timing(profile, total):
+    serialize = profile.serialize_time - profile.serialize_db_time
+    app = max(total - profile.db_time - serialize, 0)
+    return ', '.join([
+        f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"',
+        f'serialize;dur={serialize * 1000:.1f}',
+        f'app;dur={app * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+def record(route, profile, total, status, size):
+    """Add one request to the aggregates of ``route``"""
+    duplicated = profile.duplicated()
+    serialize = profile.serialize_time - profile.serialize_db_time
+    try:
+        pipe = get_client().pipeline(transaction=False)
+        pipe.sadd(ROUTES_KEY, route)
+        pipe.set(SINCE_KEY, int(time.time()), nx=True)
+        key = stats_key(route)
+        pipe.hincrby(key, 'requests', 1)
+        pipe.hincrby(key, 'errors', int(status >= 500))
+        pipe.hincrby(key, 'time_us', int(total * 1e6))
+        pipe.hincrby(key, 'db_us', int(profile.db_time * 1e6))
+        pipe.hincrby(key, 'queries', profile.queries)
+        pipe.hincrby(key, 'serialize_us', int(serialize * 1e6))
+        pipe.hincrby(key, 'bytes', size)
+        pipe.hincrby(key, 'duplicated', int(bool(duplicated)))
+        pipe.lpush(latency_key(route), round(total * 1000, 2))
+        pipe.ltrim(latency_key(route), 0, settings.PERF_LATENCY_SAMPLES - 1)
+        pipe.zadd(MAX_KEY, {route: round(total * 1000, 2)}, gt=True)
+        for shape, count in duplicated.items():
+            digest = hashlib.sha1(shape.encode()).hexdigest()[:16]
+            pipe.zincrby(duplicates_key(route), count, digest)
+            pipe.hsetnx(SQL_KEY, digest, shape[:2000])
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning('Could not record the profile of %s', route, exc_info=True)
+
+
+class PerfMiddleware:
+    """Profile a PERF_PROFILING_SAMPLE_RATE share of requests, see module docstring"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_PROFILING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def sampled(self):
+        return random.random() < settings.PERF_PROFILING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        record(*self.finish(request, response, profile))
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        profile = Profile()
+        token = current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        await sync_to_async(record, thread_sensitive=False)(*self.finish(request, response, profile))
+        return response
+
+    def finish(self, request, response, profile):
+        """Add the Server-Timing header; returns the arguments of record()"""
+        total = time.perf_counter() - profile.started
+        response['Server-Timing'] = server_timing(profile, total)
+        return route_name(request), profile, total, response.status_code, response_size(response)
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of sorted ``samples``"""
+    if not samples:
+        return 0
+    return samples[min(len(samples) - 1, max(int(len(samples) * p / 100 + 0.5) - 1, 0))]
+
+
+def report(top_duplicates=5):
+    """Aggregates per route, most total time first"""
+    client = get_client()
+    routes = sorted(client.smembers(ROUTES_KEY))
+    pipe = client.pipeline(transaction=False)
+    for route in routes:
+        pipe.hgetall(stats_key(route))
+        pipe.lrange(latency_key(route), 0, -1)
+        pipe.zrevrange(duplicates_key(route), 0, top_duplicates - 1, withscores=True)
+    pipe.zrange(MAX_KEY, 0, -1, withscores=True)
+    pipe.get(SINCE_KEY)
+    *results, maxima, since = pipe.execute()
+    maxima = dict(maxima)
+
+    rows = []
+    digests = set()
+    for index, route in enumerate(routes):
+        counters, latencies, duplicates = results[index * 3:index * 3 + 3]
+        counters = {name: int(counters.get(name, 0)) for name in COUNTERS}
+        requests = counters['requests'] or 1
+        latencies = sorted(float(value) for value in latencies)
+        digests.update(digest for digest, _ in duplicates)
+        rows.append({
+            'route': route,
+            'requests': counters['requests'],
+            'errors': counters['errors'],
+            'total_ms': round(counters['time_us'] / 1000, 1),
+            'mean_ms': round(counters['time_us'] / requests / 1000, 2),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'max_ms': maxima.get(route, 0),
+            'mean_queries': round(counters['queries'] / requests, 1),
+            'mean_db_ms': round(counters['db_us'] / requests / 1000, 2),
+            'mean_serialize_ms': round(counters['serialize_us'] / requests / 1000, 2),
+            'mean_bytes': counters['bytes'] // requests,
+            'duplicated_query_requests': counters['duplicated'],
+            'duplicated_queries': duplicates,
+        })
+    sql = dict(zip(digests, client.hmget(SQL_KEY, list(digests)))) if digests else {}
+    for row in rows:
+        row['duplicated_queries'] = [
+            {'sql': sql.get(digest), 'executions': int(count)} for digest, count in row['duplicated_queries']
+        ]
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return {'enabled': settings.PERF_PROFILING, 'since': int(since) if since else None, 'routes': rows}
+
+
+def reset():
+    """Drop all aggregates"""
+    client = get_client()
+    routes = client.smembers(ROUTES_KEY)
+    keys = [key for route in routes for key in (stats_key(route), latency_key(route), duplicates_key(route))]
+    client.delete(ROUTES_KEY, MAX_KEY, SQL_KEY, SINCE_KEY, *keys)
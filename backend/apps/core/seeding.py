@@ -0,0 +1,413 @@
+"""
+Synthetic data at scale for capacity planning, used by ``seed_data --scale``.
+
+Rows come from a seeded ``random.Random``, so the same scale and seed give
+the same data on an empty database (dates are relative to today). They
+are written with Postgres COPY in batches. Primary keys are assigned here,
+continuing after the current maximum, so related rows can point at each
+other without reading anything back. The sequences are reset at the end.
+
+COPY bypasses model signals. Tutor stats, reply counts and search
+vectors are therefore rebuilt once everything is written.
+"""
+import io
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils import timezone
+from apps.core.signals import invalidate
+
+SEED_PASSWORD = 'SeedPass123!'
+
+# Per user, on average
+TUTOR_SHARE = 0.1
+SESSIONS_PER_TUTOR = (10, 50)
+MATERIALS_PER_USER = 0.5
+DISCUSSIONS_PER_USER = 0.25
+NOTIFICATIONS_PER_USER = (0, 10)
+
+FIRST_NAMES = [
+    'Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Elijah', 'Sophia', 'James', 'Isabella', 'Lucas',
+    'Mia', 'Mateo', 'Amelia', 'Levi', 'Harper', 'Ethan', 'Aisha', 'Omar', 'Yuki', 'Hiro',
+    'Priya', 'Arjun', 'Chloe', 'Leo', 'Zara', 'Ivan', 'Anna', 'Mohammed', 'Fatima', 'Chen',
+    'Mei', 'Diego', 'Lucia', 'Kofi', 'Amara', 'Sven', 'Ingrid', 'Nikolai', 'Elena', 'Tomas',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Brown', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Lopez', 'Wilson',
+    'Anderson', 'Taylor', 'Thomas', 'Moore', 'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White',
+    'Kim', 'Nguyen', 'Patel', 'Singh', 'Khan', 'Ali', 'Wang', 'Zhang', 'Tanaka', 'Sato',
+    'Ivanov', 'Petrov', 'Novak', 'Kowalski', 'Muller', 'Schmidt', 'Rossi', 'Silva', 'Okafor', 'Mensah',
+]
+SUBJECTS = [
+    ('Mathematics', 'Algebra, Calculus, Statistics'),
+    ('Physics', 'Mechanics, Thermodynamics, Optics'),
+    ('Chemistry', 'Organic, Inorganic, Physical Chemistry'),
+    ('Computer Science', 'Programming, Algorithms, Data Structures'),
+    ('English', 'Grammar, Literature, Writing'),
+    ('Biology', 'Cell Biology, Genetics, Ecology'),
+    ('Linear Algebra', 'Vector spaces, Matrices, Eigenvalues'),
+    ('Statistics', 'Probability, Inference, Regression'),
+    ('Economics', 'Microeconomics, Macroeconomics, Econometrics'),
+    ('History', 'World History, Historiography'),
+    ('Philosophy', 'Logic, Ethics, Epistemology'),
+    ('Psychology', 'Cognitive, Developmental, Social Psychology'),
+    ('Spanish', 'Grammar, Conversation, Literature'),
+    ('French', 'Grammar, Conversation, Literature'),
+    ('German', 'Grammar, Conversation, Literature'),
+    ('Geography', 'Physical and Human Geography'),
+    ('Electrical Engineering', 'Circuits, Signals, Electronics'),
+    ('Mechanical Engineering', 'Statics, Dynamics, Materials'),
+    ('Machine Learning', 'Supervised learning, Neural networks'),
+    ('Databases', 'SQL, Data modeling, Transactions'),
+    ('Accounting', 'Financial and Managerial Accounting'),
+    ('Music Theory', 'Harmony, Counterpoint, Ear training'),
+    ('Art History', 'Renaissance to Contemporary'),
+    ('Astronomy', 'Stars, Galaxies, Cosmology'),
+]
+WORDS = (
+    'exam lecture notes problem proof example chapter theorem lab homework review formula method '
+    'question answer concept definition summary practice solution exercise midterm final project '
+    'essay graph function equation model experiment analysis reading assignment topic'
+).split()
+MATERIAL_KINDS = ['Lecture notes', 'Cheat sheet', 'Practice problems', 'Exam review', 'Summary', 'Worked examples']
+DISCUSSION_OPENERS = ['How do I approach', 'Confused about', 'Tips for', 'Study group for', 'Best resources for']
+REVIEW_COMMENTS = [
+    'Very clear explanations.', 'Helped me pass my exam.', 'Patient and well prepared.',
+    'Good session, a bit rushed.', 'Would book again.', '',
+]
+SESSION_TIMES = [time(9), time(11), time(14), time(16), time(18)]
+NOTIFICATION_TYPES = ['session_created', 'session_updated', 'session_cancelled', 'new_material', 'new_discussion', 'new_reply']
+
+
+def copy_value(value):
+    """``value`` in COPY's text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class CopyWriter:
+    """
+    Buffers rows of ``model`` and writes them with COPY every
+    ``batch_size`` rows. Columns not given to ``add`` get the field default,
+    auto_now fields get ``now``, and auto primary keys are numbered after
+    the table's current maximum.
+    """
+
+    def __init__(self, model, batch_size, now):
+        self.model = model
+        self.batch_size = batch_size
+        self.fields = model._meta.concrete_fields
+        self.defaults = {}
+        for field in self.fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                self.defaults[field.attname] = now
+            else:
+                self.defaults[field.attname] = field.get_default()
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in self.fields)
+        self.sql = f'COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN'
+        pk = model._meta.pk
+        self.auto_pk = pk.attname if pk.get_internal_type() in ('AutoField', 'BigAutoField') else None
+        self.next_id = (model.objects.aggregate(high=Max('pk'))['high'] or 0) + 1 if self.auto_pk else None
+        self.first_id = self.next_id
+        self.buffer = io.StringIO()
+        self.pending = 0
+        self.written = 0
+
+    def reserve_id(self):
+        pk = self.next_id
+        self.next_id += 1
+        return pk
+
+    def add(self, **values):
+        if self.auto_pk and self.auto_pk not in values:
+            values[self.auto_pk] = self.reserve_id()
+        self.buffer.write('\t'.join(
+            copy_value(values[field.attname] if field.attname in values else self.defaults[field.attname])
+            for field in self.fields
+        ))
+        self.buffer.write('\n')
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+        return values.get(self.auto_pk)
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.buffer.seek(0)
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, 'copy_expert'):
+                cursor.cursor.copy_expert(self.sql, self.buffer)
+            else:
+                # psycopg 3
+                with cursor.cursor.copy(self.sql) as copy:
+                    copy.write(self.buffer.getvalue())
+        self.written += self.pending
+        self.buffer = io.StringIO()
+        self.pending = 0
+
+
+def sentence(rng, words=10):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def paragraph(rng, sentences=3):
+    return ' '.join(sentence(rng, rng.randint(6, 14)) for _ in range(sentences))
+
+
+def between(rng, start, end):
+    return start + timedelta(seconds=rng.uniform(0, max((end - start).total_seconds(), 0)))
+
+
+def by_id_ranges(queryset, batch_size):
+    """Slices of ``queryset`` covering consecutive pk ranges"""
+    bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+        yield queryset.filter(pk__gte=start, pk__lt=start + batch_size)
+
+
+class Seeder:
+    def __init__(self, scale, seed=42, batch_size=10000, log=None):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.today = timezone.localdate()
+        self.writers = {}
+
+    def writer(self, label):
+        if label not in self.writers:
+            self.writers[label] = CopyWriter(apps.get_model(label), self.batch_size, self.now)
+        return self.writers[label]
+
+    def run(self):
+        self.subjects()
+        self.users()
+        self.sessions()
+        self.materials()
+        self.discussions()
+        self.notifications()
+        for writer in self.writers.values():
+            writer.flush()
+        self.finish()
+        return {writer.model._meta.label: writer.written for writer in self.writers.values()}
+
+    def subjects(self):
+        Subject = apps.get_model('users.Subject')
+        Subject.objects.bulk_create(
+            [Subject(name=name, description=description) for name, description in SUBJECTS],
+            ignore_conflicts=True
+        )
+        self.subject_ids = list(Subject.objects.order_by('pk').values_list('pk', flat=True))
+
+    def users(self):
+        rng = self.rng
+        users = self.writer('users.User')
+        user_subjects = self.writer('users.User_subjects')
+        availability = self.writer('tutoring.TutorAvailability')
+        password = make_password(SEED_PASSWORD)
+        self.tutor_ids, self.student_ids, self.user_ids = [], [], []
+        # Per tutor: subjects taught and a quality that drives review ratings
+        self.tutor_subjects, self.tutor_quality = {}, {}
+
+        for index in range(self.scale):
+            # Every tenth user tutors, so small scales still have both roles
+            role = 'tutor' if index % round(1 / TUTOR_SHARE) == 0 else 'student'
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            user_id = users.reserve_id()
+            username = f'{first}.{last}.{user_id}'.lower()
+            users.add(
+                id=user_id,
+                password=password,
+                username=username,
+                first_name=first,
+                last_name=last,
+                email=f'{username}@example.com',
+                date_joined=self.now - timedelta(days=rng.uniform(0, 730)),
+                role=role,
+                bio=sentence(rng, 12) if rng.random() < 0.6 else '',
+            )
+            subjects = rng.sample(self.subject_ids, rng.randint(1, min(3 if role == 'tutor' else 4, len(self.subject_ids))))
+            for subject_id in subjects:
+                user_subjects.add(user_id=user_id, subject_id=subject_id)
+            self.user_ids.append(user_id)
+            if role == 'student':
+                self.student_ids.append(user_id)
+                continue
+            self.tutor_ids.append(user_id)
+            self.tutor_subjects[user_id] = subjects
+            self.tutor_quality[user_id] = min(max(rng.gauss(4.1, 0.5), 1.5), 5.0)
+            for weekday in rng.sample(range(7), rng.randint(2, 5)):
+                start = rng.randint(8, 16)
+                availability.add(
+                    tutor_id=user_id, weekday=weekday,
+                    start_time=time(start), end_time=time(start + rng.randint(2, 4))
+                )
+        self.log(f'Generated {self.scale} users ({len(self.tutor_ids)} tutors)')
+
+    def sessions(self):
+        rng = self.rng
+        sessions = self.writer('tutoring.TutoringSession')
+        reviews = self.writer('tutoring.SessionReview')
+        if not self.student_ids:
+            return
+        for tutor_id in self.tutor_ids:
+            # One session per tutor and day, so active sessions never overlap
+            past_day, future_day = self.today, self.today
+            for _ in range(rng.randint(*SESSIONS_PER_TUTOR)):
+                if rng.random() < 0.8:
+                    past_day -= timedelta(days=rng.randint(1, 10))
+                    day = past_day
+                    status = 'completed' if rng.random() < 0.85 else 'cancelled'
+                else:
+                    future_day += timedelta(days=rng.randint(1, 5))
+                    day = future_day
+                    status = 'scheduled' if rng.random() < 0.6 else 'pending'
+                start_time = rng.choice(SESSION_TIMES)
+                duration = rng.choice([45, 60, 90])
+                start = timezone.make_aware(datetime.combine(day, start_time))
+                student_id = rng.choice(self.student_ids)
+                confirmed = status in ('scheduled', 'completed')
+                created_at = start - timedelta(days=rng.randint(1, 21))
+                session_id = sessions.add(
+                    tutor_id=tutor_id,
+                    student_id=student_id,
+                    subject_id=rng.choice(self.tutor_subjects[tutor_id]),
+                    title=f'{rng.choice(["Exam prep", "Homework help", "Review", "Intro"])} session',
+                    date=day,
+                    time=start_time,
+                    duration=duration,
+                    status=status,
+                    is_confirmed=confirmed,
+                    confirmed_at=created_at + timedelta(hours=rng.randint(1, 48)) if confirmed else None,
+                    cancelled_by_id=rng.choice([tutor_id, student_id]) if status == 'cancelled' else None,
+                    cancellation_reason='Schedule conflict' if status == 'cancelled' else '',
+                    time_range=f'[{start.isoformat()},{(start + timedelta(minutes=duration)).isoformat()})',
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                if status == 'completed' and rng.random() < 0.7:
+                    rating = min(max(round(rng.gauss(self.tutor_quality[tutor_id], 0.8)), 1), 5)
+                    reviewed_at = start + timedelta(hours=rng.randint(2, 72))
+                    reviews.add(
+                        session_id=session_id,
+                        reviewer_id=student_id,
+                        rating=rating,
+                        comment=rng.choice(REVIEW_COMMENTS),
+                        created_at=reviewed_at,
+                        updated_at=reviewed_at,
+                    )
+        self.log(f'Generated {sessions.written + sessions.pending} sessions, {reviews.written + reviews.pending} reviews')
+
+    def materials(self):
+        rng = self.rng
+        materials = self.writer('materials.StudyMaterial')
+        for _ in range(int(self.scale * MATERIALS_PER_USER)):
+            author_id = rng.choice(self.tutor_ids if rng.random() < 0.6 else self.user_ids)
+            subject_id = rng.choice(self.subject_ids)
+            created_at = self.now - timedelta(days=rng.uniform(0, 365))
+            material_id = materials.reserve_id()
+            materials.add(
+                id=material_id,
+                author_id=author_id,
+                subject_id=subject_id,
+                title=f'{rng.choice(MATERIAL_KINDS)}: {sentence(rng, 3)[:-1]}',
+                description=paragraph(rng, rng.randint(1, 4)),
+                link=f'https://example.com/materials/{material_id}',
+                download_count=int(rng.paretovariate(1.5)) - 1,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        self.log(f'Generated {materials.written + materials.pending} materials')
+
+    def discussions(self):
+        rng = self.rng
+        discussions = self.writer('forum.Discussion')
+        replies = self.writer('forum.Reply')
+        for _ in range(int(self.scale * DISCUSSIONS_PER_USER)):
+            created_at = self.now - timedelta(days=rng.uniform(0, 365))
+            discussion_id = discussions.add(
+                author_id=rng.choice(self.user_ids),
+                subject_id=rng.choice(self.subject_ids) if rng.random() < 0.9 else None,
+                title=f'{rng.choice(DISCUSSION_OPENERS)} {sentence(rng, 4)[:-1].lower()}?',
+                content=paragraph(rng, rng.randint(1, 5)),
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            reply_ids = []
+            replied_at = created_at
+            for _ in range(min(int(rng.expovariate(1 / 3)), 50)):
+                replied_at = between(rng, replied_at, min(replied_at + timedelta(days=3), self.now))
+                reply_ids.append(replies.add(
+                    discussion_id=discussion_id,
+                    author_id=rng.choice(self.user_ids),
+                    parent_id=rng.choice(reply_ids) if reply_ids and rng.random() < 0.3 else None,
+                    content=paragraph(rng, rng.randint(1, 3)),
+                    created_at=replied_at,
+                    updated_at=replied_at,
+                ))
+        self.log(f'Generated {discussions.written + discussions.pending} discussions, {replies.written + replies.pending} replies')
+
+    def notifications(self):
+        rng = self.rng
+        notifications = self.writer('notifications.Notification')
+        for user_id in self.user_ids:
+            for _ in range(rng.randint(*NOTIFICATIONS_PER_USER)):
+                kind = rng.choice(NOTIFICATION_TYPES)
+                notifications.add(
+                    user_id=user_id,
+                    notification_type=kind,
+                    title=kind.replace('_', ' ').capitalize(),
+                    message=sentence(rng, 8),
+                    is_read=rng.random() < 0.7,
+                    created_at=self.now - timedelta(days=rng.uniform(0, 60)),
+                )
+        self.log(f'Generated {notifications.written + notifications.pending} notifications')
+
+    def generated(self, label):
+        """Batches of the ``label`` rows written by this run"""
+        writer = self.writer(label)
+        return by_id_ranges(writer.model.objects.filter(pk__gte=writer.first_id), self.batch_size)
+
+    def finish(self):
+        models = [writer.model for writer in self.writers.values() if writer.auto_pk]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+        from apps.tutoring.stats import reconcile
+        self.log(f'Rebuilt stats of {reconcile()} tutors')
+        for batch in self.generated('forum.Discussion'):
+            batch.refresh_reply_stats()
+            batch.update_search_vector()
+        for batch in self.generated('materials.StudyMaterial'):
+            batch.update_search_vector()
+        self.log('Rebuilt reply counts and search vectors')
+
+        with connection.cursor() as cursor:
+            for model in {writer.model for writer in self.writers.values()}:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        for writer in self.writers.values():
+            invalidate(writer.model)
+
+
+def generate(scale, seed=42, batch_size=10000, log=None):
+    """Write ``scale`` users and proportional related data; returns rows per model label"""
+    return Seeder(scale, seed, batch_size, log).run()
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .caching import bump_version
+
+# Saves that only touch these fields cannot change a cached response
+IGNORED_UPDATE_FIELDS = {'last_login'}
+
+
+def invalidate(sender):
+    label = sender._meta.label
+    if label in settings.RESPONSE_CACHE_MODELS:
+        # Bump again after commit so a response rebuilt from pre-commit data
+        # in between is not kept
+        bump_version(label)
+        transaction.on_commit(lambda: bump_version(label))
+
+
+@receiver(post_save)
+def model_saved(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= IGNORED_UPDATE_FIELDS:
+        return
+    invalidate(sender)
+
+
+@receiver(post_delete)
+def model_deleted(sender, **kwargs):
+    invalidate(sender)
+
+
+@receiver(m2m_changed)
+def relation_changed(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate(type(instance))
+        invalidate(model)
@@ -0,0 +1,28 @@
+import time
+from types import SimpleNamespace
+import pytest
+from django.core.cache import cache
+from django.http import QueryDict
+from apps.materials.views import MaterialListCreateView
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_waits_briefly_for_a_rebuild_then_builds(auth_client, settings):
+    settings.RESPONSE_CACHE_LOCK_WAIT = 0.2
+    user = UserFactory()
+    request = SimpleNamespace(
+        get_host=lambda: 'testserver', path='/api/materials/', query_params=QueryDict(),
+        accepted_renderer=SimpleNamespace(format='json'), user=user,
+    )
+    # Another request is rebuilding the entry and holds the lock
+    cache.add(f'{MaterialListCreateView().get_response_cache_key(request)}:lock', 1, 60)
+
+    started = time.monotonic()
+    response = auth_client(user).get('/api/materials/')
+    elapsed = time.monotonic() - started
+    assert response.status_code == 200
+    assert response['X-Cache'] == 'MISS'
+    # Not the whole lock timeout
+    assert 0.2 <= elapsed < settings.RESPONSE_CACHE_LOCK_TIMEOUT / 2
@@ -0,0 +1,87 @@
+from unittest import mock
+import pytest
+import redis
+from django.db import connection
+from apps.core import profiling
+from apps.users.models import User
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiled(settings, fake_redis):
+    settings.PERF_PROFILING = True
+    settings.PERF_PROFILING_SAMPLE_RATE = 1.0
+    yield
+    profiling.reset()
+
+
+def test_fingerprint_collapses_literals():
+    assert profiling.fingerprint(
+        "SELECT * FROM t WHERE id = 42 AND name = 'o''brien' AND x IN (%s, %s, %s)"
+    ) == 'SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)'
+    assert profiling.fingerprint('SELECT 1 FROM t WHERE id = 1') == profiling.fingerprint(
+        'SELECT  1 FROM t\n WHERE id = 2'
+    )
+
+
+def run_queries(profile, count):
+    token = profiling.current_profile.set(profile)
+    try:
+        with connection.execute_wrapper(profiling.record_query):
+            for pk in range(count):
+                User.objects.filter(pk=pk).exists()
+    finally:
+        profiling.current_profile.reset(token)
+
+
+def test_repeated_query_shape_is_flagged(settings):
+    settings.PERF_DUPLICATE_QUERY_THRESHOLD = 3
+    profile = profiling.Profile()
+    run_queries(profile, 3)
+    assert profile.queries == 3
+    assert list(profile.duplicated().values()) == [3]
+
+    few = profiling.Profile()
+    run_queries(few, 2)
+    assert few.duplicated() == {}
+
+
+def test_record_report_and_reset(settings, fake_redis):
+    settings.PERF_DUPLICATE_QUERY_THRESHOLD = 3
+    profile = profiling.Profile()
+    run_queries(profile, 3)
+    profiling.record('users:tutors', profile, 0.05, 200, 100)
+    profiling.record('users:tutors', profiling.Profile(), 0.15, 500, 300)
+
+    row, = profiling.report()['routes']
+    assert row['route'] == 'users:tutors'
+    assert row['requests'] == 2
+    assert row['errors'] == 1
+    assert row['mean_ms'] == 100
+    assert row['max_ms'] == 150
+    assert row['mean_queries'] == 1.5
+    assert row['mean_bytes'] == 200
+    assert row['duplicated_query_requests'] == 1
+    assert row['duplicated_queries'][0]['executions'] == 3
+    assert 'FROM "users_user"' in row['duplicated_queries'][0]['sql']
+
+    profiling.reset()
+    assert profiling.report()['routes'] == []
+
+
+def test_profiled_response_has_server_timing(profiled, auth_client):
+    response = auth_client(UserFactory()).get('/api/auth/subjects/')
+    assert response.status_code == 200
+    timing = response['Server-Timing']
+    for metric in ('db;dur=', 'serialize;dur=', 'app;dur=', 'total;dur='):
+        assert metric in timing
+    assert profiling.report()['routes'][0]['requests'] == 1
+
+
+def test_report_answers_503_without_redis(auth_client):
+    client = auth_client(UserFactory(is_staff=True))
+    with mock.patch.object(profiling, 'get_client', side_effect=redis.ConnectionError):
+        assert client.get('/api/_perf/').status_code == 503
+        assert client.delete('/api/_perf/').status_code == 503
@@ -0,0 +1,24 @@
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from apps.core.throttling import TokenBucketThrottle
+
+
+def ident(**meta):
+    return TokenBucketThrottle().get_ident(APIRequestFactory().get('/', **meta))
+
+
+def test_ident_is_the_address_the_proxy_saw():
+    # nginx appends the peer address to whatever the client sent
+    assert ident(REMOTE_ADDR='172.18.0.5', HTTP_X_FORWARDED_FOR='203.0.113.7') == '203.0.113.7'
+    assert ident(REMOTE_ADDR='172.18.0.5', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7') == '203.0.113.7'
+
+
+@pytest.mark.parametrize('forged', ['1.1.1.1', '2.2.2.2, 3.3.3.3'])
+def test_forged_forwarded_for_does_not_change_ident(forged):
+    assert ident(REMOTE_ADDR='172.18.0.5', HTTP_X_FORWARDED_FOR=f'{forged}, 203.0.113.7') == '203.0.113.7'
+
+
+def test_without_proxies_the_header_is_ignored():
+    with override_settings(REST_FRAMEWORK={'NUM_PROXIES': 0}):
+        assert ident(REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR='1.1.1.1') == '203.0.113.7'
@@ -0,0 +1,154 @@
+"""
+Redis token-bucket throttling.
+
+Each budget is a bucket holding up to N tokens that refills at N per period
+(DRF rate syntax, e.g. ``20/min``), so a client may burst N requests and is
+then held to the average rate. All budgets that apply to a request are
+refilled, checked and charged by one Lua script: one round trip, atomic
+across every process sharing the Redis server, and a request rejected by
+one budget does not spend tokens from the others.
+
+Rates live in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+
+* ``ip`` / ``user``: every request, per anonymous client IP or per
+  authenticated user
+* ``<scope>.ip``, ``<scope>.user``, ``<scope>.global``: views with
+  ``throttle_scope = '<scope>'``, per IP, per user, and shared by all
+  clients of the endpoint
+
+If Redis is unreachable requests are let through rather than failing.
+"""
+import asyncio
+import logging
+import weakref
+import redis
+import redis.asyncio
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS: buckets; ARGV: capacity and refill per second for each bucket.
+# Returns the seconds to wait as a string (0 when the request is admitted).
+TOKEN_BUCKETS = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local refill = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / refill)
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local refill = tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / refill) + 1)
+end
+return tostring(wait)
+"""
+
+_script = None
+_async_scripts = weakref.WeakKeyDictionary()
+
+
+def get_script():
+    global _script
+    if _script is None:
+        _script = redis.Redis.from_url(settings.THROTTLE_REDIS_URL).register_script(TOKEN_BUCKETS)
+    return _script
+
+
+def get_async_script():
+    loop = asyncio.get_running_loop()
+    script = _async_scripts.get(loop)
+    if script is None:
+        client = redis.asyncio.Redis.from_url(settings.THROTTLE_REDIS_URL)
+        script = _async_scripts[loop] = client.register_script(TOKEN_BUCKETS)
+    return script
+
+
+def _script_args(buckets):
+    keys, args = [], []
+    for key, num_requests, duration in buckets:
+        keys.append(key)
+        args.extend([num_requests, num_requests / duration])
+    return keys, args
+
+
+def consume(buckets):
+    """Take a token from every (key, num_requests, duration) bucket; returns seconds to wait"""
+    keys, args = _script_args(buckets)
+    try:
+        return float(get_script()(keys=keys, args=args))
+    except redis.RedisError:
+        logger.warning('Throttle backend unavailable, allowing request', exc_info=True)
+        return 0.0
+
+
+async def aconsume(buckets):
+    keys, args = _script_args(buckets)
+    try:
+        return float(await get_async_script()(keys=keys, args=args))
+    except redis.RedisError:
+        logger.warning('Throttle backend unavailable, allowing request', exc_info=True)
+        return 0.0
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Every budget that applies to a request, checked in one Redis call"""
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # Budgets depend on the request and view, see get_buckets()
+        self.retry_after = 0.0
+
+    def get_buckets(self, request, scope=None, user=None):
+        ip = self.get_ident(request)
+        authenticated = user is not None and user.is_authenticated
+        budgets = [('user', user.pk) if authenticated else ('ip', ip)]
+        if scope:
+            budgets += [(f'{scope}.ip', ip), (f'{scope}.global', 'all')]
+            if authenticated:
+                budgets.append((f'{scope}.user', user.pk))
+
+        buckets = []
+        for name, ident in budgets:
+            rate = self.THROTTLE_RATES.get(name)
+            if rate:
+                num_requests, duration = self.parse_rate(rate)
+                buckets.append((self.cache_format % {'scope': name, 'ident': ident}, num_requests, duration))
+        return buckets
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request, getattr(view, 'throttle_scope', None), request.user)
+        if not buckets:
+            return True
+        self.retry_after = consume(buckets)
+        return self.retry_after == 0
+
+    def wait(self):
+        return self.retry_after
+
+
+async def admit(request, scope):
+    """
+    Throttle check for plain (non-DRF) async views, by client IP.
+
+    Returns the seconds the client must wait, or 0 when the request may
+    proceed.
+    """
+    buckets = TokenBucketThrottle().get_buckets(request, scope)
+    return await aconsume(buckets) if buckets else 0.0
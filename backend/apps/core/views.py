@@ -0,0 +1,29 @@
+import redis
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from . import profiling
+
+
+class PerfReportView(APIView):
+    """Per-route aggregates of the profiling middleware, see apps.core.profiling"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            return Response(profiling.report())
+        except redis.RedisError:
+            return self.unavailable()
+
+    def delete(self, request):
+        try:
+            profiling.reset()
+        except redis.RedisError:
+            return self.unavailable()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def unavailable(self):
+        return Response(
+            {'error': 'Profiling data is unavailable, Redis could not be reached'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
@@ -4,10 +4,11 @@ from .models import Discussion, Reply
 
 @admin.register(Discussion)
 class DiscussionAdmin(admin.ModelAdmin):
-    list_display = ['title', 'author', 'subject', 'created_at']
+    list_display = ['title', 'author', 'subject', 'reply_count', 'last_reply_at', 'created_at']
     list_filter = ['subject', 'created_at']
     search_fields = ['title', 'content']
     raw_id_fields = ['author']
+    readonly_fields = ['reply_count', 'last_reply_at']
 
 
 @admin.register(Reply)
@@ -5,3 +5,6 @@ class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.forum'
     verbose_name = 'Discussion Forum'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from apps.forum.models import Discussion
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized reply_count and last_reply_at on discussions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Range of discussion ids updated per statement'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Discussion.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('No discussions to recount')
+            return
+
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            updated += Discussion.objects.filter(
+                pk__gte=start,
+                pk__lt=start + batch_size
+            ).refresh_reply_stats()
+        self.stdout.write(self.style.SUCCESS(f'Recounted replies for {updated} discussions'))
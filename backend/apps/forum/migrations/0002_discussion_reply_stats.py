@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:43
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_stats(apps, schema_editor):
+    Discussion = apps.get_model('forum', 'Discussion')
+    Reply = apps.get_model('forum', 'Reply')
+    replies = Reply.objects.filter(discussion=OuterRef('pk')).order_by().values('discussion')
+    Discussion.objects.update(
+        reply_count=Coalesce(Subquery(replies.annotate(count=Count('id')).values('count')), 0),
+        last_reply_at=Subquery(replies.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0001_initial'),
+        ('users', '0002_alter_user_managers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussion',
+            name='last_reply_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='discussion',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=models.Index(models.OrderBy(django.db.models.functions.comparison.Coalesce('last_reply_at', 'created_at'), descending=True), name='discussion_last_activity_idx'),
+        ),
+        migrations.RunPython(backfill_reply_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:44
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def backfill_search_vector(apps, schema_editor):
+    Discussion = apps.get_model('forum', 'Discussion')
+    Discussion.objects.update(search_vector=(
+        SearchVector('title', weight='A', config=settings.SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=settings.SEARCH_CONFIG)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_discussion_reply_stats'),
+        ('users', '0002_alter_user_managers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discussion',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='discussion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='discussion_search_vector_idx'),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
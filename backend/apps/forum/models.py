@@ -1,7 +1,37 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
 
+class DiscussionQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load the author and subject rendered by the discussion serializers"""
+        return self.select_related('author', 'subject').prefetch_related(
+            'author__subjects'
+        ).defer('search_vector')
+
+    def with_last_activity(self):
+        """Annotate the expression backing the last-activity index"""
+        return self.annotate(last_activity_at=Coalesce('last_reply_at', 'created_at'))
+
+    def update_search_vector(self):
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=settings.SEARCH_CONFIG)
+            + SearchVector('content', weight='B', config=settings.SEARCH_CONFIG)
+        ))
+
+    def refresh_reply_stats(self):
+        """Recompute reply_count and last_reply_at from the Reply table in one UPDATE"""
+        replies = Reply.objects.filter(discussion=OuterRef('pk')).order_by().values('discussion')
+        return self.update(
+            reply_count=Coalesce(Subquery(replies.annotate(count=Count('id')).values('count')), 0),
+            last_reply_at=Subquery(replies.annotate(latest=Max('created_at')).values('latest')),
+        )
+
+
 class Discussion(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -17,16 +47,36 @@ class Discussion(models.Model):
     )
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Denormalized reply stats and search document, maintained by apps.forum.signals
+    reply_count = models.PositiveIntegerField(default=0)
+    last_reply_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DiscussionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='discussion_created_id_idx'),
+            models.Index(
+                Coalesce('last_reply_at', 'created_at').desc(),
+                name='discussion_last_activity_idx'
+            ),
+            GinIndex(fields=['search_vector'], name='discussion_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ReplyQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load the author rendered by ReplySerializer in a fixed number of queries"""
+        return self.select_related('author').prefetch_related('author__subjects')
+
+
 class Reply(models.Model):
     discussion = models.ForeignKey(
         Discussion,
@@ -49,6 +99,8 @@ class Reply(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReplyQuerySet.as_manager()
+
     class Meta:
         ordering = ['created_at']
 
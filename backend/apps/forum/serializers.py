@@ -1,21 +1,59 @@
+from collections import defaultdict
+from django.conf import settings
 from rest_framework import serializers
 from .models import Discussion, Reply
 from apps.users.serializers import UserSerializer, SubjectSerializer
 from apps.users.models import Subject
 
 
+def build_reply_tree(replies):
+    """Group a discussion's replies by parent id in a single pass"""
+    tree = defaultdict(list)
+    for reply in replies:
+        tree[reply.parent_id].append(reply)
+    return tree
+
+
 class ReplySerializer(serializers.ModelSerializer):
+    """
+    Renders a reply with its nested children.
+
+    Children are read from a pre-built ``reply_tree`` in the context so the
+    whole thread is serialized from one query. Nesting stops at
+    ``reply_max_depth`` and each node shows at most FORUM_REPLY_CHILDREN_LIMIT
+    children; ``children_count`` tells the client when to load more.
+    """
     author = UserSerializer(read_only=True)
     children = serializers.SerializerMethodField()
+    children_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Reply
-        fields = ['id', 'discussion', 'author', 'parent', 'content', 'children', 'created_at', 'updated_at']
+        fields = [
+            'id', 'discussion', 'author', 'parent', 'content',
+            'children', 'children_count', 'created_at', 'updated_at'
+        ]
         read_only_fields = ['id', 'author', 'discussion', 'created_at', 'updated_at']
 
+    def get_reply_tree(self, obj):
+        tree = self.context.get('reply_tree')
+        if tree is None:
+            replies = Reply.objects.filter(discussion_id=obj.discussion_id).with_details()
+            tree = build_reply_tree(replies)
+            self.context['reply_tree'] = tree
+        return tree
+
     def get_children(self, obj):
-        children = obj.children.all()
-        return ReplySerializer(children, many=True).data
+        depth = self.context.get('reply_depth', 1)
+        max_depth = self.context.get('reply_max_depth', settings.FORUM_REPLY_MAX_DEPTH)
+        if depth >= max_depth:
+            return []
+        children = self.get_reply_tree(obj).get(obj.id, [])[:settings.FORUM_REPLY_CHILDREN_LIMIT]
+        context = {**self.context, 'reply_depth': depth + 1}
+        return ReplySerializer(children, many=True, context=context).data
+
+    def get_children_count(self, obj):
+        return len(self.get_reply_tree(obj).get(obj.id, []))
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
@@ -25,12 +63,19 @@ class ReplySerializer(serializers.ModelSerializer):
 class DiscussionListSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     subject_detail = SubjectSerializer(source='subject', read_only=True)
-    reply_count = serializers.IntegerField(read_only=True)
+    search_headline = serializers.SerializerMethodField()
 
     class Meta:
         model = Discussion
-        fields = ['id', 'author', 'subject', 'subject_detail', 'title', 'reply_count', 'created_at']
-        read_only_fields = ['id', 'author', 'created_at']
+        fields = [
+            'id', 'author', 'subject', 'subject_detail', 'title',
+            'reply_count', 'last_reply_at', 'search_headline', 'created_at'
+        ]
+        read_only_fields = ['id', 'author', 'reply_count', 'last_reply_at', 'created_at']
+
+    def get_search_headline(self, obj):
+        # Only present when the list was filtered with ?search=
+        return getattr(obj, 'search_headline', None)
 
 
 class DiscussionDetailSerializer(serializers.ModelSerializer):
@@ -52,8 +97,9 @@ class DiscussionDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
 
     def get_replies(self, obj):
-        top_level_replies = obj.replies.filter(parent=None)
-        return ReplySerializer(top_level_replies, many=True).data
+        tree = build_reply_tree(Reply.objects.filter(discussion=obj).with_details())
+        context = {**self.context, 'reply_tree': tree, 'reply_depth': 1}
+        return ReplySerializer(tree.get(None, []), many=True, context=context).data
 
     def validate(self, attrs):
         if not attrs.get('title'):
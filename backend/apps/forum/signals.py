@@ -0,0 +1,23 @@
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Discussion, Reply
+
+
+@receiver(post_save, sender=Discussion)
+def update_search_vector(sender, instance, **kwargs):
+    Discussion.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Reply)
+def increment_reply_stats(sender, instance, created, **kwargs):
+    if created:
+        Discussion.objects.filter(pk=instance.discussion_id).update(
+            reply_count=F('reply_count') + 1,
+            last_reply_at=instance.created_at
+        )
+
+
+@receiver(post_delete, sender=Reply)
+def refresh_reply_stats(sender, instance, **kwargs):
+    Discussion.objects.filter(pk=instance.discussion_id).refresh_reply_stats()
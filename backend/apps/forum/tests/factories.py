@@ -0,0 +1,22 @@
+import factory
+from apps.forum.models import Discussion, Reply
+from apps.users.tests.factories import SubjectFactory, UserFactory
+
+
+class DiscussionFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Discussion
+
+    author = factory.SubFactory(UserFactory)
+    subject = factory.SubFactory(SubjectFactory)
+    title = factory.Sequence(lambda n: f'Discussion {n}')
+    content = 'Question'
+
+
+class ReplyFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Reply
+
+    discussion = factory.SubFactory(DiscussionFactory)
+    author = factory.SubFactory(UserFactory)
+    content = 'Answer'
@@ -1,8 +1,13 @@
 from django.urls import path
-from .views import DiscussionListCreateView, DiscussionDetailView, ReplyCreateView
+from .views import DiscussionListCreateView, DiscussionDetailView, ReplyCreateView, ReplyChildrenView
 
 urlpatterns = [
     path('', DiscussionListCreateView.as_view(), name='discussion-list'),
     path('<int:pk>/', DiscussionDetailView.as_view(), name='discussion-detail'),
     path('<int:discussion_id>/replies/', ReplyCreateView.as_view(), name='reply-create'),
+    path(
+        '<int:discussion_id>/replies/<int:pk>/children/',
+        ReplyChildrenView.as_view(),
+        name='reply-children'
+    ),
 ]
@@ -1,22 +1,42 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter
-from django.db.models import Count
+from rest_framework.filters import OrderingFilter
+from apps.core.caching import CachedResponseMixin
+from apps.search.filters import FullTextSearchFilter
 from .models import Discussion, Reply
-from .serializers import DiscussionListSerializer, DiscussionDetailSerializer, ReplySerializer
+from .serializers import (
+    DiscussionListSerializer,
+    DiscussionDetailSerializer,
+    ReplySerializer,
+    build_reply_tree,
+)
 
 
-class DiscussionListCreateView(generics.ListCreateAPIView):
+class ReplyDepthMixin:
+    """Lets clients lower the reply nesting depth with ?depth="""
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        depth = self.request.query_params.get('depth', '')
+        if depth.isdigit():
+            context['reply_max_depth'] = min(int(depth), settings.FORUM_REPLY_MAX_DEPTH)
+        return context
+
+
+class DiscussionListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['subject', 'author']
-    search_fields = ['title', 'content']
+    search_vector_field = 'search_vector'
+    search_headline_field = 'content'
+    ordering_fields = ['created_at', 'reply_count', 'last_activity_at']
+    cache_models = ('forum.Discussion', 'forum.Reply', 'users.User', 'users.Subject')
 
     def get_queryset(self):
-        return Discussion.objects.select_related('author', 'subject').annotate(
-            reply_count=Count('replies')
-        )
+        return Discussion.objects.with_details().with_last_activity()
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -24,10 +44,11 @@ class DiscussionListCreateView(generics.ListCreateAPIView):
         return DiscussionListSerializer
 
 
-class DiscussionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Discussion.objects.select_related('author', 'subject').prefetch_related('replies__author')
+class DiscussionDetailView(CachedResponseMixin, ReplyDepthMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Discussion.objects.with_details()
     serializer_class = DiscussionDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_models = ('forum.Discussion', 'forum.Reply', 'users.User', 'users.Subject')
 
 
 class ReplyCreateView(generics.CreateAPIView):
@@ -41,3 +62,21 @@ class ReplyCreateView(generics.CreateAPIView):
             author=self.request.user,
             discussion_id=discussion_id
         )
+
+
+class ReplyChildrenView(ReplyDepthMixin, generics.ListAPIView):
+    """Paginated "load more" listing of a reply's direct children and their subtrees"""
+    serializer_class = ReplySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request, *args, **kwargs):
+        parent = get_object_or_404(
+            Reply, pk=self.kwargs['pk'], discussion_id=self.kwargs['discussion_id']
+        )
+        tree = build_reply_tree(
+            Reply.objects.filter(discussion_id=parent.discussion_id).with_details()
+        )
+        context = {**self.get_serializer_context(), 'reply_tree': tree, 'reply_depth': 1}
+        page = self.paginate_queryset(tree.get(parent.id, []))
+        serializer = ReplySerializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
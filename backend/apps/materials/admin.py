@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StudyMaterial
+from .models import MaterialBlob, MaterialUpload, StudyMaterial
 
 
 @admin.register(StudyMaterial)
@@ -8,3 +8,19 @@ class StudyMaterialAdmin(admin.ModelAdmin):
     list_filter = ['subject', 'created_at']
     search_fields = ['title', 'description']
     raw_id_fields = ['author']
+
+
+@admin.register(MaterialUpload)
+class MaterialUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'owner', 'size', 'status', 'created_at', 'expires_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['filename', 'owner__username']
+    raw_id_fields = ['owner']
+    readonly_fields = ['sha256', 'created_at', 'completed_at']
+
+
+@admin.register(MaterialBlob)
+class MaterialBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'ref_count', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'size', 'ref_count', 'created_at']
@@ -5,3 +5,6 @@ class MaterialsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.materials'
     verbose_name = 'Study Materials'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,115 @@
+"""
+Direct-to-bucket transfers of material files.
+
+When the default storage is S3 compatible (``USE_S3`` in production),
+clients upload a material file with a presigned PUT straight to the
+bucket and download it from a presigned GET URL, so file bytes never pass
+through Django:
+
+1. ``POST /api/materials/uploads/`` with ``direct: true`` and the file's
+   ``sha256`` returns ``upload_url`` and the ``upload_headers`` to send.
+   The checksum is part of the signature, so the bucket rejects a body
+   that does not match it.
+2. The client PUTs the file to ``upload_url``.
+3. ``POST /api/materials/uploads/<id>/complete/`` checks the stored
+   object's size and checksum and attaches it to the upload, which is then
+   turned into a material as for chunked uploads.
+"""
+import base64
+import hashlib
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.http import content_disposition_header
+
+try:
+    from storages.backends.s3 import S3Storage
+    from storages.utils import clean_name
+except ImportError:
+    S3Storage = None
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def is_s3(storage):
+    return S3Storage is not None and isinstance(storage, S3Storage)
+
+
+def enabled(storage=default_storage):
+    return settings.MATERIAL_DIRECT_UPLOADS and is_s3(storage)
+
+
+def object_name(upload):
+    """Storage name the client uploads to; unique per upload, so nothing is overwritten"""
+    return f'materials/{upload.pk.hex}/{upload.filename}'
+
+
+def _client_params(storage, name):
+    return storage.connection.meta.client, {
+        'Bucket': storage.bucket_name,
+        'Key': storage._normalize_name(clean_name(name)),
+    }
+
+
+def checksum_header(sha256):
+    return base64.b64encode(bytes.fromhex(sha256)).decode()
+
+
+def presign_upload(upload, storage=default_storage):
+    """(url, headers) for the client's PUT of ``upload``"""
+    client, params = _client_params(storage, object_name(upload))
+    headers = {'x-amz-checksum-sha256': checksum_header(upload.sha256)}
+    params['ChecksumSHA256'] = headers['x-amz-checksum-sha256']
+    if upload.content_type:
+        params['ContentType'] = headers['Content-Type'] = upload.content_type
+    url = client.generate_presigned_url(
+        'put_object',
+        Params=params,
+        ExpiresIn=settings.MATERIAL_PRESIGNED_URL_EXPIRY,
+        HttpMethod='PUT'
+    )
+    return url, headers
+
+
+def verify_upload(upload, storage=default_storage):
+    """
+    Name of the uploaded object if it matches the declared size and
+    checksum, otherwise None.
+
+    Uses the checksum stored by the bucket; buckets that don't return one
+    have the object read back and hashed.
+    """
+    name = object_name(upload)
+    client, params = _client_params(storage, name)
+    try:
+        head = client.head_object(ChecksumMode='ENABLED', **params)
+    except client.exceptions.ClientError:
+        return None
+    if head['ContentLength'] != upload.size:
+        return None
+
+    stored = head.get('ChecksumSHA256')
+    if stored is not None:
+        matches = stored == checksum_header(upload.sha256)
+    else:
+        digest = hashlib.sha256()
+        with storage.open(name, 'rb') as f:
+            for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+        matches = digest.hexdigest() == upload.sha256
+    return name if matches else None
+
+
+def copy_object(source, name, storage=default_storage):
+    """Server-side copy within the bucket, file bytes stay out of Django"""
+    client, params = _client_params(storage, name)
+    params['CopySource'] = _client_params(storage, source)[1]
+    client.copy_object(**params)
+
+
+def download_url(name, filename, storage=default_storage):
+    """Presigned GET that makes browsers save the file as ``filename``"""
+    return storage.url(
+        name,
+        parameters={'ResponseContentDisposition': content_disposition_header(True, filename)},
+        expire=settings.MATERIAL_PRESIGNED_URL_EXPIRY
+    )
@@ -0,0 +1,229 @@
+"""
+Material file downloads, served by MaterialDownloadView.
+
+* S3 compatible storage: redirect to a presigned URL, the bucket handles
+  ranges and conditional requests itself.
+* MATERIAL_DOWNLOAD_ACCEL set: Django only checks access and conditional
+  headers and hands the file to the web server with ``X-Accel-Redirect``
+  (nginx) or ``X-Sendfile`` (Apache, lighttpd), which serves the ranges.
+* Otherwise a FileResponse over the requested range. WSGI servers with
+  ``wsgi.file_wrapper`` (gunicorn) send it with sendfile(); elsewhere it is
+  streamed in blocks.
+
+Downloads are counted in a Redis hash, so a request never writes to the
+database; ``flush_download_counts`` adds the counts to
+StudyMaterial.download_count from a beat task.
+"""
+import logging
+import mimetypes
+import os
+import re
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from urllib.parse import quote
+import redis
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.http import FileResponse, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+from apps.core.signals import invalidate
+from .models import DownloadCountBatch, StudyMaterial
+from .storage import ContentAddressedStorage
+
+logger = logging.getLogger(__name__)
+
+SINGLE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+DOWNLOADS_KEY = 'material_downloads'
+FLUSHING_KEY = f'{DOWNLOADS_KEY}:flushing'
+# Field of the flushing hash holding its batch id
+BATCH_FIELD = 'batch'
+# pg advisory lock serializing flushes
+FLUSH_LOCK_ID = 0x6d646c66
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single byte range, end inclusive; None to send the
+    whole file, which is also the answer to multiple or malformed ranges.
+    """
+    match = SINGLE_RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last ``last`` bytes, of which an empty file has none
+        if int(last) == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def if_range_matches(header, etag, last_modified):
+    """Whether Range applies under ``If-Range``: strong ETag or exact date match"""
+    if not header:
+        return True
+    if header.startswith(('"', 'W/')):
+        return header == etag
+    return parse_http_date_safe(header) == last_modified
+
+
+def file_etag(name, size, last_modified):
+    """Content-addressed names carry the sha256, other files use size and mtime"""
+    sha256 = ContentAddressedStorage.address(name)
+    if sha256 is not None:
+        return f'"{sha256}"'
+    return f'"{size:x}-{last_modified:x}"'
+
+
+class FileRange:
+    """
+    ``length`` bytes of ``f`` from ``start``. Keeps fileno() and the file
+    offset so wsgi.file_wrapper can sendfile() the range.
+    """
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def serve(request, material):
+    """Response for a download of ``material.file`` from a local storage"""
+    f = material.file
+    try:
+        size = f.storage.size(f.name)
+        last_modified = int(f.storage.get_modified_time(f.name).timestamp())
+    except FileNotFoundError:
+        return None
+    etag = file_etag(f.name, size, last_modified)
+    filename = os.path.basename(f.name)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    byte_range = None
+    if request.headers.get('Range') and if_range_matches(request.headers.get('If-Range', ''), etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    # Resumed and seeking clients fetch many ranges, only count the first
+    if request.method == 'GET' and (byte_range is None or byte_range[0] == 0):
+        record_download(material.pk)
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accel = settings.MATERIAL_DOWNLOAD_ACCEL
+    if accel:
+        response = HttpResponse(content_type=content_type)
+        path = f.path
+        if accel == 'x-accel-redirect':
+            relative = os.path.relpath(path, settings.MEDIA_ROOT)
+            response['X-Accel-Redirect'] = quote(settings.MATERIAL_DOWNLOAD_ACCEL_PREFIX + relative)
+        else:
+            response['X-Sendfile'] = path
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    elif byte_range is None:
+        response = FileResponse(
+            f.storage.open(f.name, 'rb'), as_attachment=True, filename=filename, content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(f.storage.open(f.name, 'rb'), start, end - start + 1),
+            status=206, as_attachment=True, filename=filename, content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    return redis.Redis.from_url(settings.MATERIAL_DOWNLOAD_REDIS_URL)
+
+
+def record_download(material_id):
+    try:
+        get_client().hincrby(DOWNLOADS_KEY, material_id, 1)
+    except redis.RedisError:
+        logger.warning('Could not count download of material %s', material_id, exc_info=True)
+
+
+def flush_download_counts():
+    """
+    Add the counted downloads to StudyMaterial.download_count; returns how
+    many.
+
+    The counts are moved to FLUSHING_KEY and given a batch id, which is
+    recorded as a DownloadCountBatch in the transaction that applies them:
+    a batch left behind by a flush that died after committing is dropped,
+    not applied again. A flush started while another runs does nothing.
+    """
+    client = get_client()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [FLUSH_LOCK_ID])
+            if not cursor.fetchone()[0]:
+                return 0
+        # A flush that failed halfway left its batch under FLUSHING_KEY, finish it first
+        if not client.exists(FLUSHING_KEY):
+            try:
+                client.rename(DOWNLOADS_KEY, FLUSHING_KEY)
+            except redis.ResponseError:
+                # No downloads since the last flush
+                return 0
+        client.hsetnx(FLUSHING_KEY, BATCH_FIELD, str(uuid.uuid4()))
+        counts = {field.decode(): value for field, value in client.hgetall(FLUSHING_KEY).items()}
+        batch = counts.pop(BATCH_FIELD).decode()
+
+        by_count = defaultdict(list)
+        for material_id, count in counts.items():
+            by_count[int(count)].append(int(material_id))
+        try:
+            with transaction.atomic():
+                DownloadCountBatch.objects.create(batch=batch)
+        except IntegrityError:
+            # Applied by a flush that died before deleting it
+            by_count.clear()
+        for count, material_ids in by_count.items():
+            StudyMaterial.objects.filter(pk__in=material_ids).update(download_count=F('download_count') + count)
+        DownloadCountBatch.objects.filter(applied_at__lt=timezone.now() - timedelta(days=1)).delete()
+    client.delete(FLUSHING_KEY)
+    if by_count:
+        invalidate(StudyMaterial)
+    return sum(count * len(material_ids) for count, material_ids in by_count.items())
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from apps.materials.storage import collect_garbage, collect_orphans, migrate_legacy_files, stats
+
+
+class Command(BaseCommand):
+    help = 'Report deduplication of material files; optionally migrate legacy files and collect unreferenced blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--migrate',
+            action='store_true',
+            help='Move files stored before content addressing into deduplicated blobs'
+        )
+        parser.add_argument(
+            '--collect',
+            action='store_true',
+            help='Delete blobs no material file refers to anymore, and blob files without a blob row'
+        )
+
+    def handle(self, *args, **options):
+        if options['migrate']:
+            moved = migrate_legacy_files()
+            self.stdout.write(self.style.SUCCESS(f'Moved {moved} legacy files into blobs'))
+        if options['collect']:
+            count, freed = collect_garbage()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {count} unreferenced blobs ({freed} bytes)'))
+            count, freed = collect_orphans()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {count} orphaned blob files ({freed} bytes)'))
+
+        totals = stats()
+        self.stdout.write(
+            f"{totals['references']} files in {totals['blobs']} blobs: "
+            f"{totals['referenced_bytes']} bytes referenced, {totals['stored_bytes']} stored, "
+            f"{totals['saved_bytes']} saved (ratio {totals['dedup_ratio']}), "
+            f"{totals['unreferenced_blobs']} unreferenced blobs"
+        )
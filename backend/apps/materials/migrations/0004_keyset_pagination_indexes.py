@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0003_search_vector'),
+        ('users', '0002_alter_user_managers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studymaterial',
+            index=models.Index(fields=['created_at', 'id'], name='material_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0005_material_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialupload',
+            name='direct',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='materialupload',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='materials/'),
+        ),
+        migrations.AlterField(
+            model_name='studymaterial',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='materials/'),
+        ),
+    ]
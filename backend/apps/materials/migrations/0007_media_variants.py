@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0006_direct_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studymaterial',
+            name='text_extract',
+            field=models.FileField(blank=True, editable=False, max_length=255, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='studymaterial',
+            name='thumbnail',
+            field=models.FileField(blank=True, editable=False, max_length=255, null=True, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:27
+
+import apps.materials.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0007_media_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='materialupload',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=apps.materials.models.material_storage, upload_to='materials/'),
+        ),
+        migrations.AlterField(
+            model_name='studymaterial',
+            name='file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=apps.materials.models.material_storage, upload_to='materials/'),
+        ),
+        migrations.CreateModel(
+            name='MaterialBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('ref_count', 0)), fields=['sha256'], name='materialblob_unreferenced_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0008_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studymaterial',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0009_download_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DownloadCountBatch',
+            fields=[
+                ('batch', models.UUIDField(primary_key=True, serialize=False)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
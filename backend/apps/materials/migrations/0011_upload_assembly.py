@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materials', '0010_download_count_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialupload',
+            name='assembly_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='materialupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('assembling', 'Assembling'), ('complete', 'Complete')], default='pending', max_length=20),
+        ),
+    ]
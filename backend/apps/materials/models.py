@@ -1,7 +1,31 @@
+import math
+import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.files.storage import storages
 from django.db import models
 from django.conf import settings
 
 
+def material_storage():
+    """Content-addressed storage of material files, see apps.materials.storage"""
+    return storages['materials']
+
+
+class StudyMaterialQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load everything StudyMaterialSerializer renders in a fixed number of queries"""
+        return self.select_related('author', 'subject').prefetch_related(
+            'author__subjects'
+        ).defer('search_vector')
+
+    def update_search_vector(self):
+        return self.update(search_vector=(
+            SearchVector('title', weight='A', config=settings.SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=settings.SEARCH_CONFIG)
+        ))
+
+
 class StudyMaterial(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -15,13 +39,135 @@ class StudyMaterial(models.Model):
     )
     title = models.CharField(max_length=200)
     description = models.TextField()
-    file = models.FileField(upload_to='materials/', blank=True, null=True)
+    file = models.FileField(
+        upload_to='materials/', storage=material_storage, max_length=255, blank=True, null=True
+    )
     link = models.URLField(blank=True, null=True)
+    # Derived from file by materials.tasks.process_material
+    thumbnail = models.FileField(max_length=255, blank=True, null=True, editable=False)
+    text_extract = models.FileField(max_length=255, blank=True, null=True, editable=False)
+    # Flushed from Redis by materials.tasks.flush_download_counts
+    download_count = models.PositiveIntegerField(default=0, editable=False)
+    # Maintained by apps.materials.signals
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StudyMaterialQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='material_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='material_search_vector_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class MaterialUpload(models.Model):
+    """
+    A material file uploaded in parts (see apps.materials.uploads), or
+    directly to the bucket with a presigned URL when ``direct`` is set.
+
+    Parts are numbered from 0 and all but the last are ``chunk_size``
+    bytes. Once complete, ``file`` holds the assembled file until a
+    StudyMaterial is created from it.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('assembling', 'Assembling'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='material_uploads'
+    )
+    filename = models.CharField(max_length=100)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Sent by the client straight to the bucket, see apps.materials.direct
+    direct = models.BooleanField(default=False)
+    file = models.FileField(
+        upload_to='materials/', storage=material_storage, max_length=255, blank=True, null=True
+    )
+    # Declared by the client when the upload starts, or computed on completion
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when completion claims the upload, see apps.materials.uploads.complete_upload
+    assembly_started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+    @property
+    def part_count(self):
+        return max(math.ceil(self.size / self.chunk_size), 1)
+
+    def part_size(self, number):
+        if number < self.part_count - 1:
+            return self.chunk_size
+        return self.size - self.chunk_size * (self.part_count - 1)
+
+
+class MaterialUploadPart(models.Model):
+    upload = models.ForeignKey(MaterialUpload, on_delete=models.CASCADE, related_name='parts')
+    number = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    storage_name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['number']
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'number'], name='upload_part_number_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.upload_id} part {self.number}"
+
+
+class MaterialBlob(models.Model):
+    """
+    A file content stored once by the material storage and shared by every
+    material file with that content. ``ref_count`` counts the file names
+    pointing at it; blobs left without references are deleted by
+    apps.materials.storage.collect_garbage.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sha256'], condition=models.Q(ref_count=0), name='materialblob_unreferenced_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256} ({self.ref_count} refs)"
+
+
+class DownloadCountBatch(models.Model):
+    """
+    A batch of download counts added to StudyMaterial.download_count,
+    recorded in the same transaction so a batch is never applied twice;
+    see apps.materials.downloads.flush_download_counts.
+    """
+    batch = models.UUIDField(primary_key=True)
+    applied_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return str(self.batch)
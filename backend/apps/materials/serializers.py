@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
-from .models import StudyMaterial
+from .models import MaterialUpload, StudyMaterial
+from . import direct
+from .uploads import attach_upload, create_upload
 from apps.users.serializers import UserSerializer, SubjectSerializer
 
 
@@ -10,23 +14,109 @@ class StudyMaterialSerializer(serializers.ModelSerializer):
         queryset=StudyMaterial._meta.get_field('subject').related_model.objects.all(),
         write_only=False
     )
+    upload = serializers.PrimaryKeyRelatedField(
+        queryset=MaterialUpload.objects.filter(status='complete'),
+        write_only=True,
+        required=False
+    )
+    download_url = serializers.SerializerMethodField()
+    search_headline = serializers.SerializerMethodField()
 
     class Meta:
         model = StudyMaterial
         fields = [
             'id', 'author', 'subject', 'subject_detail', 'title',
-            'description', 'file', 'link', 'created_at', 'updated_at'
+            'description', 'file', 'upload', 'download_url', 'link', 'thumbnail', 'text_extract',
+            'download_count', 'search_headline', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'author', 'thumbnail', 'text_extract', 'download_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+
+    def get_download_url(self, obj):
+        if not obj.file:
+            return None
+        url = reverse('material-download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_search_headline(self, obj):
+        # Only present when the list was filtered with ?search=
+        return getattr(obj, 'search_headline', None)
+
+    def validate_upload(self, upload):
+        if upload.owner_id != self.context['request'].user.pk:
+            raise serializers.ValidationError('Upload not found')
+        return upload
 
     def validate(self, attrs):
         file = attrs.get('file')
         link = attrs.get('link', '').strip()
         
-        if not file and not link:
+        if not file and not link and not attrs.get('upload'):
             raise serializers.ValidationError('Either file or link must be provided')
         return attrs
 
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
+        upload = validated_data.pop('upload', None)
+        if upload is not None:
+            validated_data['file'] = attach_upload(upload)
         return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        upload = validated_data.pop('upload', None)
+        if upload is not None:
+            validated_data['file'] = attach_upload(upload)
+        return super().update(instance, validated_data)
+
+
+class MaterialUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(required=False, min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False)
+    part_count = serializers.IntegerField(read_only=True)
+    parts = serializers.SerializerMethodField()
+    upload_url = serializers.SerializerMethodField()
+    upload_headers = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MaterialUpload
+        fields = [
+            'id', 'filename', 'content_type', 'size', 'chunk_size', 'part_count',
+            'parts', 'direct', 'upload_url', 'upload_headers', 'status', 'file',
+            'sha256', 'created_at', 'expires_at'
+        ]
+        read_only_fields = ['id', 'status', 'file', 'created_at', 'expires_at']
+
+    def validate(self, attrs):
+        if attrs.get('direct'):
+            if not direct.enabled():
+                raise serializers.ValidationError({'direct': 'Direct uploads are not available'})
+            if not attrs.get('sha256'):
+                raise serializers.ValidationError({'sha256': 'Direct uploads must declare their sha256'})
+        return attrs
+
+    def validate_size(self, size):
+        if size > settings.MATERIAL_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'Files may be at most {settings.MATERIAL_UPLOAD_MAX_SIZE} bytes')
+        return size
+
+    def get_parts(self, obj):
+        """Numbers of the parts received so far"""
+        return [part.number for part in obj.parts.all()]
+
+    def _presigned(self, obj):
+        if not obj.direct or obj.status != 'pending':
+            return None, None
+        if not hasattr(obj, '_presigned'):
+            obj._presigned = direct.presign_upload(obj)
+        return obj._presigned
+
+    def get_upload_url(self, obj):
+        return self._presigned(obj)[0]
+
+    def get_upload_headers(self, obj):
+        return self._presigned(obj)[1]
+
+    def create(self, validated_data):
+        return create_upload(owner=self.context['request'].user, **validated_data)
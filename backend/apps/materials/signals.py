@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import MaterialUpload, StudyMaterial
+from .tasks import process_material
+
+
+@receiver(pre_save, sender=StudyMaterial)
+def remember_file(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # The field commits a new file after this signal, taking a blob reference
+    instance._file_committing = bool(instance.file) and not instance.file._committed
+    if instance.pk is not None:
+        instance._previous_file = StudyMaterial.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+
+
+@receiver(post_save, sender=StudyMaterial)
+def update_search_vector(sender, instance, **kwargs):
+    StudyMaterial.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=StudyMaterial)
+def file_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.file.name or ''
+    previous = None if created else getattr(instance, '_previous_file', None)
+    # Identical content and file name give the same name, yet a new reference
+    if previous and (name != previous or getattr(instance, '_file_committing', False)):
+        # Releases the replaced file's blob, see apps.materials.storage
+        instance.file.storage.delete(previous)
+    if name != (previous or ''):
+        transaction.on_commit(lambda: process_material.delay(instance.pk, name))
+
+
+@receiver(post_delete, sender=StudyMaterial)
+def delete_files(sender, instance, **kwargs):
+    for f in (instance.file, instance.thumbnail, instance.text_extract):
+        if f:
+            f.delete(save=False)
+
+
+@receiver(post_delete, sender=MaterialUpload)
+def delete_upload_file(sender, instance, **kwargs):
+    if instance.file:
+        instance.file.delete(save=False)
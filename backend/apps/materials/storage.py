@@ -0,0 +1,287 @@
+"""
+Content-addressed, deduplicated storage of material files.
+
+``ContentAddressedStorage`` wraps another storage (the ``default`` one
+unless configured otherwise in ``STORAGES['materials']``). A saved file is
+hashed while it is read, and its content is stored once as the blob
+``<location>/<sha256[:2]>/<sha256>`` in the wrapped storage. The file gets
+the name ``<upload_to>/<sha256>/<filename>``, so identical uploads share a
+blob but keep their own file names.
+
+Every name handed out holds a reference on its MaterialBlob; deleting the
+name releases it, and a blob without references is deleted from the
+wrapped storage by ``collect_garbage``. Blob files written by a save whose
+transaction then rolled back have no MaterialBlob; ``collect_orphans``
+deletes them. Names that are not content addressed (files stored before
+this storage existed) are passed through to the wrapped storage unchanged.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import tempfile
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from . import direct
+
+COPY_BUFFER_SIZE = 64 * 1024
+ADDRESSED_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})/[^/]+$')
+# '/<sha256>' inserted in front of the file name
+ADDRESS_LENGTH = 65
+
+
+def model(name):
+    # Not imported: the material models create this storage while they load
+    return apps.get_model('materials', name)
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+
+    def __init__(self, storage='default', location='blobs'):
+        self.wrapped_alias = storage
+        self.location = location
+
+    @property
+    def wrapped(self):
+        return storages[self.wrapped_alias]
+
+    def blob_name(self, sha256):
+        return posixpath.join(self.location, sha256[:2], sha256)
+
+    @staticmethod
+    def address(name):
+        """sha256 of a content-addressed name, None for a pass-through name"""
+        match = ADDRESSED_NAME.search(name or '')
+        return match.group(1) if match else None
+
+    def resolve(self, name):
+        """Name of the file in the wrapped storage"""
+        sha256 = self.address(name)
+        return name if sha256 is None else self.blob_name(sha256)
+
+    def get_available_name(self, name, max_length=None):
+        # Any name is available, it only has to leave room for the hash
+        name = str(name).replace('\\', '/')
+        excess = 0 if max_length is None else len(name) + ADDRESS_LENGTH - max_length
+        if excess > 0:
+            dir_name, file_name = posixpath.split(name)
+            root, ext = posixpath.splitext(file_name)
+            if len(root) <= excess:
+                raise SuspiciousFileOperation(f'Storage can not fit "{name}" into {max_length} characters')
+            name = posixpath.join(dir_name, root[:-excess] + ext)
+        return name
+
+    def _save(self, name, content):
+        dir_name, file_name = posixpath.split(name)
+        digest = hashlib.sha256()
+        size = 0
+        spool = None
+        try:
+            content.seek(0)
+        except (AttributeError, io.UnsupportedOperation):
+            # Streams are read once, so keep a copy in case the blob is new
+            spool = tempfile.SpooledTemporaryFile(max_size=settings.MATERIAL_UPLOAD_SPOOL_MEMORY)
+        try:
+            for block in iter(lambda: content.read(COPY_BUFFER_SIZE), b''):
+                digest.update(block)
+                size += len(block)
+                if spool is not None:
+                    spool.write(block)
+            source = content if spool is None else File(spool)
+
+            def write(blob_name):
+                source.seek(0)
+                return self.wrapped.save(blob_name, source)
+
+            sha256 = digest.hexdigest()
+            self.add_reference(sha256, size, write)
+        finally:
+            if spool is not None:
+                spool.close()
+        return posixpath.join(dir_name, sha256, file_name)
+
+    def add_reference(self, sha256, size, write):
+        """
+        Take a reference on the blob ``sha256``, calling ``write(blob_name)``
+        (which returns the name it saved) to store it when the blob doesn't
+        exist yet.
+
+        The blob row stays locked while it is written, so concurrent saves of
+        the same content write it once and garbage collection can't delete
+        it underneath them.
+        """
+        blob_name = self.blob_name(sha256)
+        written = False
+        try:
+            with transaction.atomic():
+                _, created = model('MaterialBlob').objects.select_for_update().get_or_create(
+                    sha256=sha256, defaults={'size': size}
+                )
+                if created or not self.wrapped.exists(blob_name):
+                    # A file left by a rolled back save is replaced, or the
+                    # wrapped storage would save under another name
+                    self.wrapped.delete(blob_name)
+                    saved = write(blob_name)
+                    written = True
+                    if saved != blob_name:
+                        self.wrapped.delete(saved)
+                        raise OSError(f'Blob {sha256} was stored as {saved}')
+                model('MaterialBlob').objects.filter(pk=sha256).update(ref_count=F('ref_count') + 1)
+        except Exception:
+            if written:
+                self.wrapped.delete(blob_name)
+            raise
+
+    def adopt(self, name, sha256, size, new_name):
+        """
+        Take over ``name``, a file already in the wrapped storage whose
+        content is known, as the content-addressed version of ``new_name``.
+        Direct uploads land in the bucket this way without passing through
+        Django.
+        """
+        def write(blob_name):
+            if direct.is_s3(self.wrapped):
+                direct.copy_object(name, blob_name, self.wrapped)
+                return blob_name
+            with self.wrapped.open(name, 'rb') as f:
+                return self.wrapped.save(blob_name, f)
+
+        dir_name, file_name = posixpath.split(new_name)
+        self.add_reference(sha256, size, write)
+        self.wrapped.delete(name)
+        return posixpath.join(dir_name, sha256, file_name)
+
+    def delete(self, name):
+        sha256 = self.address(name)
+        if sha256 is None:
+            return self.wrapped.delete(name)
+        released = model('MaterialBlob').objects.filter(pk=sha256, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+        if released:
+            transaction.on_commit(lambda: collect_garbage([sha256]))
+
+    def _open(self, name, mode='rb'):
+        return self.wrapped.open(self.resolve(name), mode)
+
+    def exists(self, name):
+        return self.wrapped.exists(self.resolve(name))
+
+    def size(self, name):
+        return self.wrapped.size(self.resolve(name))
+
+    def url(self, name, **kwargs):
+        return self.wrapped.url(self.resolve(name), **kwargs)
+
+    def path(self, name):
+        return self.wrapped.path(self.resolve(name))
+
+    def listdir(self, path):
+        return self.wrapped.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.wrapped.get_accessed_time(self.resolve(name))
+
+    def get_created_time(self, name):
+        return self.wrapped.get_created_time(self.resolve(name))
+
+    def get_modified_time(self, name):
+        return self.wrapped.get_modified_time(self.resolve(name))
+
+
+def collect_garbage(sha256s=None):
+    """Delete unreferenced blobs, optionally only of ``sha256s``; returns (count, bytes)"""
+    storage = storages['materials']
+    unreferenced = model('MaterialBlob').objects.filter(ref_count=0)
+    if sha256s is not None:
+        unreferenced = unreferenced.filter(pk__in=sha256s)
+    count = freed = 0
+    for sha256 in unreferenced.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            # Skip blobs a save is taking a reference on right now
+            blob = model('MaterialBlob').objects.select_for_update(skip_locked=True).filter(pk=sha256, ref_count=0).first()
+            if blob is None:
+                continue
+            storage.wrapped.delete(storage.blob_name(sha256))
+            blob.delete()
+        count += 1
+        freed += blob.size
+    return count, freed
+
+
+def collect_orphans(min_age=None):
+    """
+    Delete blob files that have no MaterialBlob, left by saves whose
+    transaction rolled back; returns (count, bytes). Files younger than
+    ``min_age`` seconds (MATERIAL_ORPHAN_BLOB_AGE) may belong to a save
+    that hasn't committed yet and are kept.
+    """
+    storage = storages['materials']
+    wrapped = storage.wrapped
+    if min_age is None:
+        min_age = settings.MATERIAL_ORPHAN_BLOB_AGE
+    cutoff = timezone.now() - timedelta(seconds=min_age)
+    try:
+        prefixes, _ = wrapped.listdir(storage.location)
+    except FileNotFoundError:
+        return 0, 0
+    count = freed = 0
+    for prefix in prefixes:
+        directory = posixpath.join(storage.location, prefix)
+        _, file_names = wrapped.listdir(directory)
+        known = set(model('MaterialBlob').objects.filter(pk__in=file_names).values_list('pk', flat=True))
+        for file_name in file_names:
+            name = posixpath.join(directory, file_name)
+            if file_name in known or wrapped.get_modified_time(name) > cutoff:
+                continue
+            size = wrapped.size(name)
+            wrapped.delete(name)
+            count += 1
+            freed += size
+    return count, freed
+
+
+def stats():
+    """Deduplication counters of the content-addressed material files"""
+    totals = model('MaterialBlob').objects.filter(ref_count__gt=0).aggregate(
+        blobs=Count('pk'),
+        references=Sum('ref_count'),
+        stored_bytes=Sum('size'),
+        referenced_bytes=Sum(F('size') * F('ref_count')),
+    )
+    totals = {key: value or 0 for key, value in totals.items()}
+    totals['saved_bytes'] = totals['referenced_bytes'] - totals['stored_bytes']
+    totals['dedup_ratio'] = (
+        round(totals['referenced_bytes'] / totals['stored_bytes'], 3) if totals['stored_bytes'] else 1.0
+    )
+    totals['unreferenced_blobs'] = model('MaterialBlob').objects.filter(ref_count=0).count()
+    return totals
+
+
+def migrate_legacy_files():
+    """Move material files stored before content addressing into blobs; returns how many"""
+    storage = storages['materials']
+    moved = 0
+    legacy = model('StudyMaterial').objects.exclude(file='').exclude(file__isnull=True).only('id', 'file')
+    for material in legacy.iterator():
+        name = material.file.name
+        if storage.address(name) is not None or not storage.wrapped.exists(name):
+            continue
+        with storage.wrapped.open(name, 'rb') as f:
+            new_name = storage.save(name, f, max_length=model('StudyMaterial')._meta.get_field('file').max_length)
+        updated = model('StudyMaterial').objects.filter(pk=material.pk, file=name).update(file=new_name)
+        if updated:
+            # Other materials may still point at the old file
+            if not model('StudyMaterial').objects.filter(file=name).exists():
+                storage.wrapped.delete(name)
+            moved += 1
+        else:
+            storage.delete(new_name)
+    return moved
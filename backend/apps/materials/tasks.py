@@ -0,0 +1,53 @@
+import logging
+from celery import shared_task
+from apps.core import media
+from apps.core.signals import invalidate
+from . import downloads, uploads
+from .models import StudyMaterial
+from .storage import collect_garbage, collect_orphans
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_expired_uploads():
+    return uploads.purge_expired_uploads()
+
+
+@shared_task
+def collect_material_blobs():
+    count, freed = collect_garbage()
+    orphans, orphan_bytes = collect_orphans()
+    return {'blobs': count, 'bytes': freed, 'orphans': orphans, 'orphan_bytes': orphan_bytes}
+
+
+@shared_task
+def flush_download_counts():
+    return downloads.flush_download_counts()
+
+
+@shared_task
+def process_material(material_id, name):
+    """Thumbnail and text extract of the material file ``name``; no-op if it was replaced meanwhile"""
+    material = StudyMaterial.objects.filter(pk=material_id).only('id', 'file', 'thumbnail', 'text_extract').first()
+    if material is None or (material.file.name or '') != name:
+        return
+    for old in (material.thumbnail, material.text_extract):
+        if old:
+            old.delete(save=False)
+
+    derived = {'thumbnail': None, 'text_extract': None}
+    if name:
+        storage = material.thumbnail.storage
+        try:
+            with material.file.open('rb') as f:
+                thumbnail, text = media.document_artifacts(f, name)
+            if thumbnail is not None:
+                derived['thumbnail'] = storage.save(media.derived_name(name, 'thumb.webp'), thumbnail)
+            if text is not None:
+                derived['text_extract'] = storage.save(media.derived_name(name, 'text.txt'), text)
+        except media.PROCESSING_ERRORS:
+            logger.warning('Could not process file %s of material %s', name, material_id, exc_info=True)
+
+    StudyMaterial.objects.filter(pk=material_id, file=name).update(**derived)
+    invalidate(StudyMaterial)
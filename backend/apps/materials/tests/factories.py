@@ -0,0 +1,14 @@
+import factory
+from apps.materials.models import StudyMaterial
+from apps.users.tests.factories import SubjectFactory, UserFactory
+
+
+class MaterialFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = StudyMaterial
+
+    author = factory.SubFactory(UserFactory)
+    subject = factory.SubFactory(SubjectFactory)
+    title = factory.Sequence(lambda n: f'Material {n}')
+    description = 'Notes'
+    link = 'https://example.com/notes'
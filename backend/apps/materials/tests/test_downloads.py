@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import pytest
+from django.core.files.base import ContentFile
+from apps.materials import downloads
+from apps.materials.models import DownloadCountBatch
+from apps.materials.tests.factories import MaterialFactory
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def download_counts(*materials):
+    for material in materials:
+        material.refresh_from_db()
+    return [material.download_count for material in materials]
+
+
+def test_flush_adds_counts(fake_redis):
+    first, second = MaterialFactory.create_batch(2)
+    for material in (first, first, second):
+        downloads.record_download(material.pk)
+    assert downloads.flush_download_counts() == 3
+    assert download_counts(first, second) == [2, 1]
+    assert downloads.flush_download_counts() == 0
+
+
+def test_batch_applied_before_a_crash_is_not_applied_again(fake_redis, monkeypatch):
+    material = MaterialFactory()
+    downloads.record_download(material.pk)
+    # The flush commits, then dies before deleting its batch
+    monkeypatch.setattr(fake_redis.__class__, 'delete', lambda self, *keys: 0)
+    assert downloads.flush_download_counts() == 1
+    monkeypatch.undo()
+    assert fake_redis.exists(downloads.FLUSHING_KEY)
+
+    downloads.record_download(material.pk)
+    assert downloads.flush_download_counts() == 0
+    assert not fake_redis.exists(downloads.FLUSHING_KEY)
+    assert downloads.flush_download_counts() == 1
+    assert download_counts(material) == [2]
+    assert DownloadCountBatch.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_overlapping_flush_does_nothing(fake_redis):
+    material = MaterialFactory()
+    downloads.record_download(material.pk)
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        from django.db import connection as thread_connection
+        with thread_connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_lock(%s)', [downloads.FLUSH_LOCK_ID])
+            locked.set()
+            release.wait()
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [downloads.FLUSH_LOCK_ID])
+        thread_connection.close()
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait()
+    try:
+        assert downloads.flush_download_counts() == 0
+    finally:
+        release.set()
+        holder.join()
+    assert downloads.flush_download_counts() == 1
+    assert download_counts(material) == [1]
+
+
+@pytest.mark.parametrize('header, size, expected', [
+    ('bytes=0-3', 10, (0, 3)),
+    ('bytes=4-', 10, (4, 9)),
+    ('bytes=4-100', 10, (4, 9)),
+    ('bytes=-3', 10, (7, 9)),
+    ('bytes=-30', 10, (0, 9)),
+    ('bytes=5-2', 10, None),
+    ('bytes=0-1,4-5', 10, None),
+    ('items=0-1', 10, None),
+    ('bytes=-', 10, None),
+])
+def test_parse_range(header, size, expected):
+    assert downloads.parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize('header, size', [('bytes=10-', 10), ('bytes=-0', 10), ('bytes=-10', 0), ('bytes=0-', 0)])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(downloads.RangeNotSatisfiable):
+        downloads.parse_range(header, size)
+
+
+CONTENT = b'0123456789'
+
+
+@pytest.fixture
+def download(auth_client, media_root, fake_redis):
+    """``download(content=CONTENT, **headers)``: GET of a material file with ``headers``"""
+    client = auth_client(UserFactory())
+
+    def get(content=CONTENT, **headers):
+        material = MaterialFactory(file=ContentFile(content, name='notes.txt'))
+        return client.get(f'/api/materials/{material.pk}/download/', headers=headers)
+    return get
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_serves_the_whole_file(download):
+    response = download()
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response['ETag'] == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert response['Accept-Ranges'] == 'bytes'
+
+
+def test_matching_if_none_match_is_not_modified(download):
+    etag = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert download(**{'If-None-Match': etag}).status_code == 304
+
+
+def test_range_is_partial_content(download):
+    response = download(Range='bytes=2-5')
+    assert response.status_code == 206
+    assert body(response) == b'2345'
+    assert response['Content-Range'] == 'bytes 2-5/10'
+    assert response['Content-Length'] == '4'
+
+
+def test_unsatisfiable_range(download):
+    response = download(Range='bytes=20-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */10'
+
+
+def test_suffix_range_of_an_empty_file_is_unsatisfiable(download):
+    response = download(b'', Range='bytes=-10')
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */0'
+
+
+def test_if_range_applies_the_range_only_while_it_matches(download):
+    etag = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+    assert download(Range='bytes=2-5', **{'If-Range': etag}).status_code == 206
+    response = download(Range='bytes=2-5', **{'If-Range': '"stale"'})
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+
+
+def test_only_the_first_range_counts_as_a_download(download, fake_redis):
+    download(Range='bytes=0-3')
+    download(Range='bytes=4-')
+    assert sum(int(count) for count in fake_redis.hvals(downloads.DOWNLOADS_KEY)) == 1
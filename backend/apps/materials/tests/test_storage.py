@@ -0,0 +1,53 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from apps.materials.models import MaterialBlob
+from apps.materials.storage import collect_orphans
+from apps.materials.tests.factories import MaterialFactory
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures('media_root')]
+
+CONTENT = b'lecture notes'
+
+
+def blob_files(media_root):
+    return sorted(path.name for path in (media_root / 'blobs').rglob('*') if path.is_file())
+
+
+def test_resaving_identical_file_keeps_one_reference():
+    material = MaterialFactory(file=ContentFile(CONTENT, name='notes.txt'))
+    first_name = material.file.name
+    material.file = ContentFile(CONTENT, name='notes.txt')
+    material.save()
+    assert material.file.name == first_name
+    assert MaterialBlob.objects.get().ref_count == 1
+
+
+def test_stale_blob_file_is_replaced(media_root):
+    storage = storages['materials']
+    with pytest.raises(RuntimeError), transaction.atomic():
+        storage.save('materials/notes.txt', ContentFile(b'partial'))
+        raise RuntimeError
+    stale = blob_files(media_root)
+    assert len(stale) == 1 and not MaterialBlob.objects.exists()
+    # Overwrite it with the other content under the same blob name
+    (media_root / 'blobs' / stale[0][:2] / stale[0]).write_bytes(b'part')
+
+    name = storage.save('materials/notes.txt', ContentFile(b'partial'))
+    assert blob_files(media_root) == stale
+    with storage.open(name) as f:
+        assert f.read() == b'partial'
+
+
+def test_collect_orphans_deletes_rolled_back_blobs(media_root):
+    storage = storages['materials']
+    kept = storage.save('materials/kept.txt', ContentFile(CONTENT))
+    with pytest.raises(RuntimeError), transaction.atomic():
+        storage.save('materials/lost.txt', ContentFile(b'rolled back'))
+        raise RuntimeError
+    assert len(blob_files(media_root)) == 2
+
+    assert collect_orphans() == (0, 0)
+    assert collect_orphans(min_age=0) == (1, len(b'rolled back'))
+    assert blob_files(media_root) == [storage.address(kept)]
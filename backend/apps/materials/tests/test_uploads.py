@@ -0,0 +1,228 @@
+import hashlib
+import threading
+from datetime import timedelta
+from unittest import mock
+import pytest
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from apps.materials import tasks, uploads
+from apps.materials.models import MaterialUpload
+from apps.users.tests.factories import UserFactory
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures('media_root')]
+
+DECLARED = 'a' * 64
+CONTENT = b'0123456789abcdefghij!'
+CHUNK = 8
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunks(data=CONTENT):
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(settings):
+    settings.MATERIAL_UPLOAD_MIN_CHUNK_SIZE = CHUNK
+    settings.MATERIAL_UPLOAD_CHUNK_SIZE = CHUNK
+
+
+@pytest.fixture
+def owner():
+    return UserFactory()
+
+
+@pytest.fixture
+def client(auth_client, owner):
+    return auth_client(owner)
+
+
+@pytest.fixture
+def upload(client):
+    response = client.post('/api/materials/uploads/', {'filename': 'notes.txt', 'size': len(CONTENT)}, format='json')
+    assert response.status_code == 201, response.data
+    return MaterialUpload.objects.get(pk=response.data['id'])
+
+
+@pytest.fixture
+def direct_upload(owner):
+    return uploads.create_upload(owner, 'notes.pdf', 1024, direct=True, sha256=DECLARED)
+
+
+def put_part(client, upload, number, body, **headers):
+    return client.put(
+        f'/api/materials/uploads/{upload.pk}/parts/{number}/', body,
+        content_type='application/octet-stream', headers=headers
+    )
+
+
+def complete(client, upload, **body):
+    return client.post(f'/api/materials/uploads/{upload.pk}/complete/', body, format='json')
+
+
+def send_all(client, upload, data=CONTENT):
+    for number, body in enumerate(chunks(data)):
+        assert put_part(client, upload, number, body).status_code == 200
+
+
+def test_init_fixes_the_parts(upload):
+    assert upload.chunk_size == CHUNK
+    assert upload.part_count == 3
+    assert upload.status == 'pending'
+
+
+def test_part_of_the_wrong_length_is_refused(client, upload):
+    response = put_part(client, upload, 0, CONTENT[:CHUNK - 1])
+    assert response.status_code == 400
+    assert not upload.parts.exists()
+
+
+def test_part_not_matching_its_checksum_is_refused(client, upload):
+    response = put_part(client, upload, 0, chunks()[0], **{'X-Content-SHA256': sha256(b'other')})
+    assert response.status_code == 400
+    assert not upload.parts.exists()
+
+
+def test_part_beyond_the_last_is_refused(client, upload):
+    assert put_part(client, upload, 3, chunks()[0]).status_code == 400
+
+
+def test_resent_part_replaces_the_stored_copy(client, upload):
+    assert put_part(client, upload, 0, b'x' * CHUNK).status_code == 200
+    first = upload.parts.get().storage_name
+    response = put_part(client, upload, 0, chunks()[0], **{'X-Content-SHA256': sha256(chunks()[0])})
+    assert response.status_code == 200
+    part = upload.parts.get()
+    assert part.sha256 == sha256(chunks()[0])
+    assert part.storage_name != first and not default_storage.exists(first)
+    with default_storage.open(part.storage_name) as f:
+        assert f.read() == chunks()[0]
+
+
+def test_upload_resumes_from_the_parts_list(client, upload):
+    put_part(client, upload, 2, chunks()[2])
+    put_part(client, upload, 0, chunks()[0])
+    response = client.get(f'/api/materials/uploads/{upload.pk}/')
+    assert response.data['parts'] == [0, 2]
+
+
+def test_complete_refuses_missing_parts(client, upload):
+    put_part(client, upload, 0, chunks()[0])
+    response = complete(client, upload)
+    assert response.status_code == 400
+    assert 'Missing parts: 1, 2' in response.data['error']
+    upload.refresh_from_db()
+    assert upload.status == 'pending'
+
+
+def test_complete_assembles_and_hashes(client, upload):
+    send_all(client, upload)
+    part_names = list(upload.parts.values_list('storage_name', flat=True))
+    response = complete(client, upload, sha256=sha256(CONTENT).upper())
+    assert response.status_code == 200, response.data
+    upload.refresh_from_db()
+    assert upload.status == 'complete'
+    assert upload.sha256 == sha256(CONTENT)
+    with upload.file.open() as f:
+        assert f.read() == CONTENT
+    assert not upload.parts.exists()
+    assert not any(default_storage.exists(name) for name in part_names)
+    # Idempotent once complete
+    assert complete(client, upload).status_code == 200
+
+
+def test_complete_refuses_another_checksum(client, upload):
+    send_all(client, upload)
+    response = complete(client, upload, sha256=sha256(b'other'))
+    assert response.status_code == 400
+    upload.refresh_from_db()
+    assert upload.status == 'pending'
+    assert upload.parts.count() == 3
+
+
+def test_parts_are_refused_while_assembling(client, upload):
+    uploads.claim_upload(upload)
+    assert put_part(client, upload, 0, chunks()[0]).status_code == 400
+    assert not upload.parts.exists()
+
+
+def test_only_one_completion_assembles(client, upload, settings):
+    send_all(client, upload)
+    uploads.claim_upload(upload)
+    assert complete(client, upload).status_code == 400
+    # A claim older than the timeout belongs to a completion that died
+    MaterialUpload.objects.filter(pk=upload.pk).update(
+        assembly_started_at=timezone.now() - timedelta(seconds=settings.MATERIAL_UPLOAD_ASSEMBLY_TIMEOUT + 1)
+    )
+    assert complete(client, upload).status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_complete_holds_no_lock_while_assembling(client, upload):
+    send_all(client, upload)
+    locked = []
+
+    def probe():
+        # Another request, on its own connection
+        try:
+            with transaction.atomic():
+                MaterialUpload.objects.select_for_update(nowait=True).filter(pk=upload.pk).exists()
+        except DatabaseError:
+            locked.append(True)
+        finally:
+            connection.close()
+
+    def assemble(upload, parts, checksum=''):
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return 'materials/assembled.txt', sha256(CONTENT)
+
+    with mock.patch.object(uploads, 'assemble_parts', side_effect=assemble):
+        uploads.complete_upload(upload)
+    assert not locked
+
+
+def test_exhausted_memory_budget_answers_503(client, upload, settings):
+    settings.MATERIAL_UPLOAD_MEMORY_WAIT = 0
+    budget = uploads.MemoryBudget(CHUNK)
+    budget.used = CHUNK
+    with mock.patch.object(uploads, 'memory_budget', return_value=budget):
+        response = put_part(client, upload, 0, chunks()[0])
+    assert response.status_code == 503
+    assert response['Retry-After'] == '1'
+
+
+def test_purge_expired_uploads(client, upload):
+    put_part(client, upload, 0, chunks()[0])
+    name = upload.parts.get().storage_name
+    MaterialUpload.objects.filter(pk=upload.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+    kept = uploads.create_upload(upload.owner, 'other.txt', len(CONTENT))
+
+    assert tasks.purge_expired_uploads() == 1
+    assert list(MaterialUpload.objects.values_list('pk', flat=True)) == [kept.pk]
+    assert not default_storage.exists(name)
+
+
+def test_direct_upload_rejects_another_checksum(direct_upload):
+    with mock.patch.object(uploads.direct, 'verify_upload') as verify_upload:
+        with pytest.raises(uploads.UploadError):
+            uploads.complete_upload(direct_upload, 'b' * 64)
+    verify_upload.assert_not_called()
+    direct_upload.refresh_from_db()
+    assert direct_upload.sha256 == DECLARED
+    assert direct_upload.status == 'pending'
+
+
+@pytest.mark.parametrize('checksum', ['', DECLARED.upper()])
+def test_direct_upload_keeps_the_verified_checksum(direct_upload, checksum):
+    with mock.patch.object(uploads.direct, 'verify_upload', return_value='uploads/object'), \
+            mock.patch.object(uploads, 'material_storage') as material_storage:
+        material_storage.return_value.adopt.return_value = f'materials/{DECLARED}/notes.pdf'
+        upload = uploads.complete_upload(direct_upload, checksum)
+    assert upload.status == 'complete'
+    assert upload.sha256 == DECLARED
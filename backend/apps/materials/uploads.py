@@ -0,0 +1,294 @@
+"""
+Chunked, resumable uploads of material files.
+
+1. ``POST /api/materials/uploads/`` with the file name and size creates a
+   MaterialUpload and fixes the chunk size.
+2. ``PUT /api/materials/uploads/<id>/parts/<n>/`` sends part ``n`` as the
+   raw request body, in any order and concurrently. A failed part is simply
+   sent again; ``GET /api/materials/uploads/<id>/`` lists the parts already
+   received, so an interrupted upload resumes where it stopped.
+3. ``POST /api/materials/uploads/<id>/complete/`` assembles the parts into
+   the final file in storage, hashing it on the way. The upload is claimed
+   (status ``assembling``) in a short transaction and assembled outside of
+   it, so no row lock is held while gigabytes are copied.
+4. ``POST /api/materials/`` with ``upload: <id>`` creates the material.
+
+Part bodies are read in small blocks into a spooled temporary file, so at
+most MATERIAL_UPLOAD_SPOOL_MEMORY bytes per part are held in memory. The
+in-memory total of a worker process is capped by MATERIAL_UPLOAD_MEMORY_LIMIT;
+parts arriving beyond it wait briefly and are then refused with 503.
+"""
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from . import direct
+from .models import MaterialUpload, MaterialUploadPart, StudyMaterial, material_storage
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """The request can't be applied to the upload; the message is shown to the client"""
+
+
+class UploadBusy(Exception):
+    """The worker's upload memory budget stayed exhausted for MATERIAL_UPLOAD_MEMORY_WAIT"""
+
+
+class MemoryBudget:
+    """Bytes of upload data a worker process may hold in memory at once"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, size, timeout):
+        size = min(size, self.limit)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.used + size <= self.limit, timeout):
+                raise UploadBusy()
+            self.used += size
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.used -= size
+                self._condition.notify_all()
+
+
+@lru_cache(maxsize=1)
+def memory_budget():
+    return MemoryBudget(settings.MATERIAL_UPLOAD_MEMORY_LIMIT)
+
+
+def clean_filename(filename):
+    name = get_valid_filename(filename.rsplit('/', 1)[-1].rsplit('\\', 1)[-1]) or 'upload'
+    stem, dot, ext = name.rpartition('.')
+    if not dot:
+        return name[:80]
+    return f'{stem[:80 - len(ext) - 1]}.{ext[:16]}'
+
+
+def create_upload(owner, filename, size, content_type='', chunk_size=None, direct=False, sha256=''):
+    chunk_size = min(
+        max(chunk_size or settings.MATERIAL_UPLOAD_CHUNK_SIZE, settings.MATERIAL_UPLOAD_MIN_CHUNK_SIZE),
+        settings.MATERIAL_UPLOAD_MAX_CHUNK_SIZE
+    )
+    return MaterialUpload.objects.create(
+        owner=owner,
+        filename=clean_filename(filename),
+        content_type=content_type[:100],
+        size=size,
+        chunk_size=chunk_size,
+        direct=direct,
+        sha256=sha256.lower(),
+        expires_at=timezone.now() + timedelta(seconds=settings.MATERIAL_UPLOAD_EXPIRY),
+    )
+
+
+def part_name(upload, number):
+    return f'uploads/{upload.pk}/{number:06d}'
+
+
+def receive_part(upload, number, stream, length, checksum=''):
+    """
+    Store part ``number`` read from ``stream``; ``length`` is the request's
+    Content-Length. Replaces a previously received copy of the part.
+    """
+    if upload.status != 'pending':
+        raise UploadError('Upload is no longer accepting parts')
+    if upload.direct:
+        raise UploadError('Direct uploads are sent to their upload_url')
+    if number >= upload.part_count:
+        raise UploadError(f'Part number must be below {upload.part_count}')
+    expected = upload.part_size(number)
+    if length != expected:
+        raise UploadError(f'Part {number} must be exactly {expected} bytes')
+
+    spool_size = settings.MATERIAL_UPLOAD_SPOOL_MEMORY
+    with memory_budget().reserve(min(expected, spool_size), settings.MATERIAL_UPLOAD_MEMORY_WAIT):
+        with tempfile.SpooledTemporaryFile(max_size=spool_size) as spool:
+            digest = hashlib.sha256()
+            received = 0
+            while received < expected:
+                block = stream.read(min(COPY_BUFFER_SIZE, expected - received))
+                if not block:
+                    break
+                digest.update(block)
+                spool.write(block)
+                received += len(block)
+            if received != expected:
+                raise UploadError(f'Part {number} ended after {received} of {expected} bytes')
+            if checksum and checksum.lower() != digest.hexdigest():
+                raise UploadError(f'Part {number} does not match its checksum')
+            spool.seek(0)
+            storage_name = default_storage.save(part_name(upload, number), File(spool))
+
+    with transaction.atomic():
+        # Parts can't change under an assembly that claimed the upload meanwhile
+        if not MaterialUpload.objects.select_for_update().filter(pk=upload.pk, status='pending').exists():
+            default_storage.delete(storage_name)
+            raise UploadError('Upload is no longer accepting parts')
+        previous = MaterialUploadPart.objects.filter(upload=upload, number=number).first()
+        part, _ = MaterialUploadPart.objects.update_or_create(
+            upload=upload,
+            number=number,
+            defaults={'size': expected, 'sha256': digest.hexdigest(), 'storage_name': storage_name}
+        )
+    if previous is not None and previous.storage_name != storage_name:
+        default_storage.delete(previous.storage_name)
+    return part
+
+
+class PartsReader:
+    """Read-only file object over the stored parts in order, hashing what it returns"""
+
+    def __init__(self, storage, names):
+        self.storage = storage
+        self.names = list(names)
+        self.current = None
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        size = COPY_BUFFER_SIZE if size is None or size < 0 else size
+        while True:
+            if self.current is None:
+                if not self.names:
+                    return b''
+                self.current = self.storage.open(self.names.pop(0), 'rb')
+            block = self.current.read(size)
+            if block:
+                self.digest.update(block)
+                self.size += len(block)
+                return block
+            self.current.close()
+            self.current = None
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+
+def complete_upload(upload, checksum=''):
+    """
+    Assemble the parts, or verify the object of a direct upload, into the
+    final file; idempotent once complete.
+    """
+    upload, checksum = claim_upload(upload, checksum)
+    if upload.status == 'complete':
+        return upload
+    parts = []
+    try:
+        if upload.direct:
+            name = direct.verify_upload(upload)
+            if name is None:
+                raise UploadError('Uploaded object is missing or does not match the declared size or checksum')
+            name = material_storage().adopt(name, upload.sha256, upload.size, material_file_name(upload))
+        else:
+            parts = list(upload.parts.all())
+            name, checksum = assemble_parts(upload, parts, checksum)
+    except BaseException:
+        MaterialUpload.objects.filter(pk=upload.pk, status='assembling').update(status='pending')
+        raise
+
+    with transaction.atomic():
+        upload.parts.all().delete()
+        upload.file.name = name
+        upload.sha256 = checksum
+        upload.status = 'complete'
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['file', 'sha256', 'status', 'completed_at'])
+    delete_parts(parts)
+    return upload
+
+
+def claim_upload(upload, checksum=''):
+    """
+    Move a pending upload to ``assembling``; returns (upload, checksum to
+    verify). Only the row update runs under the lock, the assembly doesn't.
+    """
+    with transaction.atomic():
+        upload = MaterialUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status == 'complete':
+            return upload, upload.sha256
+        now = timezone.now()
+        timeout = timedelta(seconds=settings.MATERIAL_UPLOAD_ASSEMBLY_TIMEOUT)
+        if upload.status == 'assembling' and upload.assembly_started_at > now - timeout:
+            raise UploadError('Upload is already being completed')
+        checksum = (checksum or upload.sha256).lower()
+        # The object of a direct upload is verified against the sha256 declared at the start
+        if upload.direct and checksum != upload.sha256:
+            raise UploadError('Checksum does not match the one declared when the upload started')
+        upload.status = 'assembling'
+        upload.assembly_started_at = now
+        upload.save(update_fields=['status', 'assembly_started_at'])
+    return upload, checksum
+
+
+def assemble_parts(upload, parts, checksum=''):
+    """Concatenate the stored parts into the final file; returns (name, sha256)"""
+    missing = sorted(set(range(upload.part_count)) - {part.number for part in parts})
+    if missing:
+        raise UploadError(f'Missing parts: {", ".join(map(str, missing[:20]))}')
+
+    storage = material_storage()
+    reader = PartsReader(default_storage, [part.storage_name for part in parts])
+    try:
+        name = storage.save(material_file_name(upload), File(reader, name=upload.filename))
+    finally:
+        reader.close()
+    sha256 = reader.digest.hexdigest()
+    if reader.size != upload.size or (checksum and checksum != sha256):
+        storage.delete(name)
+        raise UploadError('Assembled file does not match the declared size or checksum')
+    return name, sha256
+
+
+def material_file_name(upload):
+    return StudyMaterial._meta.get_field('file').generate_filename(None, upload.filename)
+
+
+def attach_upload(upload):
+    """Hand a complete upload's file over to a material; returns the storage name"""
+    name = upload.file.name
+    # The material takes over the file's storage reference
+    upload.file = None
+    upload.delete()
+    return name
+
+
+def delete_parts(parts):
+    for part in parts:
+        default_storage.delete(part.storage_name)
+
+
+def discard_upload(upload):
+    """Delete an upload with its stored parts and assembled file"""
+    delete_parts(upload.parts.all())
+    if upload.file:
+        upload.file.delete(save=False)
+    elif upload.direct:
+        default_storage.delete(direct.object_name(upload))
+    upload.delete()
+
+
+def purge_expired_uploads():
+    expired = MaterialUpload.objects.filter(expires_at__lt=timezone.now())
+    count = 0
+    for upload in expired.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
@@ -1,7 +1,22 @@
 from django.urls import path
-from .views import MaterialListCreateView, MaterialDetailView
+from .views import (
+    MaterialListCreateView,
+    MaterialDetailView,
+    MaterialDownloadView,
+    MaterialStorageStatsView,
+    MaterialUploadCreateView,
+    MaterialUploadDetailView,
+    MaterialUploadPartView,
+    MaterialUploadCompleteView,
+)
 
 urlpatterns = [
     path('', MaterialListCreateView.as_view(), name='material-list'),
     path('<int:pk>/', MaterialDetailView.as_view(), name='material-detail'),
+    path('<int:pk>/download/', MaterialDownloadView.as_view(), name='material-download'),
+    path('storage/stats/', MaterialStorageStatsView.as_view(), name='material-storage-stats'),
+    path('uploads/', MaterialUploadCreateView.as_view(), name='material-upload-create'),
+    path('uploads/<uuid:pk>/', MaterialUploadDetailView.as_view(), name='material-upload-detail'),
+    path('uploads/<uuid:pk>/parts/<int:number>/', MaterialUploadPartView.as_view(), name='material-upload-part'),
+    path('uploads/<uuid:pk>/complete/', MaterialUploadCompleteView.as_view(), name='material-upload-complete'),
 ]
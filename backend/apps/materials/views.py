@@ -1,9 +1,17 @@
-from rest_framework import generics, permissions
+import os
+from django.http import Http404, HttpResponseRedirect
+from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from .models import StudyMaterial
-from .serializers import StudyMaterialSerializer
+from rest_framework.filters import OrderingFilter
+from apps.core.caching import CachedResponseMixin
+from apps.search.filters import FullTextSearchFilter
+from . import direct, downloads, storage
+from .models import MaterialUpload, StudyMaterial
+from .serializers import MaterialUploadSerializer, StudyMaterialSerializer
+from .uploads import UploadBusy, UploadError, complete_upload, discard_upload, receive_part
 
 
 class IsAuthorOrReadOnly(permissions.BasePermission):
@@ -13,17 +21,114 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
-class MaterialListCreateView(generics.ListCreateAPIView):
-    queryset = StudyMaterial.objects.select_related('author', 'subject')
+class MaterialListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = StudyMaterial.objects.with_details()
     serializer_class = StudyMaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_fields = ['subject', 'author']
-    search_fields = ['title', 'description']
+    search_vector_field = 'search_vector'
+    search_headline_field = 'description'
     ordering_fields = ['created_at', 'title']
+    cache_models = ('materials.StudyMaterial', 'users.User', 'users.Subject')
 
 
-class MaterialDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = StudyMaterial.objects.select_related('author', 'subject')
+class MaterialDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = StudyMaterial.objects.with_details()
     serializer_class = StudyMaterialSerializer
     permission_classes = [permissions.IsAuthenticated, IsAuthorOrReadOnly]
+    cache_models = ('materials.StudyMaterial', 'users.User', 'users.Subject')
+
+
+class MaterialDownloadView(generics.GenericAPIView):
+    """
+    Download the material's file: presigned redirect on S3 compatible
+    storage, otherwise served with range and conditional request support,
+    see apps.materials.downloads.
+    """
+    queryset = StudyMaterial.objects.only('id', 'file')
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        material = self.get_object()
+        if not material.file:
+            raise Http404('Material has no file')
+        if direct.enabled():
+            downloads.record_download(material.pk)
+            return HttpResponseRedirect(
+                direct.download_url(material.file.name, os.path.basename(material.file.name), material.file.storage)
+            )
+        response = downloads.serve(request, material)
+        if response is None:
+            raise Http404('Material file is missing')
+        return response
+
+
+class MaterialStorageStatsView(APIView):
+    """Deduplication counters of the material file storage"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(storage.stats())
+
+
+class MaterialUploadCreateView(generics.CreateAPIView):
+    """Start a chunked upload, see apps.materials.uploads"""
+    serializer_class = MaterialUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class OwnUploadMixin:
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return MaterialUpload.objects.filter(owner=self.request.user).prefetch_related('parts')
+
+
+class MaterialUploadDetailView(OwnUploadMixin, generics.RetrieveDestroyAPIView):
+    """Upload state with the parts received so far; DELETE aborts the upload"""
+    serializer_class = MaterialUploadSerializer
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+
+class MaterialUploadPartView(OwnUploadMixin, generics.GenericAPIView):
+    """
+    Receive one part as the raw request body.
+
+    An optional ``X-Content-SHA256`` header is checked against the part.
+    """
+
+    def put(self, request, pk, number):
+        upload = self.get_object()
+        length = request.META.get('CONTENT_LENGTH', '')
+        if not length.isdigit():
+            return Response({'error': 'Content-Length is required'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            part = receive_part(
+                upload, number, request.stream, int(length),
+                request.headers.get('X-Content-SHA256', '')
+            )
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except UploadBusy:
+            return Response(
+                {'error': 'Too many uploads in progress, retry the part shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
+        return Response({'number': part.number, 'size': part.size, 'sha256': part.sha256})
+
+
+class MaterialUploadCompleteView(OwnUploadMixin, generics.GenericAPIView):
+    """Assemble the parts; an optional ``sha256`` in the body is verified"""
+    serializer_class = MaterialUploadSerializer
+
+    def post(self, request, pk):
+        upload = self.get_object()
+        try:
+            upload = complete_upload(upload, str(request.data.get('sha256', '')))
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
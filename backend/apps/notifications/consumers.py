@@ -1,16 +1,26 @@
+import asyncio
 import json
+import time
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
+from django.conf import settings
+from . import metrics
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Per-user notification socket.
+
+    Transport heartbeats are WebSocket pings sent by Daphne (--ping-interval /
+    --ping-timeout). On top of that, clients must send ``{"action": "ping"}``
+    at least every WS_IDLE_TIMEOUT seconds or the socket is closed with 4408.
+    """
+
     async def connect(self):
         self.user = self.scope['user']
 
         if self.user.is_anonymous:
+            metrics.connection_rejected()
             await self.close()
             return
 
@@ -22,6 +32,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         )
 
         await self.accept()
+        metrics.connection_opened()
+        self.close_reason = 'client'
+        self.last_seen = time.monotonic()
+        self.watchdog = asyncio.ensure_future(self.watch())
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
@@ -29,25 +43,45 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.room_group_name,
                 self.channel_name
             )
+        if hasattr(self, 'watchdog'):
+            self.watchdog.cancel()
+            metrics.connection_closed(self.close_reason)
+
+    async def watch(self):
+        """Close the connection once the client has been quiet for WS_IDLE_TIMEOUT"""
+        while True:
+            idle_for = time.monotonic() - self.last_seen
+            if idle_for >= settings.WS_IDLE_TIMEOUT:
+                self.close_reason = 'idle'
+                await self.close(code=4408)
+                return
+            await asyncio.sleep(settings.WS_IDLE_TIMEOUT - idle_for)
 
     async def receive(self, text_data):
+        self.last_seen = time.monotonic()
         data = json.loads(text_data)
         action = data.get('action')
 
-        if action == 'mark_read':
+        if action == 'ping':
+            await self.send(text_data=json.dumps({'type': 'pong'}))
+        elif action == 'mark_read':
             notification_id = data.get('notification_id')
             await self.mark_notification_read(notification_id)
 
     async def notification_message(self, event):
         await self.send(text_data=json.dumps({
             'type': 'notification',
-            'notification': event['notification']
+            'notification': event['notification'],
+            'unread_count': event.get('unread_count')
+        }))
+
+    async def unread_count(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'count': event['count']
         }))
 
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
-        from .models import Notification
-        Notification.objects.filter(
-            id=notification_id,
-            user=self.user
-        ).update(is_read=True)
+        from .utils import mark_read
+        mark_read(self.user.id, [notification_id])
@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import json
+import os
+import resource
+import statistics
+import struct
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.users.models import User
+
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def encode_frame(opcode, payload):
+    """Masked client frame (RFC 6455 requires clients to mask)"""
+    mask = os.urandom(4)
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + mask + masked
+
+
+async def read_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    return first & 0x0F, await reader.readexactly(length)
+
+
+class Command(BaseCommand):
+    help = (
+        'Open many idle ws/notifications/ connections against a running server '
+        'and report how many it accepts and keeps open'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://localhost:8000/ws/notifications/')
+        parser.add_argument('--connections', type=int, default=10000)
+        parser.add_argument('--concurrency', type=int, default=500, help='Handshakes in flight')
+        parser.add_argument('--hold', type=int, default=60, help='Seconds to keep sockets open')
+        parser.add_argument('--ping-interval', type=int, default=60, help='Seconds between app-level pings')
+        parser.add_argument('--users', type=int, default=100, help='Distinct users to mint tokens for')
+
+    def handle(self, *args, **options):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        if options['connections'] + 100 > hard:
+            self.stderr.write(f'File descriptor limit is {hard}; raise it to open more sockets')
+
+        users = list(User.objects.filter(is_active=True).order_by('pk')[:options['users']])
+        if not users:
+            self.stderr.write('No users to authenticate as; run seed_data first')
+            return
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        asyncio.run(self.run(tokens, options))
+
+    async def run(self, tokens, options):
+        url = urlsplit(options['url'])
+        limit = asyncio.Semaphore(options['concurrency'])
+        deadline = time.monotonic() + options['hold']
+        handshakes, stats = [], {'failed': 0, 'dropped': 0}
+
+        async def client(index):
+            async with limit:
+                started = time.monotonic()
+                try:
+                    reader, writer = await self.open(url, tokens[index % len(tokens)])
+                except (OSError, ConnectionError, asyncio.IncompleteReadError):
+                    stats['failed'] += 1
+                    return
+                handshakes.append(time.monotonic() - started)
+            await self.hold(reader, writer, deadline, options['ping_interval'], stats)
+
+        ramp_started = time.monotonic()
+        tasks = [asyncio.ensure_future(client(i)) for i in range(options['connections'])]
+        while len(handshakes) + stats['failed'] < options['connections']:
+            await asyncio.sleep(1)
+        ramp = time.monotonic() - ramp_started
+        self.stdout.write(f'Opened {len(handshakes)} connections in {ramp:.1f}s ({stats["failed"]} failed)')
+        if len(handshakes) >= 2:
+            q = statistics.quantiles(handshakes, n=100)
+            self.stdout.write(f'Handshake p50={q[49] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms')
+
+        await asyncio.gather(*tasks)
+        held = len(handshakes) - stats['dropped']
+        self.stdout.write(self.style.SUCCESS(
+            f'Held {held} of {len(handshakes)} connections for {options["hold"]}s '
+            f'({stats["dropped"]} dropped by the server)'
+        ))
+
+    async def open(self, url, token):
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((
+            f'GET {url.path}?token={token} HTTP/1.1\r\n'
+            f'Host: {url.netloc}\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\n'
+            'Sec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        response = await reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in response.split(b'\r\n', 1)[0]:
+            writer.close()
+            raise ConnectionError('Upgrade rejected')
+        return reader, writer
+
+    async def hold(self, reader, writer, deadline, ping_interval, stats):
+        """Stay connected until the deadline, answering pings and sending keepalives"""
+        next_ping = time.monotonic() + ping_interval
+        try:
+            while (now := time.monotonic()) < deadline:
+                timeout = min(deadline, next_ping) - now
+                try:
+                    opcode, payload = await asyncio.wait_for(read_frame(reader), timeout)
+                except asyncio.TimeoutError:
+                    if time.monotonic() >= next_ping:
+                        writer.write(encode_frame(OP_TEXT, json.dumps({'action': 'ping'}).encode()))
+                        next_ping += ping_interval
+                    continue
+                if opcode == OP_PING:
+                    writer.write(encode_frame(OP_PONG, payload))
+                elif opcode == OP_CLOSE:
+                    stats['dropped'] += 1
+                    return
+        except (OSError, asyncio.IncompleteReadError):
+            stats['dropped'] += 1
+            return
+        writer.write(encode_frame(OP_CLOSE, struct.pack('!H', 1000)))
+        writer.close()
@@ -0,0 +1,31 @@
+"""Process-local WebSocket connection counters"""
+import os
+import socket
+from collections import Counter
+
+_counters = Counter()
+
+
+def connection_opened():
+    _counters['open'] += 1
+    _counters['opened_total'] += 1
+
+
+def connection_closed(reason='client'):
+    _counters['open'] -= 1
+    _counters[f'closed_{reason}'] += 1
+
+
+def connection_rejected():
+    _counters['rejected_total'] += 1
+
+
+def snapshot():
+    return {
+        'process': f'{socket.gethostname()}:{os.getpid()}',
+        'open': _counters['open'],
+        'opened_total': _counters['opened_total'],
+        'rejected_total': _counters['rejected_total'],
+        'closed_client': _counters['closed_client'],
+        'closed_idle': _counters['closed_idle'],
+    }
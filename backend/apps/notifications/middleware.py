@@ -0,0 +1,43 @@
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.users.authentication import CachedJWTAuthentication
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate WebSocket connections with a SimpleJWT access token.
+
+    The token is read from ``?token=`` (browsers can't set headers on sockets)
+    or an ``Authorization: Bearer`` header. Like the REST API, the user is
+    resolved through the auth cache, so revoked tokens (``tv`` claim) and
+    inactive users are refused; ``scope['user']`` is the cached User.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await database_sync_to_async(self.get_user)(scope)
+        return await super().__call__(scope, receive, send)
+
+    def get_raw_token(self, scope):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            return query['token'][0]
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                parts = value.decode().split()
+                if len(parts) == 2 and parts[0] == 'Bearer':
+                    return parts[1]
+        return None
+
+    def get_user(self, scope):
+        raw_token = self.get_raw_token(scope)
+        if raw_token is None:
+            return AnonymousUser()
+        try:
+            return CachedJWTAuthentication().get_user(AccessToken(raw_token))
+        except (TokenError, InvalidToken, AuthenticationFailed):
+            return AnonymousUser()
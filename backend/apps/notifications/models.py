@@ -26,6 +26,14 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.user.username}"
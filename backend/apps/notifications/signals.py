@@ -0,0 +1,43 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.forum.models import Discussion, Reply
+from apps.materials.models import StudyMaterial
+from apps.tutoring.models import TutoringSession
+from . import tasks
+
+
+def enqueue(task, *args):
+    """Queue a notification task once the surrounding transaction commits"""
+    transaction.on_commit(partial(task.delay, *args))
+
+
+@receiver(post_save, sender=TutoringSession)
+def session_saved(sender, instance, created, **kwargs):
+    if created:
+        notification_type = 'session_created'
+    elif instance.status == 'cancelled':
+        notification_type = 'session_cancelled'
+    else:
+        notification_type = 'session_updated'
+    actor_id = instance.actor.pk if instance.actor is not None else None
+    enqueue(tasks.notify_session_event, instance.pk, notification_type, actor_id)
+
+
+@receiver(post_save, sender=StudyMaterial)
+def material_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.notify_new_material, instance.pk)
+
+
+@receiver(post_save, sender=Discussion)
+def discussion_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.notify_new_discussion, instance.pk)
+
+
+@receiver(post_save, sender=Reply)
+def reply_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.collect_reply, instance.discussion_id, instance.pk)
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from functools import lru_cache
+import redis
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from .utils import notify_users
+
+User = get_user_model()
+
+
+def reply_digest_key(discussion_id):
+    return f'notifications:reply_digest:{discussion_id}'
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    return redis.Redis.from_url(settings.NOTIFICATIONS_REDIS_URL)
+
+
+@shared_task
+def notify_session_event(session_id, notification_type, actor_id=None):
+    from apps.tutoring.models import TutoringSession
+
+    session = TutoringSession.objects.select_related('subject').filter(pk=session_id).first()
+    if session is None:
+        return 0
+
+    recipients = {session.tutor_id, session.student_id} - {None, actor_id, session.cancelled_by_id}
+    messages = {
+        'session_created': f'{session.title} on {session.date} at {session.time}',
+        'session_updated': f'{session.title} is now {session.get_status_display().lower()}',
+        'session_cancelled': f'{session.title} on {session.date} was cancelled',
+    }
+    return notify_users(
+        recipients,
+        notification_type,
+        session.subject.name,
+        messages[notification_type],
+        link='/sessions'
+    )
+
+
+@shared_task
+def notify_new_material(material_id):
+    from apps.materials.models import StudyMaterial
+
+    material = StudyMaterial.objects.select_related('subject').filter(pk=material_id).first()
+    if material is None:
+        return 0
+
+    audience = User.objects.filter(
+        subjects=material.subject_id, is_active=True
+    ).exclude(pk=material.author_id).values_list('pk', flat=True)
+    return notify_users(
+        audience.iterator(chunk_size=settings.NOTIFICATIONS_BATCH_SIZE),
+        'new_material',
+        f'New material in {material.subject.name}',
+        material.title,
+        link='/materials'
+    )
+
+
+@shared_task
+def notify_new_discussion(discussion_id):
+    from apps.forum.models import Discussion
+
+    discussion = Discussion.objects.select_related('subject').filter(pk=discussion_id).first()
+    if discussion is None or discussion.subject is None:
+        return 0
+
+    audience = User.objects.filter(
+        subjects=discussion.subject_id, is_active=True
+    ).exclude(pk=discussion.author_id).values_list('pk', flat=True)
+    return notify_users(
+        audience.iterator(chunk_size=settings.NOTIFICATIONS_BATCH_SIZE),
+        'new_discussion',
+        f'New discussion in {discussion.subject.name}',
+        discussion.title,
+        link=f'/forum/{discussion.pk}'
+    )
+
+
+@shared_task
+def collect_reply(discussion_id, reply_id):
+    """
+    Add a reply to its discussion's digest window, opening the window on the
+    first one.
+
+    The window is a Redis set of reply ids which flush_reply_digest takes
+    and deletes in one transaction, so a burst of replies becomes one
+    notification per recipient instead of one per reply, and each reply
+    lands in exactly one window whatever order the replies commit in.
+    """
+    window = settings.NOTIFICATIONS_DIGEST_WINDOW
+    key = reply_digest_key(discussion_id)
+    pipe = get_client().pipeline()
+    pipe.sadd(key, reply_id)
+    pipe.scard(key)
+    # Outlives a lost flush only for a while, later replies then open a new window
+    pipe.expire(key, window * 10)
+    added, size, _ = pipe.execute()
+    if added and size == 1:
+        flush_reply_digest.apply_async((discussion_id,), countdown=window)
+
+
+@shared_task
+def flush_reply_digest(discussion_id):
+    from apps.forum.models import Discussion, Reply
+
+    key = reply_digest_key(discussion_id)
+    pipe = get_client().pipeline()
+    pipe.smembers(key)
+    pipe.delete(key)
+    reply_ids, _ = pipe.execute()
+    discussion = Discussion.objects.filter(pk=discussion_id).first()
+    if not reply_ids or discussion is None:
+        return 0
+
+    replies = Reply.objects.filter(
+        discussion_id=discussion_id, pk__in=[int(reply_id) for reply_id in reply_ids]
+    ).values_list('author_id', 'parent__author_id')
+
+    # Discussion author hears about every reply, reply authors about answers to them
+    counts = defaultdict(int)
+    for author_id, parent_author_id in replies:
+        for recipient in {discussion.author_id, parent_author_id} - {None, author_id}:
+            counts[recipient] += 1
+
+    by_count = defaultdict(list)
+    for recipient, count in counts.items():
+        by_count[count].append(recipient)
+
+    created = 0
+    for count, recipients in by_count.items():
+        created += notify_users(
+            recipients,
+            'new_reply',
+            'New reply' if count == 1 else f'{count} new replies',
+            discussion.title,
+            link=f'/forum/{discussion.pk}'
+        )
+    return created
@@ -0,0 +1,40 @@
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.notifications.middleware import JWTAuthMiddleware
+from apps.users.serializers import TOKEN_VERSION_CLAIM
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def token(user, **claims):
+    access = AccessToken.for_user(user)
+    access[TOKEN_VERSION_CLAIM] = user.token_version
+    for name, value in claims.items():
+        access[name] = value
+    return str(access)
+
+
+def socket_user(raw_token):
+    return JWTAuthMiddleware(None).get_user({'query_string': f'token={raw_token}'.encode()})
+
+
+def test_valid_token_resolves_the_user():
+    user = UserFactory()
+    assert socket_user(token(user)).pk == user.pk
+
+
+def test_revoked_token_is_anonymous():
+    user = UserFactory()
+    raw_token = token(user)
+    user.rotate_token_version()
+    assert socket_user(raw_token).is_anonymous
+
+
+def test_inactive_user_is_anonymous():
+    user = UserFactory(is_active=False)
+    assert socket_user(token(user)).is_anonymous
+
+
+def test_bad_token_is_anonymous():
+    assert socket_user('not-a-token').is_anonymous
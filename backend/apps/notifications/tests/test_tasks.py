@@ -0,0 +1,61 @@
+import datetime
+from unittest import mock
+import pytest
+from django.utils import timezone
+from apps.forum.tests.factories import DiscussionFactory, ReplyFactory
+from apps.notifications import tasks
+from apps.notifications.models import Notification
+from apps.tutoring.tests.factories import SessionFactory
+from apps.users.tests.factories import SubjectFactory, TutorFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def scheduled_flush():
+    with mock.patch.object(tasks.flush_reply_digest, 'apply_async') as apply_async:
+        yield apply_async
+
+
+def test_reply_digest_counts_each_reply_once(fake_redis, scheduled_flush):
+    discussion = DiscussionFactory()
+    earlier, later, next_window = ReplyFactory.create_batch(3, discussion=discussion)
+    # The later reply committed first and opened the window
+    tasks.collect_reply(discussion.pk, later.pk)
+    tasks.collect_reply(discussion.pk, earlier.pk)
+    assert scheduled_flush.call_count == 1
+
+    assert tasks.flush_reply_digest(discussion.pk) == 1
+    notification = Notification.objects.get(user=discussion.author)
+    assert notification.title == '2 new replies'
+
+    tasks.collect_reply(discussion.pk, next_window.pk)
+    assert scheduled_flush.call_count == 2
+    assert tasks.flush_reply_digest(discussion.pk) == 1
+    assert Notification.objects.filter(user=discussion.author, title='New reply').count() == 1
+    assert tasks.flush_reply_digest(discussion.pk) == 0
+
+
+def test_session_event_skips_the_actor():
+    session = SessionFactory()
+    tasks.notify_session_event(session.pk, 'session_updated', session.tutor_id)
+    assert list(Notification.objects.values_list('user_id', flat=True)) == [session.student_id]
+
+
+def test_confirming_notifies_only_the_student(auth_client, django_capture_on_commit_callbacks):
+    session = SessionFactory(status='pending')
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client(session.tutor).post(f'/api/sessions/{session.pk}/confirm/')
+    assert response.status_code == 200
+    assert list(Notification.objects.values_list('user_id', flat=True)) == [session.student_id]
+
+
+def test_booking_notifies_only_the_tutor(auth_client, django_capture_on_commit_callbacks):
+    tutor, student, subject = TutorFactory(), UserFactory(), SubjectFactory()
+    date = timezone.localdate() + datetime.timedelta(days=1)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client(student).post('/api/sessions/', {
+            'tutor': tutor.pk, 'subject': subject.pk, 'date': date, 'time': '14:00',
+        })
+    assert response.status_code == 201, response.data
+    assert list(Notification.objects.values_list('user_id', flat=True)) == [tutor.pk]
@@ -0,0 +1,19 @@
+import pytest
+from apps.notifications.models import Notification
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('body', [[1, 2], {'ids': []}, {'ids': 'all'}, {'ids': ['x']}, {}])
+def test_mark_read_rejects_malformed_bodies(auth_client, body):
+    response = auth_client(UserFactory()).post('/api/notifications/mark-read/', body, format='json')
+    assert response.status_code == 400
+
+
+def test_mark_read(auth_client):
+    user = UserFactory()
+    notification = Notification.objects.create(user=user, notification_type='new_reply', title='New reply')
+    response = auth_client(user).post('/api/notifications/mark-read/', {'ids': [notification.pk]}, format='json')
+    assert response.status_code == 200
+    assert response.data == {'updated': 1, 'unread_count': 0}
@@ -1,7 +1,140 @@
+import asyncio
+from collections import Counter
+from itertools import islice
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
 from .models import Notification
 
+UNREAD_COUNT_TIMEOUT = 60 * 60 * 24
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user_id):
+    """Unread notifications for a user, cached in Redis and recomputed on a miss"""
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """
+    Apply a change to a cached counter and return the new value.
+
+    A missing key is left missing (the next get_unread_count() recomputes it)
+    rather than being created with a partial value.
+    """
+    key = unread_count_key(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return get_unread_count(user_id)
+    if count < 0:
+        cache.delete(key)
+        return get_unread_count(user_id)
+    return count
+
+
+def serialize_notification(notification):
+    return {
+        'id': notification.id,
+        'type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'link': notification.link,
+        'created_at': notification.created_at.isoformat()
+    }
+
+
+async def _group_send_all(channel_layer, messages):
+    """Send (user_id, message) pairs to user groups, a bounded number at a time"""
+    limit = asyncio.Semaphore(settings.NOTIFICATIONS_FANOUT_CONCURRENCY)
+
+    async def push(user_id, message):
+        async with limit:
+            await channel_layer.group_send(f'notifications_{user_id}', message)
+
+    await asyncio.gather(*(push(user_id, message) for user_id, message in messages))
+
+
+def send_to_users(messages):
+    channel_layer = get_channel_layer()
+    if channel_layer is not None and messages:
+        async_to_sync(_group_send_all)(channel_layer, messages)
+
+
+def push_notifications(notifications):
+    """Bump each recipient's unread counter once and deliver the notifications"""
+    unread = {
+        user_id: adjust_unread_count(user_id, delta)
+        for user_id, delta in Counter(n.user_id for n in notifications).items()
+    }
+    send_to_users([
+        (notification.user_id, {
+            'type': 'notification_message',
+            'notification': serialize_notification(notification),
+            'unread_count': unread[notification.user_id],
+        })
+        for notification in notifications
+    ])
+
+
+def mark_read(user_id, ids=None):
+    """
+    Mark a user's notifications read in one UPDATE (all of them if ``ids`` is None).
+
+    Updates the cached unread counter and pushes the new value to the user's
+    sockets. Returns (rows updated, unread count).
+    """
+    notifications = Notification.objects.filter(user_id=user_id, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+    updated = notifications.update(is_read=True)
+
+    if ids is None:
+        # Recount rather than assume zero in case notifications arrived meanwhile
+        cache.delete(unread_count_key(user_id))
+        count = get_unread_count(user_id)
+    else:
+        count = adjust_unread_count(user_id, -updated) if updated else get_unread_count(user_id)
+
+    if updated:
+        send_to_users([(user_id, {'type': 'unread_count', 'count': count})])
+    return updated, count
+
+
+def notify_users(user_ids, notification_type, title, message, link=''):
+    """
+    Create one notification per user id and push them over the channel layer.
+
+    Rows are written with bulk_create in NOTIFICATIONS_BATCH_SIZE chunks so a
+    large audience never holds more than one batch in memory. Meant to run in
+    a worker (see apps.notifications.tasks), not in the request path.
+    """
+    user_ids = iter(user_ids)
+    created = 0
+    while batch := list(islice(user_ids, settings.NOTIFICATIONS_BATCH_SIZE)):
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                link=link
+            )
+            for user_id in batch
+        ])
+        push_notifications(notifications)
+        created += len(notifications)
+    return created
+
 
 def send_notification(user, notification_type, title, message, link=''):
     notification = Notification.objects.create(
@@ -11,21 +144,5 @@ def send_notification(user, notification_type, title, message, link=''):
         message=message,
         link=link
     )
-
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f'notifications_{user.id}',
-        {
-            'type': 'notification_message',
-            'notification': {
-                'id': notification.id,
-                'type': notification_type,
-                'title': title,
-                'message': message,
-                'link': link,
-                'created_at': notification.created_at.isoformat()
-            }
-        }
-    )
-
+    push_notifications([notification])
     return notification
@@ -0,0 +1,54 @@
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.pagination import KeysetPagination
+from . import metrics
+from .models import Notification
+from .serializers import MarkReadSerializer, NotificationSerializer
+from .utils import get_unread_count, mark_read
+
+
+class NotificationListView(generics.ListAPIView):
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['is_read', 'notification_type']
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+
+
+class UnreadCountView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': get_unread_count(request.user.id)})
+
+
+class MarkReadView(APIView):
+    """Mark the notifications listed in ``ids`` as read"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, unread_count = mark_read(request.user.id, serializer.validated_data['ids'])
+        return Response({'updated': updated, 'unread_count': unread_count})
+
+
+class MarkAllReadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        updated, unread_count = mark_read(request.user.id)
+        return Response({'updated': updated, 'unread_count': unread_count})
+
+
+class ConnectionStatsView(APIView):
+    """WebSocket connection counters of the process serving this request"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
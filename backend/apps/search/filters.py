@@ -0,0 +1,72 @@
+import re
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+TERM_RE = re.compile(r'\w+')
+
+
+def build_search_query(text):
+    """
+    Turn free text into a prefix-matching tsquery ("calc fund" -> calc:* & fund:*).
+
+    Only word characters are kept, so user input can never produce a
+    malformed raw tsquery. Returns None when there is nothing to search for.
+    """
+    terms = TERM_RE.findall(text or '')[:settings.SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        search_type='raw',
+        config=settings.SEARCH_CONFIG
+    )
+
+
+def search_queryset(queryset, query, vector, headline_field=None):
+    """
+    Filter ``queryset`` to rows matching ``query``, ranked best first.
+
+    ``vector`` is either the name of a stored SearchVectorField (served by its
+    GIN index) or a SearchVector expression computed on the fly.
+    """
+    if isinstance(vector, str):
+        vector = F(vector)
+    queryset = queryset.annotate(
+        search_document=vector,
+        search_rank=SearchRank(vector, query)
+    ).filter(search_document=query)
+    if headline_field:
+        queryset = queryset.annotate(search_headline=SearchHeadline(
+            headline_field,
+            query,
+            config=settings.SEARCH_CONFIG,
+            start_sel='<mark>',
+            stop_sel='</mark>',
+            max_words=35,
+            min_words=15
+        ))
+    return queryset.order_by('-search_rank', '-pk')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for DRF's SearchFilter using Postgres full-text search.
+
+    Reads the same ``?search=`` parameter. Views declare ``search_vector_field``
+    and optionally ``search_headline_field`` for highlighted snippets.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = build_search_query(request.query_params.get(self.search_param, ''))
+        if query is None:
+            return queryset
+        return search_queryset(
+            queryset,
+            query,
+            view.search_vector_field,
+            getattr(view, 'search_headline_field', None)
+        )
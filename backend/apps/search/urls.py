@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import UnifiedSearchView
+
+urlpatterns = [
+    path('', UnifiedSearchView.as_view(), name='search'),
+]
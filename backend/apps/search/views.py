@@ -0,0 +1,63 @@
+from django.contrib.postgres.search import SearchVector
+from django.conf import settings
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.forum.models import Discussion
+from apps.materials.models import StudyMaterial
+from apps.tutoring.models import TutoringSession
+from apps.users.models import User
+from .filters import build_search_query, search_queryset
+
+
+class UnifiedSearchView(APIView):
+    """Search sessions, materials, discussions and tutors in one request"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_sources(self):
+        """(result key, queryset, vector, headline field, title field) for each searched type"""
+        config = settings.SEARCH_CONFIG
+        return [
+            (
+                'sessions',
+                TutoringSession.objects.all(),
+                SearchVector('title', weight='A', config=config)
+                + SearchVector('notes', weight='B', config=config),
+                'notes',
+                'title',
+            ),
+            ('materials', StudyMaterial.objects.all(), 'search_vector', 'description', 'title'),
+            ('discussions', Discussion.objects.all(), 'search_vector', 'content', 'title'),
+            (
+                'tutors',
+                User.objects.filter(role='tutor', is_active=True),
+                SearchVector('username', 'first_name', 'last_name', weight='A', config=config)
+                + SearchVector('bio', weight='B', config=config),
+                'bio',
+                'username',
+            ),
+        ]
+
+    def get(self, request):
+        query = build_search_query(request.query_params.get('q', ''))
+        if query is None:
+            return Response({key: [] for key, *_ in self.get_sources()})
+
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), settings.SEARCH_MAX_RESULTS) if limit.isdigit() else 5
+
+        results = {}
+        for key, queryset, vector, headline_field, title_field in self.get_sources():
+            rows = search_queryset(queryset, query, vector, headline_field).values(
+                'id', title_field, 'search_headline', 'search_rank'
+            )[:limit]
+            results[key] = [
+                {
+                    'id': row['id'],
+                    'title': row[title_field],
+                    'headline': row['search_headline'],
+                    'rank': row['search_rank'],
+                }
+                for row in rows
+            ]
+        return Response(results)
@@ -8,6 +8,7 @@ class SupportQueryCreateView(generics.CreateAPIView):
     queryset = SupportQuery.objects.all()
     serializer_class = SupportQuerySerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'support'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
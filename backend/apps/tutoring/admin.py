@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TutoringSession, SessionReview
+from .models import TutoringSession, SessionReview, TutorAvailability, TutorStats
 
 
 @admin.register(TutoringSession)
@@ -22,3 +22,21 @@ class SessionReviewAdmin(admin.ModelAdmin):
     search_fields = ['session__title', 'reviewer__username', 'comment']
     raw_id_fields = ['session', 'reviewer']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(TutorAvailability)
+class TutorAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ['tutor', 'weekday', 'start_time', 'end_time']
+    list_filter = ['weekday']
+    raw_id_fields = ['tutor']
+
+
+@admin.register(TutorStats)
+class TutorStatsAdmin(admin.ModelAdmin):
+    list_display = ['tutor', 'rating_avg', 'review_count', 'completed_sessions', 'updated_at']
+    search_fields = ['tutor__username']
+    raw_id_fields = ['tutor']
+    readonly_fields = [
+        'review_count', 'rating_sum', 'rating_avg', 'rating_1', 'rating_2',
+        'rating_3', 'rating_4', 'rating_5', 'completed_sessions', 'updated_at'
+    ]
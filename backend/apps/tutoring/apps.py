@@ -5,3 +5,6 @@ class TutoringConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tutoring'
     verbose_name = 'Tutoring Sessions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,63 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import ACTIVE_STATUSES, TutorAvailability, TutoringSession
+
+# Free time = (weekly windows expanded over the requested days, clipped to
+# [now, end)) minus the tutor's active session ranges. The range arithmetic is
+# done with Postgres multiranges; booked ranges are read through the GiST
+# index behind the session_no_tutor_overlap exclusion constraint.
+FREE_SLOTS_SQL = f"""
+WITH windows AS (
+    SELECT tstzrange(
+        (day::date + w.start_time) AT TIME ZONE %(tz)s,
+        (day::date + w.end_time) AT TIME ZONE %(tz)s
+    ) AS slot
+    FROM generate_series(%(from_date)s::date, %(to_date)s::date, interval '1 day') AS day
+    JOIN {TutorAvailability._meta.db_table} w
+        ON w.weekday = EXTRACT(ISODOW FROM day) - 1
+    WHERE w.tutor_id = %(tutor)s AND w.end_time > w.start_time
+),
+booked AS (
+    SELECT s.time_range AS slot
+    FROM {TutoringSession._meta.db_table} s
+    WHERE s.tutor_id = %(tutor)s
+        AND s.status = ANY(%(active)s)
+        AND s.time_range && tstzrange(%(start)s, %(end)s)
+)
+SELECT lower(free), upper(free)
+FROM unnest(
+    (
+        COALESCE((SELECT range_agg(slot) FROM windows), '{{}}'::tstzmultirange)
+        -- Empty, not an error, when the whole window is in the past
+        * tstzmultirange(tstzrange(LEAST(GREATEST(%(start)s, now()), %(end)s), %(end)s))
+    )
+    - COALESCE((SELECT range_agg(slot) FROM booked), '{{}}'::tstzmultirange)
+) AS free
+WHERE upper(free) - lower(free) >= %(min_duration)s
+ORDER BY lower(free)
+"""
+
+
+def free_slots(tutor_id, from_date, to_date, min_duration=0):
+    """
+    Free intervals in a tutor's weekly availability between two dates (inclusive).
+
+    Returns a list of (start, end) aware datetimes, each at least
+    ``min_duration`` minutes long.
+    """
+    start = timezone.make_aware(datetime.combine(from_date, time.min))
+    end = timezone.make_aware(datetime.combine(to_date + timedelta(days=1), time.min))
+    with connection.cursor() as cursor:
+        cursor.execute(FREE_SLOTS_SQL, {
+            'tz': settings.TIME_ZONE,
+            'tutor': tutor_id,
+            'from_date': from_date,
+            'to_date': to_date,
+            'start': start,
+            'end': end,
+            'active': ACTIVE_STATUSES,
+            'min_duration': timedelta(minutes=min_duration),
+        })
+        return cursor.fetchall()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.tutoring.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized tutor rating and session stats from reviews and sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tutor_ids', nargs='*', type=int, help='Only these tutors (default: all)')
+
+    def handle(self, *args, **options):
+        drifted = reconcile(options['tutor_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Rewrote stats for {drifted} tutors'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0002_tutoringsession_cancellation_reason_and_more'),
+        ('users', '0002_alter_user_managers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(fields=['date', 'time', 'id'], name='session_date_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0003_keyset_pagination_indexes'),
+        ('users', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'scheduled'])), fields=['date', 'time'], name='session_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'scheduled'])), fields=['tutor', 'date', 'time'], name='session_tutor_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tutoringsession',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['-date'], name='session_completed_date_idx'),
+        ),
+    ]
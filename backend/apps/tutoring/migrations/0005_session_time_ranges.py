@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:48
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+def backfill_time_ranges(apps, schema_editor):
+    schema_editor.execute(
+        "UPDATE tutoring_tutoringsession SET time_range = tstzrange("
+        "(date + time) AT TIME ZONE %s, "
+        "(date + time) AT TIME ZONE %s + duration * interval '1 minute')",
+        [settings.TIME_ZONE, settings.TIME_ZONE]
+    )
+
+
+def cancel_overlapping_sessions(apps, schema_editor):
+    """
+    Active sessions of a tutor that overlap only had to differ in start time
+    before the exclusion constraint. Keep the earliest booked of each
+    overlapping group and cancel the rest, so the constraint can be added.
+    """
+    TutoringSession = apps.get_model('tutoring', 'TutoringSession')
+    active = ['pending', 'scheduled']
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT DISTINCT a.tutor_id FROM tutoring_tutoringsession a '
+            'JOIN tutoring_tutoringsession b ON a.tutor_id = b.tutor_id AND a.id < b.id '
+            'AND a.time_range && b.time_range '
+            'WHERE a.status = ANY(%s) AND b.status = ANY(%s)',
+            [active, active]
+        )
+        tutor_ids = [row[0] for row in cursor.fetchall()]
+    for tutor_id in tutor_ids:
+        kept, cancelled = [], []
+        sessions = TutoringSession.objects.filter(tutor_id=tutor_id, status__in=active).order_by('created_at', 'id')
+        for session in sessions:
+            span = session.time_range
+            if any(span.lower < other.upper and other.lower < span.upper for other in kept):
+                cancelled.append(session.pk)
+            else:
+                kept.append(span)
+        TutoringSession.objects.filter(pk__in=cancelled).update(
+            status='cancelled',
+            cancellation_reason='Cancelled automatically: overlapped an earlier booking of the tutor',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0004_session_hot_filter_indexes'),
+        ('users', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.CreateModel(
+            name='TutorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Tutor availability',
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='tutoringsession',
+            name='session_tutor_active_idx',
+        ),
+        migrations.AddField(
+            model_name='tutoringsession',
+            name='time_range',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_time_ranges, migrations.RunPython.noop),
+        migrations.RunPython(cancel_overlapping_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tutoringsession',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'scheduled'])), expressions=[('tutor', '='), ('time_range', '&&')], name='session_no_tutor_overlap'),
+        ),
+        migrations.AddField(
+            model_name='tutoravailability',
+            name='tutor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
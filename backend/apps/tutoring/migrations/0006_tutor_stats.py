@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_tutor_stats(apps, schema_editor):
+    SessionReview = apps.get_model('tutoring', 'SessionReview')
+    TutoringSession = apps.get_model('tutoring', 'TutoringSession')
+    TutorStats = apps.get_model('tutoring', 'TutorStats')
+
+    stats = {}
+    reviews = SessionReview.objects.order_by().values('session__tutor').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)}
+    )
+    for row in reviews:
+        row['rating_avg'] = row['rating_sum'] / row['review_count']
+        stats[row.pop('session__tutor')] = row
+    completed = TutoringSession.objects.filter(status='completed').order_by().values('tutor')
+    for row in completed.annotate(completed_sessions=Count('id')):
+        stats.setdefault(row['tutor'], {})['completed_sessions'] = row['completed_sessions']
+
+    TutorStats.objects.bulk_create(
+        [TutorStats(tutor_id=tutor_id, **values) for tutor_id, values in stats.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutoring', '0005_session_time_ranges'),
+        ('users', '0004_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorStats',
+            fields=[
+                ('tutor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tutor_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_avg', models.FloatField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('completed_sessions', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Tutor stats',
+                'indexes': [models.Index(fields=['-rating_avg', '-review_count'], name='tutorstats_rating_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_tutor_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,36 @@
+from datetime import datetime, timedelta
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
 from django.db import models
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q
 from django.conf import settings
+from django.utils import timezone
+
+# Sessions that still occupy the tutor's calendar
+ACTIVE_STATUSES = ['pending', 'scheduled']
+
+
+class TutoringSessionQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """
+        Sessions where ``user`` is the tutor or the student.
+
+        Written as ``id IN (... UNION ...)`` rather than ``tutor = x OR student = y``
+        so Postgres can answer each branch from its own foreign key index.
+        """
+        tutor_sessions = TutoringSession.objects.filter(tutor=user).order_by().values('pk')
+        student_sessions = TutoringSession.objects.filter(student=user).order_by().values('pk')
+        return self.filter(pk__in=tutor_sessions.union(student_sessions))
+
+    def with_details(self):
+        """Load everything TutoringSessionSerializer renders in a fixed number of queries"""
+        return self.select_related(
+            'tutor', 'student', 'subject', 'cancelled_by', 'review__reviewer'
+        ).prefetch_related(
+            'tutor__subjects', 'student__subjects',
+            'cancelled_by__subjects', 'review__reviewer__subjects'
+        )
 
 
 class TutoringSession(models.Model):
@@ -9,6 +40,7 @@ class TutoringSession(models.Model):
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     ]
+    ACTIVE_STATUSES = ACTIVE_STATUSES
 
     tutor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -51,16 +83,105 @@ class TutoringSession(models.Model):
     
     # Group session support
     max_students = models.PositiveIntegerField(default=1)
+
+    # [start, start + duration) derived from date/time/duration in save()
+    time_range = DateTimeRangeField(null=True, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TutoringSessionQuerySet.as_manager()
+
     class Meta:
         ordering = ['date', 'time']
+        indexes = [
+            models.Index(fields=['date', 'time', 'id'], name='session_date_time_id_idx'),
+            # Upcoming sessions: date >= today among active sessions
+            models.Index(
+                fields=['date', 'time'],
+                condition=Q(status__in=ACTIVE_STATUSES),
+                name='session_active_date_idx'
+            ),
+            # Completed sessions, newest first
+            models.Index(
+                fields=['-date'],
+                condition=Q(status='completed'),
+                name='session_completed_date_idx'
+            ),
+        ]
+        constraints = [
+            # A tutor can't have two active sessions whose time ranges overlap.
+            # The backing GiST index also serves the availability queries.
+            ExclusionConstraint(
+                name='session_no_tutor_overlap',
+                expressions=[
+                    ('tutor', RangeOperators.EQUAL),
+                    ('time_range', RangeOperators.OVERLAPS),
+                ],
+                condition=Q(status__in=ACTIVE_STATUSES),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.subject.name} - {self.tutor.username} - {self.date}"
 
+    def save(self, *args, **kwargs):
+        self.time_range = self.build_time_range(self.date, self.time, self.duration)
+        super().save(*args, **kwargs)
+
+    @property
+    def actor(self):
+        """User whose request saves the session; not stored, notifications skip them"""
+        return getattr(self, '_actor', None)
+
+    @actor.setter
+    def actor(self, user):
+        self._actor = user
+
+    @classmethod
+    def build_time_range(cls, date, time, duration):
+        """Half-open range covered by a session starting at date/time (in TIME_ZONE)"""
+        date = cls._meta.get_field('date').to_python(date)
+        time = cls._meta.get_field('time').to_python(time)
+        start = timezone.make_aware(datetime.combine(date, time))
+        return DateTimeTZRange(start, start + timedelta(minutes=duration))
+
+
+class TutorAvailability(models.Model):
+    """Weekly recurring window in which a tutor accepts bookings"""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    tutor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='availability_windows'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        verbose_name_plural = 'Tutor availability'
+
+    def __str__(self):
+        return f"{self.tutor.username} - {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+class SessionReviewQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load everything SessionReviewSerializer renders in a fixed number of queries"""
+        return self.select_related('reviewer').prefetch_related('reviewer__subjects')
+
 
 class SessionReview(models.Model):
     """Reviews for completed tutoring sessions"""
@@ -82,8 +203,51 @@ class SessionReview(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SessionReviewQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
 
     def __str__(self):
         return f"Review for {self.session} - {self.rating}/5"
+
+
+class TutorStats(models.Model):
+    """
+    Materialized review and session aggregates for one tutor.
+
+    Kept current by apps.tutoring.signals with single-statement F() updates
+    and recomputed from scratch by ``reconcile_tutor_stats``.
+    """
+    RATINGS = range(1, 6)
+
+    tutor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='tutor_stats'
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    # Histogram of review ratings
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    completed_sessions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Tutor stats'
+        indexes = [
+            models.Index(fields=['-rating_avg', '-review_count'], name='tutorstats_rating_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tutor_id}: {self.rating_avg:.2f} ({self.review_count} reviews)"
+
+    @property
+    def rating_histogram(self):
+        return {rating: getattr(self, f'rating_{rating}') for rating in self.RATINGS}
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import TutoringSession, SessionReview
+from .models import TutoringSession, SessionReview, TutorAvailability
 from apps.users.serializers import UserSerializer, SubjectSerializer
 from apps.users.models import Subject, User
 from django.utils import timezone
@@ -25,6 +25,20 @@ class SessionReviewSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class TutorAvailabilitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TutorAvailability
+        fields = ['id', 'tutor', 'weekday', 'start_time', 'end_time', 'created_at']
+        read_only_fields = ['id', 'tutor', 'created_at']
+
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and end_time <= start_time:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time'})
+        return attrs
+
+
 class TutoringSessionSerializer(serializers.ModelSerializer):
     tutor_detail = UserSerializer(source='tutor', read_only=True)
     student_detail = UserSerializer(source='student', read_only=True)
@@ -88,25 +102,6 @@ class TutoringSessionSerializer(serializers.ModelSerializer):
                             {'tutor': 'Please select a tutor'}
                         )
             
-            # Check if tutor has overlapping sessions
-            # Use provided tutor or current user if tutor
-            tutor = attrs.get('tutor') or (user if user and user.role == 'tutor' else None)
-            date = attrs.get('date')
-            time = attrs.get('time')
-            
-            if date and time and tutor:
-                # Check for conflicts
-                overlapping = TutoringSession.objects.filter(
-                    tutor=tutor,
-                    date=date,
-                    time=time,
-                    status__in=['pending', 'scheduled']
-                ).exists()
-                
-                if overlapping:
-                    raise serializers.ValidationError(
-                        'Tutor already has a session at this time'
-                    )
         else:  # Update
             # Validate status transitions
             if 'status' in attrs:
@@ -122,5 +117,41 @@ class TutoringSessionSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(
                         'Cannot change status of a completed session'
                     )
-        
+
+        self.validate_no_overlap(attrs, user)
         return attrs
+
+    def validate_no_overlap(self, attrs, user):
+        """
+        Reject sessions overlapping another active session of the same tutor.
+
+        The session_no_tutor_overlap exclusion constraint enforces the same rule
+        in the database for concurrent bookings; this check gives a friendly
+        error in the common case.
+        """
+        instance = self.instance
+        if instance is not None and not {'tutor', 'date', 'time', 'duration', 'status'} & attrs.keys():
+            return
+
+        def value(name, default=None):
+            return attrs.get(name, getattr(instance, name, default))
+
+        # Use provided tutor or current user if tutor
+        tutor = value('tutor') or (user if user and user.role == 'tutor' else None)
+        date = value('date')
+        time = value('time')
+        duration = value('duration', 60)
+        if not (tutor and date and time) or value('status', 'pending') not in TutoringSession.ACTIVE_STATUSES:
+            return
+
+        overlapping = TutoringSession.objects.filter(
+            tutor=tutor,
+            status__in=TutoringSession.ACTIVE_STATUSES,
+            time_range__overlap=TutoringSession.build_time_range(date, time, duration)
+        )
+        if instance is not None:
+            overlapping = overlapping.exclude(pk=instance.pk)
+        if overlapping.exists():
+            raise serializers.ValidationError(
+                'Tutor already has a session at this time'
+            )
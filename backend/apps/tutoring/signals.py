@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import SessionReview, TutoringSession
+from .stats import apply_completed_change, apply_review_change
+
+
+def _previous(sender, instance, *fields):
+    if instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+@receiver(pre_save, sender=SessionReview)
+def remember_review(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._stats_previous = _previous(sender, instance, 'session__tutor', 'rating')
+
+
+@receiver(post_save, sender=SessionReview)
+def review_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_stats_previous', None)
+    tutor_id = instance.session.tutor_id
+    if old is not None and old[0] == tutor_id:
+        apply_review_change(tutor_id, old[1], instance.rating)
+        return
+    if old is not None:
+        apply_review_change(old[0], old_rating=old[1])
+    apply_review_change(tutor_id, new_rating=instance.rating)
+
+
+@receiver(post_delete, sender=SessionReview)
+def review_deleted(sender, instance, **kwargs):
+    tutor_id = TutoringSession.objects.filter(pk=instance.session_id).values_list('tutor', flat=True).first()
+    if tutor_id is not None:
+        apply_review_change(tutor_id, old_rating=instance.rating)
+
+
+@receiver(pre_save, sender=TutoringSession)
+def remember_session(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._stats_previous = _previous(sender, instance, 'tutor', 'status')
+
+
+@receiver(post_save, sender=TutoringSession)
+def session_saved(sender, instance, raw=False, **kwargs):
+    # Reviews stay with the tutor they were counted for if a session is
+    # reassigned; reconcile_tutor_stats moves them
+    if raw:
+        return
+    old = getattr(instance, '_stats_previous', None)
+    was_completed = old is not None and old[1] == 'completed'
+    now_completed = instance.status == 'completed'
+    if was_completed and now_completed and old[0] == instance.tutor_id:
+        return
+    if was_completed:
+        apply_completed_change(old[0], -1)
+    if now_completed:
+        apply_completed_change(instance.tutor_id, 1)
+
+
+@receiver(post_delete, sender=TutoringSession)
+def session_deleted(sender, instance, **kwargs):
+    if instance.status == 'completed':
+        apply_completed_change(instance.tutor_id, -1)
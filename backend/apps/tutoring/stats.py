@@ -0,0 +1,118 @@
+"""
+Per-tutor review and session aggregates (TutorStats).
+
+Signals apply every change as one UPDATE whose right-hand side only reads
+the row's current values, so concurrent reviews of the same tutor never
+lose an increment. ``reconcile`` recomputes the rows from the source
+tables and repairs any drift.
+"""
+import math
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from apps.core.signals import invalidate
+from .models import SessionReview, TutoringSession, TutorStats
+
+COUNTER_FIELDS = [
+    'review_count', 'rating_sum',
+    *[f'rating_{rating}' for rating in TutorStats.RATINGS],
+    'completed_sessions',
+]
+
+
+def _ensure(tutor_id):
+    TutorStats.objects.bulk_create([TutorStats(tutor_id=tutor_id)], ignore_conflicts=True)
+
+
+def _update(tutor_id, **changes):
+    TutorStats.objects.filter(pk=tutor_id).update(updated_at=timezone.now(), **changes)
+    # Queryset updates send no signals, so invalidate cached responses here
+    invalidate(TutorStats)
+
+
+def apply_review_change(tutor_id, old_rating=None, new_rating=None):
+    """Replace one review rated ``old_rating`` with ``new_rating`` (None: no review)"""
+    if old_rating == new_rating:
+        return
+    count = (new_rating is not None) - (old_rating is not None)
+    total = (new_rating or 0) - (old_rating or 0)
+    changes = {
+        'review_count': F('review_count') + count,
+        'rating_sum': F('rating_sum') + total,
+        'rating_avg': Coalesce(
+            Cast(F('rating_sum') + total, FloatField()) / NullIf(F('review_count') + count, 0),
+            0.0
+        ),
+    }
+    if old_rating is not None:
+        changes[f'rating_{old_rating}'] = F(f'rating_{old_rating}') - 1
+    if new_rating is not None:
+        changes[f'rating_{new_rating}'] = F(f'rating_{new_rating}') + 1
+        _ensure(tutor_id)
+    _update(tutor_id, **changes)
+
+
+def apply_completed_change(tutor_id, delta):
+    if delta > 0:
+        _ensure(tutor_id)
+    _update(tutor_id, completed_sessions=F('completed_sessions') + delta)
+
+
+def compute(tutor_ids=None):
+    """Aggregates from the source tables: {tutor_id: {field: value}}"""
+    reviews = SessionReview.objects.order_by()
+    sessions = TutoringSession.objects.filter(status='completed').order_by()
+    if tutor_ids is not None:
+        reviews = reviews.filter(session__tutor__in=tutor_ids)
+        sessions = sessions.filter(tutor__in=tutor_ids)
+
+    stats = {}
+    for row in reviews.values('session__tutor').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in TutorStats.RATINGS}
+    ):
+        stats[row.pop('session__tutor')] = row
+    for row in sessions.values('tutor').annotate(completed_sessions=Count('id')):
+        stats.setdefault(row['tutor'], {})['completed_sessions'] = row['completed_sessions']
+
+    for values in stats.values():
+        for field in COUNTER_FIELDS:
+            values.setdefault(field, 0)
+        values['rating_avg'] = values['rating_sum'] / values['review_count'] if values['review_count'] else 0.0
+    return stats
+
+
+def _differs(row, values):
+    return (
+        any(getattr(row, field) != values[field] for field in COUNTER_FIELDS)
+        or not math.isclose(row.rating_avg, values['rating_avg'])
+    )
+
+
+def reconcile(tutor_ids=None):
+    """Rewrite every TutorStats row that disagrees with the source tables; returns how many"""
+    expected = compute(tutor_ids)
+    existing = TutorStats.objects.all()
+    if tutor_ids is not None:
+        existing = existing.filter(pk__in=tutor_ids)
+    existing = {row.pk: row for row in existing}
+
+    empty = dict.fromkeys(COUNTER_FIELDS, 0) | {'rating_avg': 0.0}
+    drifted = []
+    for tutor_id in expected.keys() | existing.keys():
+        values = expected.get(tutor_id, empty)
+        row = existing.get(tutor_id)
+        if row is None or _differs(row, values):
+            drifted.append(TutorStats(tutor_id=tutor_id, **values))
+
+    if drifted:
+        TutorStats.objects.bulk_create(
+            drifted,
+            update_conflicts=True,
+            unique_fields=['tutor'],
+            update_fields=[*COUNTER_FIELDS, 'rating_avg', 'updated_at'],
+            batch_size=1000
+        )
+        invalidate(TutorStats)
+    return len(drifted)
@@ -0,0 +1,13 @@
+import logging
+from celery import shared_task
+from .stats import reconcile
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_tutor_stats():
+    drifted = reconcile()
+    if drifted:
+        logger.warning('Repaired drifted stats for %d tutors', drifted)
+    return drifted
@@ -0,0 +1,27 @@
+import datetime
+import factory
+from django.utils import timezone
+from apps.tutoring.models import SessionReview, TutoringSession
+from apps.users.tests.factories import SubjectFactory, TutorFactory, UserFactory
+
+
+class SessionFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = TutoringSession
+
+    tutor = factory.SubFactory(TutorFactory)
+    student = factory.SubFactory(UserFactory)
+    subject = factory.SubFactory(SubjectFactory)
+    # One session per day keeps a tutor's sessions from overlapping
+    date = factory.Sequence(lambda n: timezone.localdate() + datetime.timedelta(days=n + 1))
+    time = datetime.time(14)
+    status = 'scheduled'
+
+
+class ReviewFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = SessionReview
+
+    session = factory.SubFactory(SessionFactory, status='completed')
+    reviewer = factory.SelfAttribute('session.student')
+    rating = 5
@@ -0,0 +1,96 @@
+import datetime
+from importlib import import_module
+from unittest import mock
+import pytest
+from django.apps import apps
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from rest_framework import serializers
+from apps.tutoring.models import TutorAvailability, TutoringSession
+from apps.tutoring.tests.factories import SessionFactory
+from apps.tutoring.views import save_session
+from apps.users.tests.factories import TutorFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+time_ranges = import_module('apps.tutoring.migrations.0005_session_time_ranges')
+
+
+def integrity_error(constraint_name):
+    cause = Exception('violation')
+    cause.diag = mock.Mock(constraint_name=constraint_name)
+    error = IntegrityError('violation')
+    error.__cause__ = cause
+    return error
+
+
+@pytest.mark.parametrize('params', [
+    {'from': '2024-02-30'},
+    {'from': '2024-03-01', 'to': '2024-13-01'},
+    {'from': 'tomorrow'},
+])
+def test_availability_rejects_invalid_dates(auth_client, params):
+    tutor = TutorFactory()
+    response = auth_client(UserFactory()).get('/api/sessions/availability/', {'tutor': tutor.pk, **params})
+    assert response.status_code == 400
+
+
+def test_availability_caps_the_span(auth_client):
+    tutor = TutorFactory()
+    response = auth_client(UserFactory()).get(
+        '/api/sessions/availability/', {'tutor': tutor.pk, 'from': '2024-01-01', 'to': '2024-12-31'}
+    )
+    assert response.status_code == 400
+
+
+def test_availability_of_a_past_range_is_empty(auth_client):
+    tutor = TutorFactory()
+    for weekday in range(7):
+        TutorAvailability.objects.create(
+            tutor=tutor, weekday=weekday, start_time=datetime.time(9), end_time=datetime.time(17)
+        )
+    response = auth_client(UserFactory()).get(
+        '/api/sessions/availability/', {'tutor': tutor.pk, 'from': '2020-01-01', 'to': '2020-01-05'}
+    )
+    assert response.status_code == 200
+    assert response.data['slots'] == []
+
+    tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+    response = auth_client(UserFactory()).get(
+        '/api/sessions/availability/', {'tutor': tutor.pk, 'from': tomorrow, 'to': tomorrow}
+    )
+    assert len(response.data['slots']) == 1
+
+
+def test_save_session_maps_overlap_violation():
+    serializer = mock.Mock(save=mock.Mock(side_effect=integrity_error('session_no_tutor_overlap')))
+    with pytest.raises(serializers.ValidationError):
+        save_session(serializer)
+
+
+def test_save_session_reraises_other_integrity_errors():
+    error = integrity_error('tutoring_tutoringsession_student_id_fkey')
+    serializer = mock.Mock(save=mock.Mock(side_effect=error))
+    with pytest.raises(IntegrityError) as raised:
+        save_session(serializer)
+    assert raised.value is error
+
+
+def test_migration_cancels_overlapping_sessions():
+    # Recreate the state the constraint is added to
+    with connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE tutoring_tutoringsession DROP CONSTRAINT IF EXISTS session_no_tutor_overlap')
+    tutor = TutorFactory()
+    date = datetime.date.today() + datetime.timedelta(days=3)
+    first = SessionFactory(tutor=tutor, date=date, time=datetime.time(14), duration=60)
+    overlapping = SessionFactory(tutor=tutor, date=date, time=datetime.time(14, 30), duration=60, status='pending')
+    adjacent = SessionFactory(tutor=tutor, date=date, time=datetime.time(15), duration=60)
+    other_tutor = SessionFactory(date=date, time=datetime.time(14), duration=60)
+
+    time_ranges.cancel_overlapping_sessions(apps, connection.schema_editor())
+
+    statuses = dict(TutoringSession.objects.values_list('pk', 'status'))
+    assert statuses[first.pk] == 'scheduled'
+    assert statuses[overlapping.pk] == 'cancelled'
+    assert statuses[adjacent.pk] == 'scheduled'
+    assert statuses[other_tutor.pk] == 'scheduled'
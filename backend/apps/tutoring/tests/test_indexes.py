@@ -0,0 +1,55 @@
+"""
+The hot session filters must be answerable from indexes. Sequential scans
+are disabled, which on tiny test tables leaves a full index scan as the
+fallback, so the tests check that each filter is an Index Cond.
+"""
+import re
+import pytest
+from django.db import connection
+from django.utils import timezone
+from apps.tutoring.models import TutoringSession
+from apps.tutoring.tests.factories import SessionFactory
+from apps.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+SEQ_SCAN = 'Seq Scan on tutoring_tutoringsession'
+
+
+def index_conditions(plan):
+    return re.findall(r'Index Cond: \((.*)\)', plan)
+
+
+@pytest.fixture
+def explain():
+    """``explain(queryset)``: its plan with sequential scans disabled, on fresh statistics"""
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def plan(queryset):
+        # Statistics of the rows the test created, not of the empty table
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tutoring_tutoringsession')
+        return queryset.explain()
+    return plan
+
+
+def test_for_user_uses_indexes(explain):
+    user = UserFactory()
+    SessionFactory.create_batch(3, student=user)
+    plan = explain(TutoringSession.objects.for_user(user).order_by('-date', '-time'))
+    assert SEQ_SCAN not in plan
+    # Each UNION branch reads its own foreign key index
+    conditions = index_conditions(plan)
+    assert f'tutor_id = {user.pk}' in conditions
+    assert f'student_id = {user.pk}' in conditions
+
+
+def test_upcoming_uses_active_index(explain):
+    SessionFactory.create_batch(3)
+    plan = explain(TutoringSession.objects.filter(
+        date__gte=timezone.localdate(), status__in=TutoringSession.ACTIVE_STATUSES
+    ))
+    assert SEQ_SCAN not in plan
+    assert 'session_active_date_idx' in plan
+    assert any(condition.startswith('date >=') for condition in index_conditions(plan))
@@ -0,0 +1,189 @@
+"""
+TutorStats kept by the signals must always equal what compute() derives
+from the source tables; reconcile() repairs any row that does not.
+"""
+import pytest
+from apps.tutoring.models import TutorStats
+from apps.tutoring.stats import COUNTER_FIELDS, compute, reconcile
+from apps.users.tests.factories import SubjectFactory, TutorFactory, UserFactory
+from .factories import ReviewFactory, SessionFactory
+
+pytestmark = pytest.mark.django_db
+
+EMPTY = dict.fromkeys(COUNTER_FIELDS, 0) | {'rating_avg': 0.0}
+
+
+def stored(tutor):
+    row = TutorStats.objects.filter(pk=tutor.pk).first()
+    if row is None:
+        return EMPTY
+    return {field: getattr(row, field) for field in COUNTER_FIELDS} | {'rating_avg': pytest.approx(row.rating_avg)}
+
+
+def assert_consistent(*tutors):
+    expected = compute([tutor.pk for tutor in tutors])
+    for tutor in tutors:
+        assert stored(tutor) == expected.get(tutor.pk, EMPTY)
+
+
+@pytest.fixture
+def tutors():
+    return TutorFactory.create_batch(2)
+
+
+def test_review_created(tutors):
+    ReviewFactory(session__tutor=tutors[0], rating=4)
+    ReviewFactory(session__tutor=tutors[0], rating=5)
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['review_count'] == 2
+    assert stored(tutors[0])['rating_avg'] == 4.5
+    assert stored(tutors[0])['completed_sessions'] == 2
+
+
+def test_review_edited_without_rating_change(tutors):
+    review = ReviewFactory(session__tutor=tutors[0], rating=3)
+    review.comment = 'Great'
+    review.save()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['rating_3'] == 1
+
+
+def test_review_rating_changed(tutors):
+    review = ReviewFactory(session__tutor=tutors[0], rating=2)
+    ReviewFactory(session__tutor=tutors[0], rating=4)
+    review.rating = 5
+    review.save()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['rating_2'] == 0
+    assert stored(tutors[0])['rating_5'] == 1
+    assert stored(tutors[0])['rating_avg'] == 4.5
+
+
+def test_review_moved_to_another_tutor(tutors):
+    review = ReviewFactory(session__tutor=tutors[0], rating=4)
+    review.session = SessionFactory(tutor=tutors[1], student=review.reviewer, status='completed')
+    review.save()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['review_count'] == 0
+    assert stored(tutors[1])['review_count'] == 1
+
+
+def test_review_deleted(tutors):
+    review = ReviewFactory(session__tutor=tutors[0], rating=1)
+    ReviewFactory(session__tutor=tutors[0], rating=5)
+    review.delete()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['review_count'] == 1
+    assert stored(tutors[0])['rating_avg'] == 5
+
+
+def test_session_completed_and_uncompleted(tutors):
+    session = SessionFactory(tutor=tutors[0])
+    assert_consistent(*tutors)
+
+    session.status = 'completed'
+    session.save()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['completed_sessions'] == 1
+
+    session.save()
+    assert stored(tutors[0])['completed_sessions'] == 1
+
+    session.status = 'scheduled'
+    session.save()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['completed_sessions'] == 0
+
+
+def test_completed_session_deleted(tutors):
+    session = SessionFactory(tutor=tutors[0], status='completed')
+    SessionFactory(tutor=tutors[0], status='completed')
+    session.delete()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['completed_sessions'] == 1
+
+
+def test_session_deletion_cascades_to_its_review(tutors):
+    review = ReviewFactory(session__tutor=tutors[0], rating=2)
+    ReviewFactory(session__tutor=tutors[0], rating=4)
+    review.session.delete()
+    assert_consistent(*tutors)
+    assert stored(tutors[0])['review_count'] == 1
+    assert stored(tutors[0])['rating_2'] == 0
+    assert stored(tutors[0])['completed_sessions'] == 1
+
+
+def test_reconcile_repairs_drift(tutors):
+    ReviewFactory(session__tutor=tutors[0], rating=4)
+    ReviewFactory(session__tutor=tutors[1], rating=2)
+    assert reconcile() == 0
+
+    TutorStats.objects.filter(pk=tutors[0].pk).update(review_count=7, rating_avg=1.0)
+    TutorStats.objects.filter(pk=tutors[1].pk).delete()
+    stray = TutorFactory()
+    TutorStats.objects.create(tutor=stray, review_count=3, rating_sum=9, rating_3=3)
+
+    assert reconcile() == 3
+    assert_consistent(*tutors, stray)
+    assert reconcile() == 0
+
+
+def test_reconcile_limited_to_tutors(tutors):
+    ReviewFactory(session__tutor=tutors[0], rating=4)
+    TutorStats.objects.update(review_count=7)
+    assert reconcile([tutors[1].pk]) == 0
+    assert reconcile([tutors[0].pk]) == 1
+    assert_consistent(*tutors)
+
+
+@pytest.fixture
+def ranked(tutors):
+    """tutors[0]: 4 reviews at 4.5, tutors[1]: 3 at 5, third: 1 at 5, fourth: none"""
+    for rating in (5, 5, 4, 4):
+        ReviewFactory(session__tutor=tutors[0], rating=rating)
+    for _ in range(3):
+        ReviewFactory(session__tutor=tutors[1], rating=5)
+    ReviewFactory(session__tutor__username='third', rating=5)
+    TutorFactory(username='fourth')
+    return tutors
+
+
+def usernames(response):
+    data = response.json()
+    tutors = data['results'] if isinstance(data, dict) else data
+    return [tutor['username'] for tutor in tutors]
+
+
+def test_tutor_list_ordering(auth_client, ranked):
+    client = auth_client(UserFactory())
+    response = client.get('/api/users/tutors/', {'ordering': '-review_count'})
+    assert response.status_code == 200
+    assert usernames(response)[:2] == [ranked[0].username, ranked[1].username]
+    assert usernames(response)[-1] == 'fourth'
+
+    response = client.get('/api/users/tutors/', {'ordering': 'rating_avg'})
+    assert usernames(response)[0] == 'fourth'
+    assert usernames(response)[1] == ranked[0].username
+
+
+def test_tutor_list_min_rating(auth_client, ranked):
+    client = auth_client(UserFactory())
+    response = client.get('/api/users/tutors/', {'min_rating': 4.6})
+    assert sorted(usernames(response)) == sorted([ranked[1].username, 'third'])
+
+    response = client.get('/api/users/tutors/', {'min_rating': 4, 'min_reviews': 4})
+    assert usernames(response) == [ranked[0].username]
+    assert response.json()['results'][0]['stats']['rating_histogram'] == {'1': 0, '2': 0, '3': 0, '4': 2, '5': 2}
+
+
+def test_leaderboard(auth_client, ranked, settings):
+    settings.TUTOR_LEADERBOARD_MIN_REVIEWS = 3
+    subject = SubjectFactory()
+    ranked[0].subjects.add(subject)
+    client = auth_client(UserFactory())
+    response = client.get('/api/users/tutors/leaderboard/')
+    assert response.status_code == 200
+    assert usernames(response) == [ranked[1].username, ranked[0].username]
+
+    response = client.get('/api/users/tutors/leaderboard/', {'subject': subject.pk})
+    assert usernames(response) == [ranked[0].username]
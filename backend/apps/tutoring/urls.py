@@ -9,6 +9,9 @@ from .views import (
     SessionCancelView,
     SessionReviewListCreateView,
     SessionReviewDetailView,
+    AvailabilityView,
+    AvailabilityWindowListCreateView,
+    AvailabilityWindowDetailView,
 )
 
 urlpatterns = [
@@ -16,6 +19,17 @@ urlpatterns = [
     path('upcoming/', UpcomingSessionsView.as_view(), name='session-upcoming'),
     path('completed/', CompletedSessionsView.as_view(), name='session-completed'),
     path('my/', MySessionsView.as_view(), name='session-my'),
+    path('availability/', AvailabilityView.as_view(), name='session-availability'),
+    path(
+        'availability/windows/',
+        AvailabilityWindowListCreateView.as_view(),
+        name='availability-window-list'
+    ),
+    path(
+        'availability/windows/<int:pk>/',
+        AvailabilityWindowDetailView.as_view(),
+        name='availability-window-detail'
+    ),
     path('<int:pk>/', SessionDetailView.as_view(), name='session-detail'),
     path('<int:pk>/confirm/', SessionConfirmView.as_view(), name='session-confirm'),
     path('<int:pk>/cancel/', SessionCancelView.as_view(), name='session-cancel'),
@@ -1,16 +1,45 @@
-from rest_framework import generics, permissions, status
+from datetime import timedelta
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from django.db import models as db_models
-from .models import TutoringSession, SessionReview
-from .serializers import TutoringSessionSerializer, SessionReviewSerializer
+from django.utils.dateparse import parse_date
+from apps.core.caching import CachedResponseMixin
+from .availability import free_slots
+from .models import TutoringSession, SessionReview, TutorAvailability
+from .serializers import (
+    TutoringSessionSerializer,
+    SessionReviewSerializer,
+    TutorAvailabilitySerializer,
+)
+
+MAX_AVAILABILITY_DAYS = 62
+OVERLAP_CONSTRAINT = 'session_no_tutor_overlap'
+
+
+def violated_constraint(error):
+    """Name of the constraint behind an IntegrityError, None if unknown"""
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None)
+
+
+def save_session(serializer, **kwargs):
+    """Save a session, turning a lost booking race into a validation error"""
+    try:
+        with transaction.atomic():
+            return serializer.save(**kwargs)
+    except IntegrityError as e:
+        if violated_constraint(e) != OVERLAP_CONSTRAINT:
+            raise
+        raise serializers.ValidationError('Tutor already has a session at this time')
 
 
 class SessionListCreateView(generics.ListCreateAPIView):
-    queryset = TutoringSession.objects.select_related('tutor', 'student', 'subject')
+    queryset = TutoringSession.objects.with_details()
     serializer_class = TutoringSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -22,18 +51,21 @@ class SessionListCreateView(generics.ListCreateAPIView):
         # If user is a tutor, they create sessions for themselves
         if user.role == 'tutor':
             # Tutor can only be themselves, student is specified in request
-            serializer.save(tutor=user)
+            save_session(serializer, tutor=user, actor=user)
         else:
             # Student books a session with a tutor
             # Student is always themselves, tutor is specified in request
-            serializer.save(student=user)
+            save_session(serializer, student=user, actor=user)
 
 
 class SessionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = TutoringSession.objects.select_related('tutor', 'student', 'subject')
+    queryset = TutoringSession.objects.with_details()
     serializer_class = TutoringSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def perform_update(self, serializer):
+        save_session(serializer, actor=self.request.user)
+
 
 class SessionConfirmView(APIView):
     """Endpoint for tutor to confirm a session"""
@@ -41,7 +73,7 @@ class SessionConfirmView(APIView):
     
     def post(self, request, pk):
         try:
-            session = TutoringSession.objects.get(pk=pk)
+            session = TutoringSession.objects.with_details().get(pk=pk)
         except TutoringSession.DoesNotExist:
             return Response(
                 {'error': 'Session not found'},
@@ -64,6 +96,7 @@ class SessionConfirmView(APIView):
         session.is_confirmed = True
         session.confirmed_at = timezone.now()
         session.status = 'scheduled'
+        session.actor = request.user
         session.save()
         
         serializer = TutoringSessionSerializer(session)
@@ -76,7 +109,7 @@ class SessionCancelView(APIView):
     
     def post(self, request, pk):
         try:
-            session = TutoringSession.objects.get(pk=pk)
+            session = TutoringSession.objects.with_details().get(pk=pk)
         except TutoringSession.DoesNotExist:
             return Response(
                 {'error': 'Session not found'},
@@ -105,6 +138,7 @@ class SessionCancelView(APIView):
         session.status = 'cancelled'
         session.cancelled_by = request.user
         session.cancellation_reason = request.data.get('reason', '')
+        session.actor = request.user
         session.save()
         
         serializer = TutoringSessionSerializer(session)
@@ -121,20 +155,21 @@ class UpcomingSessionsView(generics.ListAPIView):
         today = timezone.now().date()
         return TutoringSession.objects.filter(
             date__gte=today,
-            status__in=['pending', 'scheduled']
-        ).select_related('tutor', 'student', 'subject')
+            status__in=TutoringSession.ACTIVE_STATUSES
+        ).with_details()
 
 
-class CompletedSessionsView(generics.ListAPIView):
+class CompletedSessionsView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = TutoringSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['subject', 'tutor']
+    cache_models = ('tutoring.TutoringSession', 'tutoring.SessionReview', 'users.User', 'users.Subject')
 
     def get_queryset(self):
         return TutoringSession.objects.filter(
             status='completed'
-        ).select_related('tutor', 'student', 'subject').order_by('-date')
+        ).with_details().order_by('-date')
 
 
 class MySessionsView(generics.ListAPIView):
@@ -143,9 +178,7 @@ class MySessionsView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return TutoringSession.objects.filter(
-            db_models.Q(tutor=user) | db_models.Q(student=user)
-        ).select_related('tutor', 'student', 'subject').order_by('-date', '-time')
+        return TutoringSession.objects.for_user(user).with_details().order_by('-date', '-time')
 
 
 class SessionReviewListCreateView(generics.ListCreateAPIView):
@@ -153,15 +186,85 @@ class SessionReviewListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return SessionReview.objects.select_related(
-            'session', 'reviewer', 'session__tutor'
-        ).all()
+        return SessionReview.objects.with_details()
     
     def perform_create(self, serializer):
         serializer.save(reviewer=self.request.user)
 
 
 class SessionReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = SessionReview.objects.all()
+    queryset = SessionReview.objects.with_details()
     serializer_class = SessionReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+
+class AvailabilityView(APIView):
+    """Free slots in a tutor's availability: ?tutor=&from=&to=[&duration=]"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        tutor = request.query_params.get('tutor', '')
+        if not tutor.isdigit():
+            return Response(
+                {'error': 'tutor is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.localdate()
+        try:
+            from_date = self.query_date(request, 'from') or today
+            to_date = self.query_date(request, 'to') or from_date + timedelta(days=13)
+        except ValueError:
+            return Response(
+                {'error': 'from and to must be valid YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if to_date < from_date or (to_date - from_date).days >= MAX_AVAILABILITY_DAYS:
+            return Response(
+                {'error': f'to must be within {MAX_AVAILABILITY_DAYS} days after from'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        duration = request.query_params.get('duration', '')
+        slots = free_slots(
+            int(tutor), from_date, to_date,
+            min_duration=int(duration) if duration.isdigit() else 0
+        )
+        return Response({
+            'tutor': int(tutor),
+            'from': from_date,
+            'to': to_date,
+            'slots': [{'start': start, 'end': end} for start, end in slots],
+        })
+
+    def query_date(self, request, name):
+        """Date in query parameter ``name``, None if absent; ValueError if malformed"""
+        value = request.query_params.get(name, '')
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(value)
+        return parsed
+
+
+class AvailabilityWindowListCreateView(generics.ListCreateAPIView):
+    """Weekly availability windows; tutors manage their own"""
+    queryset = TutorAvailability.objects.all()
+    serializer_class = TutorAvailabilitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['tutor', 'weekday']
+
+    def perform_create(self, serializer):
+        if self.request.user.role != 'tutor':
+            raise PermissionDenied('Only tutors can set availability')
+        serializer.save(tutor=self.request.user)
+
+
+class AvailabilityWindowDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = TutorAvailabilitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return TutorAvailability.objects.filter(tutor=self.request.user)
@@ -1,10 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.contrib.auth.forms import AdminPasswordChangeForm
 from .models import User, Subject
 
 
+class PasswordChangeForm(AdminPasswordChangeForm):
+    """Also revokes the user's tokens"""
+
+    def save(self, commit=True):
+        user = super().save(commit=False)
+        if commit:
+            user.rotate_token_version('password')
+        return user
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
+    change_password_form = PasswordChangeForm
+    actions = ['revoke_tokens']
     list_display = ['username', 'email', 'role', 'is_active', 'date_joined']
     list_filter = ['role', 'is_active', 'is_staff']
     fieldsets = BaseUserAdmin.fieldsets + (
@@ -12,6 +25,12 @@ class UserAdmin(BaseUserAdmin):
     )
     filter_horizontal = ['subjects', 'groups', 'user_permissions']
 
+    @admin.action(description='Revoke tokens of selected users')
+    def revoke_tokens(self, request, queryset):
+        for user in queryset:
+            user.rotate_token_version()
+        self.message_user(request, f'Revoked the tokens of {len(queryset)} users')
+
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
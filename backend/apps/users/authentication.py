@@ -0,0 +1,86 @@
+"""
+JWT authentication without a user query per request.
+
+The fields needed to authorise a request are cached per user in a small
+process-local LRU (AUTH_USER_CACHE_LOCAL_TTL seconds) in front of the Redis
+cache (AUTH_USER_CACHE_TIMEOUT). Saving or deleting a user drops both
+entries in this process and the Redis entry for all of them, so other
+processes see a change within the local TTL.
+
+request.user is a User built from the cached record with every other field
+deferred: reading e.g. ``email`` loads it on demand, and ``save()`` only
+writes loaded fields.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+from .serializers import TOKEN_VERSION_CLAIM
+
+CACHED_FIELDS = ('id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser', 'token_version')
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_user_record(user_id):
+    """CACHED_FIELDS of a user as a dict, or None if there is no such user"""
+    # Tokens may carry the id as a string
+    user_id = str(user_id)
+    now = time.monotonic()
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry is not None and entry[0] > now:
+            _local.move_to_end(user_id)
+            return entry[1]
+
+    record = cache.get(user_cache_key(user_id))
+    if record is None:
+        record = User.objects.filter(pk=user_id).values(*CACHED_FIELDS).first()
+        if record is None:
+            return None
+        cache.set(user_cache_key(user_id), record, settings.AUTH_USER_CACHE_TIMEOUT)
+
+    with _local_lock:
+        _local[user_id] = (now + settings.AUTH_USER_CACHE_LOCAL_TTL, record)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.AUTH_USER_CACHE_SIZE:
+            _local.popitem(last=False)
+    return record
+
+
+def invalidate_user(user_id):
+    user_id = str(user_id)
+    cache.delete(user_cache_key(user_id))
+    with _local_lock:
+        _local.pop(user_id, None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users from the auth cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        record = get_user_record(user_id)
+        if record is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not record['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != record['token_version']:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        return User.from_db('default', list(CACHED_FIELDS), [record[field] for field in CACHED_FIELDS])
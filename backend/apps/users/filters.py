@@ -0,0 +1,24 @@
+import django_filters
+from rest_framework.filters import OrderingFilter
+from .models import User
+
+
+class TutorFilter(django_filters.FilterSet):
+    """Filters over the stats annotated by TutorListView"""
+    min_rating = django_filters.NumberFilter(field_name='rating_avg', lookup_expr='gte')
+    min_reviews = django_filters.NumberFilter(field_name='review_count', lookup_expr='gte')
+    min_sessions = django_filters.NumberFilter(field_name='completed_sessions', lookup_expr='gte')
+
+    class Meta:
+        model = User
+        fields = ['subjects']
+
+
+class StableOrderingFilter(OrderingFilter):
+    """OrderingFilter with the primary key as tie breaker, so pages never overlap"""
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not {'pk', '-pk', 'id', '-id'} & set(ordering):
+            ordering = [*ordering, '-pk']
+        return ordering
@@ -0,0 +1,54 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from apps.users.authentication import CachedJWTAuthentication
+from apps.users.models import User
+from apps.users.serializers import TokenWithVersionSerializer
+
+
+class WhoAmIView(APIView):
+    throttle_classes = []
+
+    def get(self, request):
+        return Response({'id': request.user.pk, 'role': request.user.role})
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request latency and queries of JWT auth with and without the user cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--username', help='User to authenticate as (default: first active user)')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        if user is None:
+            raise CommandError('No active user to authenticate as')
+        token = str(TokenWithVersionSerializer.get_token(user).access_token)
+        factory = APIRequestFactory()
+
+        for label, authentication in (('JWTAuthentication', JWTAuthentication), ('CachedJWTAuthentication', CachedJWTAuthentication)):
+            view = WhoAmIView.as_view(authentication_classes=[authentication])
+            view(factory.get('/bench/', HTTP_AUTHORIZATION=f'Bearer {token}'))  # warm up
+            samples = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['requests']):
+                    request = factory.get('/bench/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                    started = time.perf_counter()
+                    response = view(request)
+                    samples.append((time.perf_counter() - started) * 1000)
+                    assert response.status_code == 200, response.data
+            samples.sort()
+            self.stdout.write(
+                f'{label:<24} p50 {samples[len(samples) // 2]:.3f} ms  '
+                f'p99 {samples[int(len(samples) * 0.99) - 1]:.3f} ms  '
+                f'mean {statistics.fmean(samples):.3f} ms  '
+                f'{len(queries) / len(samples):.2f} queries/request'
+            )
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.users.recommendations import precompute
+
+
+class Command(BaseCommand):
+    help = 'Score tutors for every active student and cache their recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Students scored per matrix product')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        students = precompute(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Cached recommendations for {students} students in {time.monotonic() - started:.1f}s'
+        ))
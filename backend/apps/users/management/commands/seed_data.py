@@ -1,4 +1,6 @@
+import time
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from apps.users.models import User, Subject
@@ -6,12 +8,24 @@ from apps.materials.models import StudyMaterial
 from apps.tutoring.models import TutoringSession
 from apps.forum.models import Discussion, Reply
 from apps.support.models import SupportQuery
+from apps.core import seeding
 
 
 class Command(BaseCommand):
-    help = 'Seed database with test data'
+    help = (
+        'Seed database with test data. With --scale N, generate N users and '
+        'proportional sessions, reviews, materials, discussions and notifications instead'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, help='Users to generate, e.g. 1000000')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; equal seeds give equal data')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per COPY')
 
     def handle(self, *args, **options):
+        if options['scale']:
+            return self.seed_scale(options)
+
         self.stdout.write('Creating test data...')
 
         subjects = [
@@ -141,3 +155,18 @@ class Command(BaseCommand):
         self.stdout.write('\nTest accounts:')
         self.stdout.write('  Tutors: john_tutor / TutorPass123!, sarah_tutor / TutorPass123!')
         self.stdout.write('  Students: mike_student / StudentPass123!, emma_student / StudentPass123!')
+
+    def seed_scale(self, options):
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = seeding.generate(
+                options['scale'], seed=options['seed'], batch_size=options['batch_size'], log=self.stdout.write
+            )
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for label, count in counts.items():
+            self.stdout.write(f'  {label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'\nGenerated {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)'
+        ))
+        self.stdout.write(f'Every generated user has the password {seeding.SEED_PASSWORD}')
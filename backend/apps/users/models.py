@@ -1,5 +1,7 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
 
 
 class Subject(models.Model):
@@ -14,6 +16,27 @@ class Subject(models.Model):
         return self.name
 
 
+class UserQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load everything UserSerializer renders in a fixed number of queries"""
+        return self.prefetch_related('subjects')
+
+    def with_stats(self):
+        """
+        Join TutorStats and annotate its aggregates for filtering and ordering;
+        tutors without a stats row get zeros.
+        """
+        return self.select_related('tutor_stats').annotate(
+            rating_avg=Coalesce('tutor_stats__rating_avg', 0.0),
+            review_count=Coalesce('tutor_stats__review_count', 0),
+            completed_sessions=Coalesce('tutor_stats__completed_sessions', 0),
+        )
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('student', 'Student'),
@@ -23,10 +46,31 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')
     bio = models.TextField(blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # {size: storage name} of the square WebP renditions made by users.tasks.process_avatar
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     subjects = models.ManyToManyField(Subject, blank=True, related_name='users')
+    # Copied into issued JWTs; bumping it revokes every token issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = UserManager()
 
     class Meta:
         ordering = ['-date_joined']
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_date_joined_id_idx'),
+        ]
 
     def __str__(self):
         return self.username
+
+    def rotate_token_version(self, *update_fields):
+        """
+        Revoke every token issued to this user so far. ``update_fields`` (e.g.
+        'password' after set_password) are saved in the same UPDATE.
+
+        Not done in set_password: Django also calls that to upgrade password
+        hashes on login, and saves only the password then.
+        """
+        self.token_version = F('token_version') + 1
+        self.save(update_fields=['token_version', *update_fields])
+        self.refresh_from_db(fields=['token_version'])
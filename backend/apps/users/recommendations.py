@@ -0,0 +1,273 @@
+"""
+Tutor recommendations for students.
+
+Every tutor gets a score per student from four signals, computed for a
+batch of students at once as dense NumPy matrix products:
+
+* subject match: cosine similarity between the student's subject profile
+  (their subjects plus the subjects of their past sessions) and the
+  tutor's subjects
+* popularity: how often students studying the same subjects completed
+  sessions with the tutor
+* rating: the tutor's review average shrunk towards the site average
+  (Bayesian average), so a single 5-star review does not win
+* availability: free hours in the tutor's calendar over the next weeks
+
+plus the student's own history (sessions with the tutor and the rating
+they gave). Tutors sharing no subject with a student who has a profile
+are left out. ``precompute`` stores the top tutors of every student in
+the cache; ``recommend`` serves them and, on a miss, queues ``refresh`` of
+that student on a worker rather than building the model in the request.
+"""
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Sum
+from django.utils import timezone
+from apps.tutoring.models import ACTIVE_STATUSES, TutorAvailability, TutoringSession, TutorStats
+from .models import Subject, User
+
+# Past completed sessions add to the student's subject profile, damped by log1p
+HISTORY_SUBJECT_WEIGHT = 0.5
+# Own-history bonus for a completed but unrated session with a tutor
+UNRATED_HISTORY_SCORE = 0.25
+# How long a queued refresh suppresses queueing another for the same student
+REFRESH_PENDING_TIMEOUT = 60
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def pending_key(user_id):
+    return f'recommendations:pending:{user_id}'
+
+
+def invalidate(user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids])
+
+
+class TutorModel:
+    """
+    Tutor-side matrices shared by every student's scoring.
+
+    ``match`` and ``popularity`` are subjects x tutors; ``base`` holds the
+    per-tutor rating and availability terms, already weighted.
+    """
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.tutor_ids = np.array(
+            User.objects.filter(role='tutor', is_active=True).order_by('pk').values_list('pk', flat=True),
+            dtype=np.int64
+        )
+        self.subject_ids = np.array(Subject.objects.order_by('pk').values_list('pk', flat=True), dtype=np.int64)
+        self.match = self._subject_matrix()
+        self.popularity = self._popularity_matrix()
+        weights = settings.RECOMMENDATION_WEIGHTS
+        self.base = (
+            weights['rating'] * self._ratings()
+            + weights['availability'] * self._availability()
+        ).astype(np.float32)
+
+    def tutor_index(self, ids):
+        """Positions of ``ids`` in tutor_ids, -1 for unknown tutors"""
+        return self._index(self.tutor_ids, ids)
+
+    def subject_index(self, ids):
+        return self._index(self.subject_ids, ids)
+
+    @staticmethod
+    def _index(sorted_ids, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(sorted_ids):
+            return np.full(len(ids), -1)
+        positions = np.searchsorted(sorted_ids, ids).clip(max=len(sorted_ids) - 1)
+        return np.where(sorted_ids[positions] == ids, positions, -1)
+
+    def _subject_matrix(self):
+        rows = np.array(
+            User.subjects.through.objects.filter(user__in=self.tutor_ids.tolist()).values_list('subject_id', 'user_id'),
+            dtype=np.int64
+        ).reshape(-1, 2)
+        matrix = np.zeros((len(self.subject_ids), len(self.tutor_ids)), dtype=np.float32)
+        matrix[self.subject_index(rows[:, 0]), self.tutor_index(rows[:, 1])] = 1
+        # Unit columns, so a profile @ match is the cosine similarity
+        norms = np.linalg.norm(matrix, axis=0)
+        return matrix / np.where(norms, norms, 1)
+
+    def _popularity_matrix(self):
+        rows = np.array(
+            TutoringSession.objects.filter(status='completed', tutor__in=self.tutor_ids.tolist())
+            .order_by().values('subject', 'tutor').annotate(count=Count('id'))
+            .values_list('subject', 'tutor', 'count'),
+            dtype=np.int64
+        ).reshape(-1, 3)
+        subjects = self.subject_index(rows[:, 0])
+        known = subjects >= 0
+        matrix = np.zeros((len(self.subject_ids), len(self.tutor_ids)), dtype=np.float32)
+        matrix[subjects[known], self.tutor_index(rows[known, 1])] = np.log1p(rows[known, 2])
+        # Each subject's most booked tutor scores 1
+        peaks = matrix.max(axis=1, keepdims=True)
+        return matrix / np.where(peaks, peaks, 1)
+
+    def _ratings(self):
+        rows = np.array(
+            TutorStats.objects.filter(pk__in=self.tutor_ids.tolist()).values_list('pk', 'rating_sum', 'review_count'),
+            dtype=np.float64
+        ).reshape(-1, 3)
+        sums = np.zeros(len(self.tutor_ids))
+        counts = np.zeros(len(self.tutor_ids))
+        positions = self.tutor_index(rows[:, 0])
+        sums[positions], counts[positions] = rows[:, 1], rows[:, 2]
+        prior = settings.RECOMMENDATION_RATING_PRIOR
+        mean = sums.sum() / counts.sum() if counts.sum() else 3.0
+        # Stars 1..5 mapped to 0..1
+        return ((prior * mean + sums) / (prior + counts) - 1) / 4
+
+    def _availability(self):
+        days = settings.RECOMMENDATION_AVAILABILITY_DAYS
+        today = timezone.localdate()
+        weekly = dict(
+            TutorAvailability.objects.filter(end_time__gt=F('start_time')).order_by()
+            .values('tutor').annotate(total=Sum(F('end_time') - F('start_time')))
+            .values_list('tutor', 'total')
+        )
+        booked = dict(
+            TutoringSession.objects.filter(
+                status__in=ACTIVE_STATUSES, date__gte=today, date__lt=today + timedelta(days=days)
+            ).order_by().values('tutor').annotate(total=Sum('duration')).values_list('tutor', 'total')
+        )
+        hours = np.array([
+            weekly.get(tutor_id, timedelta()).total_seconds() / 3600 * days / 7
+            - booked.get(tutor_id, 0) / 60
+            for tutor_id in self.tutor_ids.tolist()
+        ])
+        return np.clip(hours / settings.RECOMMENDATION_AVAILABILITY_HOURS, 0, 1)
+
+
+def get_model(refresh=False):
+    """The process-wide TutorModel, rebuilt once it is RECOMMENDATION_MODEL_TTL old"""
+    global _model
+    with _model_lock:
+        if refresh or _model is None or time.monotonic() - _model.built_at > settings.RECOMMENDATION_MODEL_TTL:
+            _model = TutorModel()
+        return _model
+
+
+def score_students(model, student_ids):
+    """(len(student_ids) x tutors) score matrix; -inf marks excluded tutors"""
+    students = np.asarray(student_ids, dtype=np.int64)
+    order = np.argsort(students)
+    profile = np.zeros((len(students), len(model.subject_ids)), dtype=np.float32)
+    # NaN until the student has a completed session with the tutor
+    history = np.full((len(students), len(model.tutor_ids)), np.nan, dtype=np.float32)
+
+    def rows(ids):
+        return order[np.searchsorted(students, ids, sorter=order)]
+
+    subjects = np.array(
+        User.subjects.through.objects.filter(user__in=students.tolist()).values_list('user_id', 'subject_id'),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    columns = model.subject_index(subjects[:, 1])
+    known = columns >= 0
+    profile[rows(subjects[known, 0]), columns[known]] = 1
+
+    past = np.array([
+        (student, tutor, subject, count, np.nan if rating is None else rating)
+        for student, tutor, subject, count, rating in
+        TutoringSession.objects.filter(student__in=students.tolist(), status='completed').order_by()
+        .values('student', 'tutor', 'subject')
+        .annotate(count=Count('id'), rating=Avg('review__rating'))
+        .values_list('student', 'tutor', 'subject', 'count', 'rating')
+    ], dtype=np.float64).reshape(-1, 5)
+    past_rows = rows(past[:, 0].astype(np.int64))
+    columns = model.subject_index(past[:, 2].astype(np.int64))
+    known = columns >= 0
+    np.add.at(profile, (past_rows[known], columns[known]), HISTORY_SUBJECT_WEIGHT * np.log1p(past[known, 3]))
+    columns = model.tutor_index(past[:, 1].astype(np.int64))
+    known = columns >= 0
+    own = np.where(np.isnan(past[:, 4]), UNRATED_HISTORY_SCORE, (past[:, 4] - 3) / 2)
+    np.fmax.at(history, (past_rows[known], columns[known]), own[known])
+    has_history = ~np.isnan(history)
+    history = np.nan_to_num(history)
+
+    norms = np.linalg.norm(profile, axis=1, keepdims=True)
+    profile /= np.where(norms, norms, 1)
+
+    weights = settings.RECOMMENDATION_WEIGHTS
+    match = profile @ model.match
+    scores = (
+        weights['subjects'] * match
+        + weights['popularity'] * (profile @ model.popularity)
+        + weights['history'] * history
+        + model.base
+    )
+    has_profile = norms[:, 0] > 0
+    scores[has_profile[:, None] & (match == 0) & ~has_history] = -np.inf
+    # Users never get themselves recommended
+    own = model.tutor_index(students)
+    scores[np.flatnonzero(own >= 0), own[own >= 0]] = -np.inf
+    return scores
+
+
+def top_tutors(model, scores, k):
+    """Per row, the best ``k`` [tutor_id, score] pairs, best first"""
+    k = min(k, scores.shape[1])
+    if not k:
+        return [[] for _ in range(len(scores))]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+    return [
+        [[int(model.tutor_ids[i]), round(float(scores[r, i]), 4)] for i in top[r] if np.isfinite(scores[r, i])]
+        for r in range(len(scores))
+    ]
+
+
+def precompute(batch_size=1000):
+    """Score every active student and cache their top tutors; returns how many"""
+    model = get_model(refresh=True)
+    students = User.objects.filter(role='student', is_active=True).order_by('pk').values_list('pk', flat=True)
+    done = 0
+    batch = []
+    for student_id in students.iterator(chunk_size=batch_size):
+        batch.append(student_id)
+        if len(batch) == batch_size:
+            done += _store(model, batch)
+            batch = []
+    if batch:
+        done += _store(model, batch)
+    return done
+
+
+def _store(model, student_ids):
+    results = top_tutors(model, score_students(model, student_ids), settings.RECOMMENDATION_CACHE_SIZE)
+    cache.set_many(
+        {cache_key(student_id): result for student_id, result in zip(student_ids, results)},
+        settings.RECOMMENDATION_CACHE_TIMEOUT
+    )
+    return len(student_ids)
+
+
+def refresh(user_id):
+    """Score ``user_id`` and cache their top tutors; runs on a worker, see recommend()"""
+    cache.delete(pending_key(user_id))
+    _store(get_model(), [user_id])
+
+
+def recommend(user_id):
+    """Cached [tutor_id, score] pairs for ``user_id``; empty on a miss, which queues a refresh"""
+    result = cache.get(cache_key(user_id))
+    if result is None:
+        from .tasks import refresh_recommendations
+        if cache.add(pending_key(user_id), 1, REFRESH_PENDING_TIMEOUT):
+            refresh_recommendations.delay(user_id)
+        return []
+    return result
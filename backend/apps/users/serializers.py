@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.password_validation import validate_password
+from apps.core.media import absolute_url
+from apps.tutoring.models import TutorStats
 from .models import User, Subject
 
+TOKEN_VERSION_CLAIM = 'tv'
+
 
 class SubjectSerializer(serializers.ModelSerializer):
     class Meta:
@@ -18,16 +23,49 @@ class UserSerializer(serializers.ModelSerializer):
         source='subjects',
         required=False
     )
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
-            'role', 'bio', 'avatar', 'subjects', 'subject_ids', 'date_joined',
-            'is_staff', 'is_superuser'
+            'role', 'bio', 'avatar', 'avatar_variants', 'subjects', 'subject_ids',
+            'date_joined', 'is_staff', 'is_superuser'
         ]
         read_only_fields = ['id', 'date_joined', 'is_staff', 'is_superuser']
 
+    def get_avatar_variants(self, obj):
+        """{size: url} of the WebP renditions; empty until they are generated"""
+        if not obj.avatar:
+            return {}
+        storage = obj.avatar.storage
+        request = self.context.get('request')
+        return {
+            size: absolute_url(request, storage.url(name))
+            for size, name in obj.avatar_variants.items()
+            # Renditions of a replaced avatar linger until the task runs
+            if name.startswith(f'{obj.avatar.name}.')
+        }
+
+
+class TutorStatsSerializer(serializers.Serializer):
+    rating_avg = serializers.FloatField()
+    review_count = serializers.IntegerField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField())
+    completed_sessions = serializers.IntegerField()
+
+
+class TutorSerializer(UserSerializer):
+    """A tutor with their materialized review and session stats"""
+    stats = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['stats']
+
+    def get_stats(self, obj):
+        stats = getattr(obj, 'tutor_stats', None) or TutorStats(tutor=obj)
+        return TutorStatsSerializer(stats).data
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -46,3 +84,27 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class PasswordChangeSerializer(serializers.Serializer):
+    old_password = serializers.CharField(write_only=True)
+    new_password = serializers.CharField(write_only=True)
+
+    def validate_old_password(self, value):
+        if not self.context['user'].check_password(value):
+            raise serializers.ValidationError('Wrong password')
+        return value
+
+    def validate_new_password(self, value):
+        validate_password(value, self.context['user'])
+        return value
+
+
+class TokenWithVersionSerializer(TokenObtainPairSerializer):
+    """Adds the user's token_version so tokens can be revoked in bulk"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .authentication import CACHED_FIELDS, invalidate_user
+from apps.tutoring.models import TutoringSession
+from . import recommendations
+from .models import User
+from .tasks import process_avatar
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(CACHED_FIELDS) & set(update_fields):
+        return
+    invalidate_user(instance.pk)
+    # Again after commit, in case a request re-cached the old row meanwhile
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def remember_avatar(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or instance.pk is None or (update_fields is not None and 'avatar' not in update_fields):
+        return
+    instance._previous_avatar = User.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def avatar_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and 'avatar' not in update_fields):
+        return
+    name = instance.avatar.name or ''
+    if name != ((None if created else getattr(instance, '_previous_avatar', None)) or ''):
+        transaction.on_commit(lambda: process_avatar.delay(instance.pk, name))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    storage = instance.avatar.storage
+    for name in instance.avatar_variants.values():
+        storage.delete(name)
+
+
+@receiver(m2m_changed, sender=User.subjects.through)
+def subjects_changed(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        recommendations.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=TutoringSession)
+def session_saved(sender, instance, **kwargs):
+    # A completed session changes the student's profile and history
+    if instance.student_id and instance.status == 'completed':
+        recommendations.invalidate([instance.student_id])
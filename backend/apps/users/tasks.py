@@ -0,0 +1,47 @@
+import logging
+from celery import shared_task
+from django.conf import settings
+from apps.core import media
+from apps.core.signals import invalidate
+from .models import User
+from .recommendations import precompute, refresh
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def precompute_recommendations():
+    return precompute()
+
+
+@shared_task
+def refresh_recommendations(user_id):
+    refresh(user_id)
+
+
+@shared_task
+def process_avatar(user_id, name):
+    """Square WebP renditions of the avatar ``name``; no-op if it was replaced meanwhile"""
+    user = User.objects.filter(pk=user_id).only('id', 'avatar', 'avatar_variants').first()
+    if user is None or (user.avatar.name or '') != name:
+        return
+    storage = user.avatar.storage
+    for old in user.avatar_variants.values():
+        storage.delete(old)
+
+    variants = {}
+    if name:
+        try:
+            with user.avatar.open('rb') as f:
+                image = media.open_image(f, max(settings.MEDIA_AVATAR_SIZES))
+            for size in settings.MEDIA_AVATAR_SIZES:
+                variants[str(size)] = storage.save(
+                    media.derived_name(name, f'{size}.webp'),
+                    media.square_webp(image, size)
+                )
+        except media.PROCESSING_ERRORS:
+            logger.warning('Could not process avatar %s of user %s', name, user_id, exc_info=True)
+
+    # Queryset update: a concurrent avatar change must not get these variants
+    User.objects.filter(pk=user_id, avatar=name).update(avatar_variants=variants)
+    invalidate(User)
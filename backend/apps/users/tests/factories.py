@@ -0,0 +1,30 @@
+import factory
+from apps.users.models import Subject, User
+
+
+class SubjectFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Subject
+        django_get_or_create = ['name']
+
+    name = factory.Sequence(lambda n: f'Subject {n}')
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+        skip_postgeneration_save = True
+
+    username = factory.Sequence(lambda n: f'user{n}')
+    email = factory.LazyAttribute(lambda user: f'{user.username}@example.com')
+    password = factory.django.Password('TestPass123!')
+    role = 'student'
+
+    @factory.post_generation
+    def subjects(self, create, extracted, **kwargs):
+        if create:
+            self.subjects.set(extracted if extracted is not None else [SubjectFactory()])
+
+
+class TutorFactory(UserFactory):
+    role = 'tutor'
@@ -0,0 +1,48 @@
+"""
+Nested user serializers must not cost a query per row: every list view
+renders any page size in the same number of queries (see with_details()).
+"""
+import pytest
+from apps.forum.tests.factories import DiscussionFactory, ReplyFactory
+from apps.materials.tests.factories import MaterialFactory
+from apps.tutoring.tests.factories import ReviewFactory, SessionFactory
+from apps.users.tests.factories import SubjectFactory, TutorFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def create_sessions(user, count):
+    for index in range(count):
+        if index % 3 == 0:
+            ReviewFactory(session__student=user)
+        elif index % 3 == 1:
+            SessionFactory(student=user, status='cancelled', cancelled_by=user)
+        else:
+            SessionFactory(student=user)
+
+
+def create_discussions(user, count):
+    for _ in range(count):
+        ReplyFactory(discussion=DiscussionFactory())
+
+
+ENDPOINTS = [
+    # (url, row builder, queries): the page, its count and one query per prefetch
+    ('/api/sessions/', create_sessions, 6),
+    ('/api/sessions/my/', create_sessions, 6),
+    ('/api/materials/', lambda user, count: MaterialFactory.create_batch(count), 3),
+    ('/api/discussions/', create_discussions, 3),
+    ('/api/users/tutors/', lambda user, count: TutorFactory.create_batch(count), 3),
+    ('/api/users/', lambda user, count: UserFactory.create_batch(count), 3),
+]
+
+
+@pytest.mark.parametrize('rows', [2, 12])
+@pytest.mark.parametrize('url,create,queries', ENDPOINTS, ids=[endpoint[0] for endpoint in ENDPOINTS])
+def test_list_query_count_is_independent_of_rows(auth_client, django_assert_num_queries, url, create, queries, rows):
+    user = UserFactory(subjects=SubjectFactory.create_batch(2))
+    create(user, rows)
+    client = auth_client(user)
+    with django_assert_num_queries(queries):
+        response = client.get(url)
+    assert response.status_code == 200
@@ -0,0 +1,128 @@
+"""
+Recommendation scoring over a small graph, and the cache-miss path that
+queues scoring on a worker instead of building the model in the request.
+"""
+from types import SimpleNamespace
+from unittest import mock
+import numpy as np
+import pytest
+from django.core.cache import cache
+from apps.tutoring.tests.factories import ReviewFactory, SessionFactory
+from apps.users import recommendations
+from apps.users.recommendations import TutorModel, recommend, score_students, top_tutors
+from apps.users.tests.factories import SubjectFactory, TutorFactory, UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def graph():
+    """A maths student and tutors that differ in one signal each"""
+    maths, art = SubjectFactory(name='Maths'), SubjectFactory(name='Art')
+    graph = SimpleNamespace(
+        maths=maths,
+        student=UserFactory(subjects=[maths]),
+        painter=TutorFactory(subjects=[art]),
+        good=TutorFactory(subjects=[maths]),
+        bad=TutorFactory(subjects=[maths]),
+        taught=TutorFactory(subjects=[maths]),
+        other=TutorFactory(subjects=[maths]),
+        tutoring_student=TutorFactory(subjects=[maths]),
+    )
+    # Equal bookings, so only the rating differs between good and bad
+    for rating in (5, 5):
+        ReviewFactory(session__tutor=graph.good, session__subject=maths, rating=rating)
+    for rating in (1, 1):
+        ReviewFactory(session__tutor=graph.bad, session__subject=maths, rating=rating)
+    # The same 5-star session each, but only taught has one with the student
+    ReviewFactory(session__tutor=graph.taught, session__subject=maths, session__student=graph.student, rating=5)
+    ReviewFactory(session__tutor=graph.other, session__subject=maths, rating=5)
+    return graph
+
+
+def scores_of(model, student):
+    row = score_students(model, [student.pk])[0]
+    return {int(tutor_id): float(score) for tutor_id, score in zip(model.tutor_ids, row)}
+
+
+def test_tutors_without_a_shared_subject_are_excluded(graph):
+    scores = scores_of(TutorModel(), graph.student)
+    assert scores[graph.painter.pk] == -np.inf
+    assert np.isfinite(scores[graph.good.pk])
+
+
+def test_past_tutor_is_kept_without_a_shared_subject(graph):
+    SessionFactory(tutor=graph.painter, student=graph.student, subject=graph.maths, status='completed')
+    assert np.isfinite(scores_of(TutorModel(), graph.student)[graph.painter.pk])
+
+
+def test_users_are_not_recommended_to_themselves(graph):
+    scores = scores_of(TutorModel(), graph.tutoring_student)
+    assert scores[graph.tutoring_student.pk] == -np.inf
+    assert np.isfinite(scores[graph.good.pk])
+
+
+def test_rating_term(graph, settings):
+    scores = scores_of(TutorModel(), graph.student)
+    # Two reviews each, shrunk by the same prior: (10 - 2) stars apart, mapped to 0..1
+    shrunk = (10 - 2) / (settings.RECOMMENDATION_RATING_PRIOR + 2) / 4
+    difference = scores[graph.good.pk] - scores[graph.bad.pk]
+    assert difference == pytest.approx(settings.RECOMMENDATION_WEIGHTS['rating'] * shrunk, abs=1e-5)
+
+
+def test_history_term(graph, settings):
+    scores = scores_of(TutorModel(), graph.student)
+    # A 5-star review of their own maps to a history score of 1
+    difference = scores[graph.taught.pk] - scores[graph.other.pk]
+    assert difference == pytest.approx(settings.RECOMMENDATION_WEIGHTS['history'], abs=1e-5)
+
+
+def test_top_tutors_drops_excluded_tutors():
+    model = SimpleNamespace(tutor_ids=np.array([10, 11, 12]))
+    scores = np.array([[0.5, -np.inf, 1.0], [-np.inf, -np.inf, -np.inf]], dtype=np.float32)
+    assert top_tutors(model, scores, 5) == [[[12, 1.0], [10, 0.5]], []]
+    assert top_tutors(model, scores, 1) == [[[12, 1.0]], []]
+
+
+def test_top_tutors_of_the_graph(graph):
+    model = TutorModel()
+    [result] = top_tutors(model, score_students(model, [graph.student.pk]), 10)
+    tutor_ids = [tutor_id for tutor_id, _ in result]
+    assert graph.painter.pk not in tutor_ids
+    assert tutor_ids[0] == graph.taught.pk
+    assert [score for _, score in result] == sorted((score for _, score in result), reverse=True)
+
+
+@pytest.fixture
+def no_model(monkeypatch):
+    monkeypatch.setattr(recommendations, '_model', None)
+
+
+def test_cache_miss_queues_a_refresh(graph, no_model):
+    with mock.patch('apps.users.tasks.refresh_recommendations.delay') as delay, \
+            mock.patch.object(recommendations, 'TutorModel') as model:
+        assert recommend(graph.student.pk) == []
+        assert recommend(graph.student.pk) == []
+    delay.assert_called_once_with(graph.student.pk)
+    model.assert_not_called()
+
+
+def test_refresh_fills_the_cache(graph, no_model, settings):
+    # Tasks run eagerly in tests: the miss scores the student right away
+    assert recommend(graph.student.pk) == []
+    model = TutorModel()
+    expected = top_tutors(model, score_students(model, [graph.student.pk]), settings.RECOMMENDATION_CACHE_SIZE)[0]
+    assert expected
+    assert recommend(graph.student.pk) == expected
+
+    recommendations.invalidate([graph.student.pk])
+    assert cache.get(recommendations.cache_key(graph.student.pk)) is None
+
+
+def test_recommended_view(auth_client, graph, no_model):
+    client = auth_client(graph.student)
+    assert client.get('/api/users/tutors/recommended/').json() == []
+    response = client.get('/api/users/tutors/recommended/', {'limit': 2})
+    assert response.status_code == 200
+    assert [tutor['id'] for tutor in response.json()] == [graph.taught.pk, graph.good.pk]
+    assert all('score' in tutor for tutor in response.json())
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from apps.users.models import User
+from apps.users.tests.factories import UserFactory
+from apps.users.views import token_pair
+
+pytestmark = pytest.mark.django_db
+
+PASSWORD = 'TestPass123!'
+
+
+def bearer(api_client, access):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return api_client
+
+
+def test_password_hash_upgrade_keeps_tokens_valid(api_client):
+    user = UserFactory()
+    User.objects.filter(pk=user.pk).update(password=make_password(PASSWORD, hasher='md5'))
+    with override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]):
+        # Logging in upgrades the hash through set_password()
+        response = api_client.post('/api/auth/login/', {'username': user.username, 'password': PASSWORD})
+        assert response.status_code == 200
+        assert User.objects.get(pk=user.pk).password.startswith('pbkdf2_sha256$')
+    assert bearer(api_client, response.data['access']).get('/api/auth/me/').status_code == 200
+
+
+def test_password_change_revokes_older_tokens(api_client):
+    user = UserFactory()
+    old = token_pair(user)
+    response = bearer(api_client, old['access']).post(
+        '/api/auth/password/', {'old_password': PASSWORD, 'new_password': 'An0ther-Secret'}
+    )
+    assert response.status_code == 200
+    assert bearer(api_client, old['access']).get('/api/auth/me/').status_code == 401
+    assert bearer(api_client, response.data['access']).get('/api/auth/me/').status_code == 200
+    assert User.objects.get(pk=user.pk).check_password('An0ther-Secret')
+
+
+def test_password_change_checks_old_password(api_client):
+    user = UserFactory()
+    response = bearer(api_client, token_pair(user)['access']).post(
+        '/api/auth/password/', {'old_password': 'wrong', 'new_password': 'An0ther-Secret'}
+    )
+    assert response.status_code == 400
+    assert 'old_password' in response.data
+
+
+def test_revoke_signs_out_everywhere(api_client):
+    user = UserFactory()
+    access = token_pair(user)['access']
+    assert bearer(api_client, access).post('/api/auth/revoke/').status_code == 204
+    assert bearer(api_client, access).get('/api/auth/me/').status_code == 401
+    assert User.objects.get(pk=user.pk).token_version == 1
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import RegisterView, MeView, SubjectListView
+from .views import RegisterView, MeView, SubjectListView, PasswordChangeView, TokenRevokeView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('me/', MeView.as_view(), name='me'),
+    path('password/', PasswordChangeView.as_view(), name='password-change'),
+    path('revoke/', TokenRevokeView.as_view(), name='token-revoke'),
     path('subjects/', SubjectListView.as_view(), name='subject-list'),
 ]
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import UserListView, UserDetailView, TutorListView
+from .views import UserListView, UserDetailView, TutorListView, TutorLeaderboardView, RecommendedTutorsView
 
 urlpatterns = [
     path('', UserListView.as_view(), name='user-list'),
     path('tutors/', TutorListView.as_view(), name='tutor-list'),
+    path('tutors/leaderboard/', TutorLeaderboardView.as_view(), name='tutor-leaderboard'),
+    path('tutors/recommended/', RecommendedTutorsView.as_view(), name='tutor-recommended'),
     path('<int:pk>/', UserDetailView.as_view(), name='user-detail'),
 ]
@@ -1,33 +1,75 @@
+from django.conf import settings
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework_simplejwt.views import TokenObtainPairView
+from apps.core.caching import CachedResponseMixin
 from .models import User, Subject
-from .serializers import UserSerializer, RegisterSerializer, SubjectSerializer
+from .recommendations import recommend
+from .filters import StableOrderingFilter, TutorFilter
+from .serializers import (
+    UserSerializer, RegisterSerializer, SubjectSerializer, TutorSerializer,
+    PasswordChangeSerializer, TokenWithVersionSerializer,
+)
+
+
+class LoginView(TokenObtainPairView):
+    throttle_scope = 'login'
 
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'register'
+
+
+def token_pair(user):
+    refresh = TokenWithVersionSerializer.get_token(user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
 
 
-class MeView(APIView):
+class PasswordChangeView(generics.GenericAPIView):
+    """Change the password, revoking every token issued before; returns a new pair"""
+    serializer_class = PasswordChangeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'password'
 
-    def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'user': self.request.user}
 
-    def patch(self, request):
-        serializer = UserSerializer(request.user, data=request.data, partial=True)
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+        user = request.user
+        user.set_password(serializer.validated_data['new_password'])
+        user.rotate_token_version('password')
+        return Response(token_pair(user))
+
+
+class TokenRevokeView(generics.GenericAPIView):
+    """Sign out everywhere: revoke every token issued to the user"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        request.user.rotate_token_version()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MeView(CachedResponseMixin, generics.RetrieveUpdateAPIView):
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'patch', 'head', 'options']
+    cache_models = ('users.User', 'users.Subject')
+    cache_per_user = True
+
+    def get_object(self):
+        # request.user only carries the auth fields, see apps.users.authentication
+        return User.objects.with_details().get(pk=self.request.user.pk)
 
 
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.with_details()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -35,23 +77,71 @@ class UserListView(generics.ListAPIView):
 
 
 class UserDetailView(generics.RetrieveAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.with_details()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class TutorListView(generics.ListAPIView):
-    queryset = User.objects.filter(role='tutor')
-    serializer_class = UserSerializer
+class TutorListView(CachedResponseMixin, generics.ListAPIView):
+    """Tutors with their stats: ?ordering=-rating_avg&min_rating=4&min_reviews=3"""
+    queryset = User.objects.filter(role='tutor').with_stats().with_details()
+    serializer_class = TutorSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['subjects']
+    filter_backends = [DjangoFilterBackend, StableOrderingFilter]
+    filterset_class = TutorFilter
+    ordering_fields = ['rating_avg', 'review_count', 'completed_sessions', 'date_joined']
+    cache_models = ('users.User', 'users.Subject', 'tutoring.TutorStats')
+
+
+class TutorLeaderboardView(CachedResponseMixin, generics.ListAPIView):
+    """Best rated tutors with at least TUTOR_LEADERBOARD_MIN_REVIEWS reviews, optionally ?subject="""
+    serializer_class = TutorSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    cache_models = ('users.User', 'users.Subject', 'tutoring.TutorStats')
+
+    def get_queryset(self):
+        tutors = User.objects.filter(
+            role='tutor',
+            is_active=True,
+            tutor_stats__review_count__gte=settings.TUTOR_LEADERBOARD_MIN_REVIEWS
+        )
+        subject = self.request.query_params.get('subject', '')
+        if subject.isdigit():
+            tutors = tutors.filter(subjects=subject)
+        return tutors.with_stats().with_details().order_by(
+            '-tutor_stats__rating_avg', '-tutor_stats__review_count', 'pk'
+        )[:settings.TUTOR_LEADERBOARD_SIZE]
+
+
+class RecommendedTutorsView(generics.ListAPIView):
+    """Tutors recommended for the current user, best first: ?limit="""
+    serializer_class = TutorSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), settings.RECOMMENDATION_CACHE_SIZE) if limit.isdigit() else 10
+        recommended = recommend(request.user.pk)[:limit]
+        tutors = User.objects.filter(
+            pk__in=[tutor_id for tutor_id, _ in recommended],
+            is_active=True
+        ).with_stats().with_details().in_bulk()
+
+        data = []
+        for tutor_id, score in recommended:
+            if tutor_id in tutors:
+                data.append({**self.get_serializer(tutors[tutor_id]).data, 'score': score})
+        return Response(data)
 
 
-class SubjectListView(generics.ListCreateAPIView):
+class SubjectListView(CachedResponseMixin, generics.ListCreateAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_models = ('users.Subject',)
+    cache_timeout = 60 * 60
 
     def get_permissions(self):
         if self.request.method == 'GET':
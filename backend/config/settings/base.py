@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -33,11 +35,15 @@ INSTALLED_APPS = [
     'apps.support',
     'apps.notifications',
     'apps.assistant',
+    'apps.search',
+    'apps.core',
 ]
 
 MIDDLEWARE = [
+    # Outermost so it times the whole chain; removed unless PERF_PROFILING
+    'apps.core.profiling.PerfMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.middleware.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -111,7 +117,6 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -120,7 +125,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -130,8 +135,24 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.FlexiblePagination',
     'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_CLASSES': ['apps.core.throttling.TokenBucketThrottle'],
+    # Token buckets, see apps.core.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': os.getenv('THROTTLE_IP_RATE', '600/min'),
+        'user': os.getenv('THROTTLE_USER_RATE', '1200/min'),
+        'login.ip': '10/min',
+        'register.ip': '5/hour',
+        'password.user': '10/hour',
+        'support.ip': '5/min',
+        'assistant.ip': os.getenv('THROTTLE_ASSISTANT_IP_RATE', '20/min'),
+        'assistant.global': os.getenv('THROTTLE_ASSISTANT_GLOBAL_RATE', '600/min'),
+    },
+    # Proxies in front of Django that append to X-Forwarded-For; throttles key
+    # on the address the outermost one saw. 1 for the bundled nginx, 0 when
+    # clients reach Django directly (the header is theirs to forge then)
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
 }
 
 SIMPLE_JWT = {
@@ -140,6 +161,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.serializers.TokenWithVersionSerializer',
 }
 
 CORS_ALLOWED_ORIGINS = os.getenv(
@@ -149,4 +171,173 @@ CORS_ALLOWED_ORIGINS = os.getenv(
 
 CORS_ALLOW_CREDENTIALS = True
 
-DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    # Material files, deduplicated into blobs of the default storage
+    'materials': {
+        'BACKEND': 'apps.materials.storage.ContentAddressedStorage',
+        'OPTIONS': {'storage': 'default', 'location': 'blobs'},
+    },
+}
+
+# Forum reply threads
+FORUM_REPLY_MAX_DEPTH = int(os.getenv('FORUM_REPLY_MAX_DEPTH', '8'))
+FORUM_REPLY_CHILDREN_LIMIT = int(os.getenv('FORUM_REPLY_CHILDREN_LIMIT', '50'))
+
+# Full-text search
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'english')
+SEARCH_MAX_TERMS = 8
+SEARCH_MAX_RESULTS = 20
+
+# Pagination (see apps.core.pagination)
+PAGINATION_ESTIMATE_COUNTS = os.getenv('PAGINATION_ESTIMATE_COUNTS', 'false').lower() == 'true'
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', '10000'))
+
+# Celery (background jobs)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+CELERY_TASK_IGNORE_RESULT = True
+# Image and document processing runs on its own workers, see docker-compose
+CELERY_TASK_ROUTES = {
+    'apps.users.tasks.process_avatar': {'queue': 'media'},
+    'apps.materials.tasks.process_material': {'queue': 'media'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-tutor-stats': {
+        'task': 'apps.tutoring.tasks.reconcile_tutor_stats',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'precompute-recommendations': {
+        'task': 'apps.users.tasks.precompute_recommendations',
+        'schedule': crontab(minute=15),
+    },
+    'purge-expired-uploads': {
+        'task': 'apps.materials.tasks.purge_expired_uploads',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'collect-material-blobs': {
+        'task': 'apps.materials.tasks.collect_material_blobs',
+        'schedule': crontab(hour=4, minute=30),
+    },
+    'flush-material-download-counts': {
+        'task': 'apps.materials.tasks.flush_download_counts',
+        'schedule': 60.0,
+    },
+}
+
+# Notifications
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_FANOUT_CONCURRENCY = 100
+NOTIFICATIONS_DIGEST_WINDOW = int(os.getenv('NOTIFICATIONS_DIGEST_WINDOW', '60'))
+NOTIFICATIONS_REDIS_URL = os.getenv('NOTIFICATIONS_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+
+# WebSocket connections (seconds)
+WS_IDLE_TIMEOUT = int(os.getenv('WS_IDLE_TIMEOUT', '120'))
+
+# AI assistant (any OpenAI-compatible endpoint, see ASSISTANT_BASE_URL)
+ASSISTANT_API_KEY = os.getenv('OPENAI_API_KEY', '')
+ASSISTANT_BASE_URL = os.getenv('ASSISTANT_BASE_URL', '')
+ASSISTANT_MODEL = os.getenv('ASSISTANT_MODEL', 'gpt-4o-mini')
+ASSISTANT_TIMEOUT = float(os.getenv('ASSISTANT_TIMEOUT', '20'))
+ASSISTANT_REQUEST_TIMEOUT = float(os.getenv('ASSISTANT_REQUEST_TIMEOUT', '60'))
+ASSISTANT_MAX_RETRIES = int(os.getenv('ASSISTANT_MAX_RETRIES', '1'))
+ASSISTANT_MAX_CONCURRENCY = int(os.getenv('ASSISTANT_MAX_CONCURRENCY', '20'))
+ASSISTANT_QUEUE_TIMEOUT = float(os.getenv('ASSISTANT_QUEUE_TIMEOUT', '2'))
+ASSISTANT_CACHE_TIMEOUT = int(os.getenv('ASSISTANT_CACHE_TIMEOUT', str(60 * 60 * 6)))
+ASSISTANT_CACHE_MAX_ANSWER_CHARS = 8000
+
+# Assistant retrieval index (see apps.assistant.retrieval)
+ASSISTANT_INDEX_PATH = os.getenv('ASSISTANT_INDEX_PATH', str(BASE_DIR / 'var' / 'assistant_index.npz'))
+ASSISTANT_EMBEDDING_FUNCTION = os.getenv('ASSISTANT_EMBEDDING_FUNCTION', 'apps.assistant.embeddings.hashing_embedding')
+ASSISTANT_EMBEDDING_DIM = int(os.getenv('ASSISTANT_EMBEDDING_DIM', '512'))
+ASSISTANT_CHUNK_WORDS = 120
+ASSISTANT_CHUNK_OVERLAP = 20
+ASSISTANT_RETRIEVAL_TOP_K = int(os.getenv('ASSISTANT_RETRIEVAL_TOP_K', '5'))
+ASSISTANT_RETRIEVAL_MIN_SCORE = 0.05
+ASSISTANT_INDEX_DELAY = int(os.getenv('ASSISTANT_INDEX_DELAY', '10'))
+
+# Throttle buckets (see apps.core.throttling)
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+
+# Response caching (see apps.core.caching); labels whose saves bump versions
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', '300'))
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+# Longest a request waits for another one's rebuild before building itself
+RESPONSE_CACHE_LOCK_WAIT = 0.5
+RESPONSE_CACHE_MODELS = [
+    'users.User',
+    'users.Subject',
+    'tutoring.TutoringSession',
+    'tutoring.SessionReview',
+    'tutoring.TutorStats',
+    'materials.StudyMaterial',
+    'forum.Discussion',
+    'forum.Reply',
+]
+
+# Authenticated user cache (see apps.users.authentication)
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+AUTH_USER_CACHE_LOCAL_TTL = int(os.getenv('AUTH_USER_CACHE_LOCAL_TTL', '5'))
+AUTH_USER_CACHE_SIZE = 10000
+
+# Tutor leaderboard (see apps.tutoring.stats for the aggregates)
+TUTOR_LEADERBOARD_SIZE = 20
+TUTOR_LEADERBOARD_MIN_REVIEWS = int(os.getenv('TUTOR_LEADERBOARD_MIN_REVIEWS', '3'))
+
+# Tutor recommendations (see apps.users.recommendations)
+RECOMMENDATION_WEIGHTS = {
+    'subjects': 0.4,
+    'popularity': 0.15,
+    'history': 0.15,
+    'rating': 0.2,
+    'availability': 0.1,
+}
+RECOMMENDATION_RATING_PRIOR = 5
+RECOMMENDATION_AVAILABILITY_DAYS = 14
+RECOMMENDATION_AVAILABILITY_HOURS = 20
+RECOMMENDATION_MODEL_TTL = int(os.getenv('RECOMMENDATION_MODEL_TTL', '600'))
+RECOMMENDATION_CACHE_SIZE = 50
+RECOMMENDATION_CACHE_TIMEOUT = 60 * 60 * 2
+
+# Chunked material uploads (see apps.materials.uploads), sizes in bytes
+MATERIAL_UPLOAD_MAX_SIZE = int(os.getenv('MATERIAL_UPLOAD_MAX_SIZE', str(2 * 1024 ** 3)))
+MATERIAL_UPLOAD_CHUNK_SIZE = 8 * 1024 ** 2
+MATERIAL_UPLOAD_MIN_CHUNK_SIZE = 5 * 1024 ** 2
+MATERIAL_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 ** 2
+MATERIAL_UPLOAD_EXPIRY = 60 * 60 * 24
+MATERIAL_UPLOAD_SPOOL_MEMORY = 1024 ** 2
+MATERIAL_UPLOAD_MEMORY_LIMIT = int(os.getenv('MATERIAL_UPLOAD_MEMORY_LIMIT', str(32 * 1024 ** 2)))
+MATERIAL_UPLOAD_MEMORY_WAIT = 5
+# A completion still assembling after this long (seconds) is taken to have died
+MATERIAL_UPLOAD_ASSEMBLY_TIMEOUT = 60 * 30
+# Blob files without a row are collected once older than this (seconds)
+MATERIAL_ORPHAN_BLOB_AGE = 60 * 60 * 24
+
+# Presigned direct-to-bucket transfers (see apps.materials.direct), used
+# when the default storage is S3 compatible
+MATERIAL_DIRECT_UPLOADS = os.getenv('MATERIAL_DIRECT_UPLOADS', 'true').lower() == 'true'
+MATERIAL_PRESIGNED_URL_EXPIRY = int(os.getenv('MATERIAL_PRESIGNED_URL_EXPIRY', '900'))
+
+# Material downloads (see apps.materials.downloads). MATERIAL_DOWNLOAD_ACCEL
+# hands files to the web server: 'x-accel-redirect' (nginx, serving
+# MEDIA_ROOT under the internal MATERIAL_DOWNLOAD_ACCEL_PREFIX location) or
+# 'x-sendfile'; empty serves them from Django
+MATERIAL_DOWNLOAD_ACCEL = os.getenv('MATERIAL_DOWNLOAD_ACCEL', '')
+MATERIAL_DOWNLOAD_ACCEL_PREFIX = os.getenv('MATERIAL_DOWNLOAD_ACCEL_PREFIX', '/protected-media/')
+MATERIAL_DOWNLOAD_REDIS_URL = os.getenv('MATERIAL_DOWNLOAD_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+
+# Derived media (see apps.core.media)
+MEDIA_AVATAR_SIZES = [64, 128, 256]
+MEDIA_THUMBNAIL_WIDTH = 320
+MEDIA_WEBP_QUALITY = 80
+MEDIA_TEXT_EXTRACT_CHARS = 100000
+
+# Request profiling (see apps.core.profiling): per-route query counts, DB and
+# serializer time and N+1 candidates, reported at /api/_perf/
+PERF_PROFILING = os.getenv('PERF_PROFILING', 'false').lower() == 'true'
+PERF_PROFILING_SAMPLE_RATE = float(os.getenv('PERF_PROFILING_SAMPLE_RATE', '1.0'))
+# Executions of one query shape in a request that count as duplicated
+PERF_DUPLICATE_QUERY_THRESHOLD = 3
+PERF_LATENCY_SAMPLES = 1000
+PERF_REDIS_URL = os.getenv('PERF_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
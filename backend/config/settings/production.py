@@ -34,7 +34,7 @@ if os.getenv('SENTRY_DSN'):
 
 # S3 Storage
 if os.getenv('USE_S3', 'false').lower() == 'true':
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    STORAGES = {**STORAGES, 'default': {'BACKEND': 'storages.backends.s3.S3Storage'}}
     AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
     AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME')
@@ -42,6 +42,7 @@ if os.getenv('USE_S3', 'false').lower() == 'true':
     AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'auto')
     AWS_DEFAULT_ACL = None
     AWS_S3_FILE_OVERWRITE = False
+    AWS_S3_SIGNATURE_VERSION = 's3v4'
 
 # Logging
 LOGGING = {
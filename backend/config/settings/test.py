@@ -0,0 +1,15 @@
+from .base import *
+
+DEBUG = False
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+CELERY_TASK_ALWAYS_EAGER = True
+
+# Token buckets live in Redis; tests exercise throttling explicitly
+REST_FRAMEWORK = {**REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+
+MEDIA_ROOT = BASE_DIR / 'var' / 'test_media'
@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
+from apps.core.views import PerfReportView
+from apps.users.views import LoginView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/auth/login/', LoginView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/', include('apps.users.urls')),
     path('api/users/', include('apps.users.urls_users')),
@@ -14,7 +16,10 @@ urlpatterns = [
     path('api/sessions/', include('apps.tutoring.urls')),
     path('api/discussions/', include('apps.forum.urls')),
     path('api/support/', include('apps.support.urls')),
+    path('api/notifications/', include('apps.notifications.urls')),
     path('api/assistant/', include('apps.assistant.urls')),
+    path('api/search/', include('apps.search.urls')),
+    path('api/_perf/', PerfReportView.as_view(), name='perf-report'),
 ]
 
 if settings.DEBUG:
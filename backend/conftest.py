@@ -0,0 +1,51 @@
+import pytest
+import redis
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached responses and auth records must not leak between tests
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def auth_client(api_client):
+    """``auth_client(user)``: a client authenticated as ``user``"""
+    def login(user):
+        api_client.force_authenticate(user)
+        return api_client
+    return login
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Files stored by the test go to its own temporary MEDIA_ROOT"""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point every Redis client at one in-process fake server"""
+    import fakeredis
+    from apps.core import profiling
+    from apps.materials import downloads
+    from apps.notifications import tasks
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+    clients = [profiling.get_client, downloads.get_client, tasks.get_client]
+    for get_client in clients:
+        get_client.cache_clear()
+    yield fakeredis.FakeRedis(server=server)
+    for get_client in clients:
+        get_client.cache_clear()